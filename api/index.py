@@ -8,9 +8,12 @@ from functools import wraps
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from orchestrator import ParadoxGPTOrchestrator
-    from config import validate_api_keys
+    from orchestrator import ParadoxGPTOrchestrator, MODES
+    from config import validate_api_keys, REQUEST_DEADLINE
+    from retry_policy import Deadline
     from firebase_admin_config import verify_token, save_chat, get_user_chats, is_firebase_ready
+    from circuit_breaker import upstream_health
+    from instrumentation import get_default_histogram
 except ImportError as e:
     print(f"Import error: {e}")
     # Create dummy functions for missing imports
@@ -18,6 +21,8 @@ except ImportError as e:
     def save_chat(*args, **kwargs): pass
     def get_user_chats(*args, **kwargs): return []
     def is_firebase_ready(): return False
+    def upstream_health(): return {'status': 'unknown'}
+    def get_default_histogram(): return None
 
 import logging
 
@@ -271,12 +276,20 @@ def chat():
         if orchestrator is None:
             return jsonify({'error': 'Service temporarily unavailable'}), 503
 
+        # Budget for the whole request, so retries stop before the platform limit
+        deadline = Deadline.after(REQUEST_DEADLINE)
+
         data = request.json
         task = data.get('message')
 
         if not task:
             return jsonify({'error': 'No message provided'}), 400
 
+        # Optional per-request pipeline, one of MODES: "single", "multi_agent" or "auto"
+        mode = data.get('mode')
+        if mode is not None and mode not in MODES:
+            return jsonify({'error': f"Unknown mode {mode!r}; expected one of {list(MODES)}"}), 400
+
         # Save user message if authenticated
         if hasattr(request, 'user') and request.user:
             try:
@@ -285,7 +298,7 @@ def chat():
                 logger.warning(f"Failed to save user message: {e}")
 
         # Process the task
-        result = orchestrator.process_task(task)
+        result = orchestrator.process_task(task, deadline=deadline, mode=mode)
 
         if "final_solution" in result and result["final_solution"]:
             # Detect content type for enhanced frontend handling
@@ -307,6 +320,13 @@ def chat():
                     'has_html': content_type == 'html' or 'html' in content_type,
                     'has_code': '```' in content,
                     'generated_by': 'ParadoxGPT',
+                    'mode': result.get('metadata', {}).get('mode'),
+                    'route': (result.get('metadata', {}).get('routing') or {}).get('route'),
+                    'critical_path': (result.get('metadata', {}).get('timeline') or {}).get('critical_path'),
+                    'stream_time_saved': (result.get('metadata', {}).get('streaming') or {}).get('time_saved'),
+                    'missing_subtasks': [
+                        entry['number'] for entry in result.get('metadata', {}).get('missing_subtasks') or []
+                    ],
                     'user_authenticated': hasattr(request, 'user') and request.user is not None
                 }
             }
@@ -377,10 +397,40 @@ def health_check():
             'firebase': is_firebase_ready(),
             'environment': os.getenv('FLASK_ENV', 'unknown')
         }
+        if orchestrator is not None:
+            status['response_cache'] = orchestrator.api_client.get_response_cache_stats()
+            status['coalescing'] = orchestrator.flights.stats()
+            status['hedging'] = orchestrator.api_client.get_hedge_stats()
+            status['transports'] = orchestrator.api_client.get_transport_stats()
+            status['routing'] = orchestrator.router.stats()
+            context_cache = orchestrator.api_client.context_cache
+            status['context_cache'] = context_cache.stats() if context_cache is not None else None
+            if orchestrator.key_pool is not None:
+                status['key_pool'] = orchestrator.key_pool.stats()
+        histogram = get_default_histogram()
+        if histogram is not None:
+            status['attempts'] = histogram.snapshot()
+
+        # Report real upstream health from the circuit breakers
+        upstream = upstream_health()
+        status['upstream'] = upstream
+        if upstream['status'] == 'down':
+            status['status'] = 'unhealthy'
+            return jsonify(status), 503
+        if upstream['status'] == 'degraded':
+            status['status'] = 'degraded'
         return jsonify(status)
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """Per-attempt Gemini metrics in the Prometheus text format"""
+    histogram = get_default_histogram()
+    if histogram is None:
+        return "Histogram sink is disabled (INSTRUMENTATION_SINKS)\n", 404, {'Content-Type': 'text/plain'}
+    return histogram.render_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 def detect_content_type(content):
     """Detect the type of content for enhanced frontend handling."""
     content_lower = content.lower()
@@ -5,16 +5,44 @@ This module handles API calls to the Gemini-2.0-Flash API,
 including authentication, request formatting, and error handling.
 """
 
+import re
+import math
 import time
 import json
+import queue
 import logging
-from typing import Dict, Any, Optional
+import threading
+import concurrent.futures
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Generator, Iterator, List, Optional, Sequence, Tuple
 
 import google.generativeai as genai
-import requests
+from google.ai import generativelanguage as glm
 from requests.exceptions import RequestException, Timeout
 
-from config import GEMINI_API_BASE_URL, REQUEST_TIMEOUT, MAX_RETRIES
+from config import (
+    GEMINI_API_BASE_URL, GEMINI_STREAM_URL, GEMINI_MODEL_NAME, GEMINI_SDK_TRANSPORT, GEMINI_SDK_ENDPOINT,
+    REQUEST_TIMEOUT, MAX_RETRIES, MODEL_CACHE_SIZE, TRANSPORTS,
+    RESPONSE_CACHE_MAX_TEMPERATURE, COALESCE_REQUESTS, RATE_LIMIT_MAX_WAIT, MAX_PROMPT_TOKENS,
+    PROMPT_OVERFLOW_POLICY
+)
+from http_pool import get_session
+from response_cache import ResponseCache, get_default_cache, make_cache_key
+from single_flight import SingleFlight, fingerprint
+from rate_limiter import RateLimitExceeded, RateLimitWaitCancelled, get_rate_limiter, estimate_tokens
+from key_pool import APIKeyPool, PooledKey, SUCCESS, FAILURE, EXHAUSTED, SKIPPED
+from circuit_breaker import CircuitBreaker, get_breaker
+from retry_policy import (
+    Deadline, RetryPolicy, error_status, parse_retry_after, retry_after_from_body, retry_after_from_error,
+    retry_after_from_response
+)
+from hedging import RequestHedger, get_default_hedger
+from token_estimator import get_default_estimator
+from context_cache import ContextCacheRegistry, get_default_context_cache
+from instrumentation import AttemptEvent, Hook, emit, get_default_hooks
+from transport_selector import TransportSelector, PREFERRED, FALLBACK, RACE, get_default_transport_selector
+from utils import hash_api_key
 
 # Configure logging
 logging.basicConfig(
@@ -23,27 +51,978 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Process-wide group so identical prompts from any client share one generation
+generation_flights = SingleFlight("Gemini")
+
+# SDK service clients, one per API key; nothing goes through genai.configure's global state
+_sdk_clients: Dict[str, Any] = {}
+_sdk_clients_lock = threading.Lock()
+
+def get_sdk_client(api_key: str) -> Any:
+    """
+    Get the SDK service client bound to an API key, creating it on first use.
+
+    Args:
+        api_key: The API key the client authenticates with
+
+    Returns:
+        A GenerativeServiceClient shared by every model using this key
+    """
+    key_id = hash_api_key(api_key)
+    with _sdk_clients_lock:
+        client = _sdk_clients.get(key_id)
+        if client is None:
+            client_options = {"api_key": api_key}
+            if GEMINI_SDK_ENDPOINT:
+                client_options["api_endpoint"] = GEMINI_SDK_ENDPOINT
+            client = glm.GenerativeServiceClient(client_options=client_options, transport=GEMINI_SDK_TRANSPORT)
+            _sdk_clients[key_id] = client
+        return client
+
+def is_quota_error(error: Exception) -> bool:
+    """
+    Check whether an SDK error means the key's quota is exhausted.
+
+    Args:
+        error: The exception raised by the SDK
+
+    Returns:
+        True for 429 / RESOURCE_EXHAUSTED errors
+    """
+    message = f"{type(error).__name__} {error}".lower()
+    return "429" in message or "resourceexhausted" in message or "resource_exhausted" in message or "quota" in message
+
+def outcome_for_status(status_code: int) -> str:
+    """
+    Map a REST status code to a key pool outcome.
+
+    Args:
+        status_code: The HTTP status code
+
+    Returns:
+        EXHAUSTED for 429, FAILURE for auth and server errors, SUCCESS otherwise
+    """
+    if status_code == 429:
+        return EXHAUSTED
+    if status_code in (401, 403) or status_code >= 500:
+        return FAILURE
+    return SUCCESS
+
+def adjust_temperature(prompt: str, temperature: float, system_instruction: str = "") -> float:
+    """
+    Raise the temperature for web design prompts.
+
+    Args:
+        prompt: The prompt to send to the model
+        temperature: The requested temperature
+        system_instruction: The system instruction sent with the prompt, if any
+
+    Returns:
+        The temperature to actually use
+    """
+    text = f"{system_instruction}\n{prompt}".lower()
+    # For web design tasks, ensure temperature is high enough for creativity
+    if "html" in text and "css" in text:
+        # Ensure minimum temperature of 0.85 for web design tasks
+        temperature = max(temperature, 0.85)
+    return temperature
+
+def build_request_body(prompt: str, temperature: float, system_instruction: Optional[str] = None,
+                       cached_content: Optional[str] = None,
+                       generation_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build the JSON body for a generateContent REST call.
+
+    Args:
+        prompt: The prompt to send to the model
+        temperature: Controls randomness (0.0 to 1.0)
+        system_instruction: Static instructions sent as the systemInstruction
+        cached_content: Name of a cachedContents resource that already holds
+                        the system instruction; takes its place when given
+        generation_config: Extra generationConfig fields in REST form
+                           (e.g. responseMimeType, responseSchema)
+
+    Returns:
+        The request body
+    """
+    body: Dict[str, Any] = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": temperature
+        }
+    }
+    if generation_config:
+        body["generationConfig"].update(generation_config)
+    if cached_content:
+        body["cachedContent"] = cached_content
+    elif system_instruction:
+        body["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    return body
+
+def sdk_generation_config(generation_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate REST generationConfig field names (responseMimeType) to the SDK's (response_mime_type).
+
+    Args:
+        generation_config: Extra generationConfig fields in REST form
+
+    Returns:
+        The same settings keyed the way genai.GenerativeModel expects, or None
+    """
+    if not generation_config:
+        return None
+    return {re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower(): value for name, value in generation_config.items()}
+
+def extract_text(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Extract the generated text from a generateContent REST response.
+
+    Args:
+        result: The decoded JSON response
+
+    Returns:
+        The text of the first candidate, or None if there is none
+    """
+    if "candidates" in result and len(result["candidates"]) > 0:
+        content = result["candidates"][0].get("content", {})
+        if "parts" in content and len(content["parts"]) > 0:
+            return content["parts"][0].get("text")
+    return None
+
+def usage_from_sdk_response(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Get the token counts the SDK reports for a response, in REST field names.
+
+    Args:
+        response: A GenerateContentResponse
+
+    Returns:
+        promptTokenCount / candidatesTokenCount, or None if not reported
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if not usage or not getattr(usage, "prompt_token_count", 0):
+        return None
+    return {
+        "promptTokenCount": usage.prompt_token_count,
+        "candidatesTokenCount": usage.candidates_token_count,
+        "cachedContentTokenCount": getattr(usage, "cached_content_token_count", 0)
+    }
+
+def parse_sse_line(line: str) -> Optional[str]:
+    """
+    Extract the text carried by one line of a streamGenerateContent SSE response.
+
+    Args:
+        line: A decoded line from the event stream
+
+    Returns:
+        The text chunk, or None for blank, comment or non-data lines
+    """
+    line = line.strip()
+    if not line.startswith("data:"):
+        return None
+    payload = line[len("data:"):].strip()
+    if not payload or payload == "[DONE]":
+        return None
+    return extract_text(json.loads(payload))
+
+class StreamInterruptedError(Exception):
+    """Raised when a stream fails after some chunks were already delivered."""
+
+
+class StreamFailedError(Exception):
+    """Raised when no streaming attempt got through: the retries ran out before any output."""
+
+class AttemptResult:
+    """What one attempt on a transport produced."""
+
+    def __init__(self, text: Optional[str] = None, status: Optional[int] = None,
+                 error: Optional[BaseException] = None, retry_after: Optional[float] = None,
+                 usage: Optional[Dict[str, int]] = None, retryable: bool = True, skipped: bool = False,
+                 ttfb: Optional[float] = None, rate_limited: bool = False):
+        """
+        Initialize the result.
+
+        Args:
+            text: The generated text, if the attempt succeeded
+            status: HTTP status of the response (or of the SDK error)
+            error: The exception raised, for network and SDK errors
+            retry_after: Delay the server asked for, if any
+            usage: usageMetadata reported by Gemini, if any
+            retryable: Whether another attempt could succeed
+            skipped: True if nothing was sent (the circuit was open)
+            ttfb: Seconds until the response headers arrived, if the transport knows
+            rate_limited: True if nothing was sent because the key's local rate
+                          limit would have queued the request too long
+        """
+        self.text = text
+        self.status = status
+        self.error = error
+        self.retry_after = retry_after
+        self.usage = usage
+        self.retryable = retryable
+        self.skipped = skipped
+        self.ttfb = ttfb
+        self.rate_limited = rate_limited
+
+    @property
+    def outcome(self) -> str:
+        """The key pool outcome of the attempt."""
+        if self.skipped or self.rate_limited:
+            return SKIPPED
+        if self.error is not None and is_quota_error(self.error):
+            return EXHAUSTED
+        if self.status is not None:
+            # SDK errors carry their HTTP status too, so client-side errors
+            # (InvalidArgument, FailedPrecondition, ...) are not held against the key
+            return outcome_for_status(self.status)
+        return FAILURE
+
+    def describe(self) -> str:
+        """Short description of a failed attempt for logging."""
+        if self.skipped:
+            return "circuit open"
+        if self.rate_limited:
+            return "local rate limit"
+        if self.error is not None:
+            return str(self.error)
+        if self.status == 200:
+            return "empty or invalid response"
+        if self.status is not None:
+            return f"status code {self.status}"
+        return "not sent"
+
+
+class Transport(ABC):
+    """One way of sending a generateContent request to Gemini."""
+
+    name = "transport"
+
+    @abstractmethod
+    def send(self, client: "GeminiAPIClient", api_key: str, prompt: str, temperature: float,
+             system_instruction: Optional[str], cached_content: Optional[str],
+             deadline: Optional[Deadline]) -> AttemptResult:
+        """
+        Send a single request; retries, keys and breakers are the client's job.
+
+        Args:
+            client: The client making the attempt (timeouts, retry policy, session)
+            api_key: The key to authenticate with
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            cached_content: cachedContents name holding the system instruction, if any
+            deadline: When the caller needs an answer by
+
+        Returns:
+            The attempt's result; transports report failures here rather than raising
+        """
+        pass
+
+    def stream(self, client: "GeminiAPIClient", api_key: str, prompt: str, temperature: float,
+               system_instruction: Optional[str], cached_content: Optional[str],
+               deadline: Optional[Deadline]) -> Generator[str, None, AttemptResult]:
+        """
+        Send a single streaming request, yielding text chunks as they arrive.
+
+        Transports without a streaming endpoint send one request and yield its
+        whole text as a single chunk.
+
+        Args:
+            client: The client making the attempt (timeouts, retry policy, session)
+            api_key: The key to authenticate with
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            cached_content: cachedContents name holding the system instruction, if any
+            deadline: When the caller needs the stream to have started by
+
+        Yields:
+            Text chunks in order
+
+        Returns:
+            The attempt's result without its text: status 200 and no error once
+            the stream ran to its end, the failure otherwise (also after chunks)
+        """
+        result = self.send(client, api_key, prompt, temperature, system_instruction, cached_content, deadline)
+        if result.text:
+            yield result.text
+        result.text = None
+        return result
+
+
+class SDKTransport(Transport):
+    """google-generativeai SDK (gRPC or REST, per GEMINI_SDK_TRANSPORT)."""
+
+    name = "sdk"
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        try:
+            # Reuse the configured model for these settings
+            model = client._get_model(temperature, generation_config=sdk_generation_config(client.generation_config),
+                                      api_key=api_key, system_instruction=system_instruction,
+                                      cached_content=cached_content)
+            request_options = {"timeout": client._attempt_timeout(deadline)} if deadline else None
+            response = model.generate_content(prompt, request_options=request_options)
+            text = response.text if response else None
+        except Exception as e:
+            return AttemptResult(
+                error=e, status=error_status(e), retry_after=retry_after_from_error(e),
+                retryable=client.retry_policy.is_retryable_error(e, client._can_switch_key())
+            )
+        if not text:
+            # An empty answer (e.g. blocked content) would come back empty again
+            return AttemptResult(status=200, retryable=False)
+        return AttemptResult(text=text, status=200, usage=usage_from_sdk_response(response))
+
+    def stream(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        started = time.monotonic()
+        ttfb = None
+        try:
+            model = client._get_model(temperature, generation_config=sdk_generation_config(client.generation_config),
+                                      api_key=api_key, system_instruction=system_instruction,
+                                      cached_content=cached_content)
+            request_options = {"timeout": client._attempt_timeout(deadline)} if deadline else None
+            response = model.generate_content(prompt, stream=True, request_options=request_options)
+            for chunk in response:
+                text = chunk.text if chunk.parts else ""
+                if text:
+                    if ttfb is None:
+                        ttfb = time.monotonic() - started
+                    yield text
+        except Exception as e:
+            return AttemptResult(
+                error=e, status=error_status(e), retry_after=retry_after_from_error(e), ttfb=ttfb,
+                retryable=client.retry_policy.is_retryable_error(e, client._can_switch_key())
+            )
+        return AttemptResult(status=200, usage=usage_from_sdk_response(response), ttfb=ttfb)
+
+
+class RESTTransport(Transport):
+    """generateContent over the client's pooled requests session."""
+
+    name = "rest"
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": api_key
+        }
+        try:
+            response = client.session.post(
+                client.base_url,
+                headers=headers,
+                json=build_request_body(prompt, temperature, system_instruction, cached_content,
+                                        client.generation_config),
+                timeout=client._attempt_timeout(deadline)
+            )
+            # requests measures elapsed up to the parsed response headers
+            ttfb = response.elapsed.total_seconds()
+            if response.status_code == 200:
+                result = response.json()
+                text = extract_text(result)
+                if text:
+                    return AttemptResult(text=text, status=200, usage=result.get("usageMetadata"), ttfb=ttfb)
+                return AttemptResult(status=200, ttfb=ttfb)
+        except (RequestException, Timeout, ValueError) as e:
+            return AttemptResult(error=e)
+        return AttemptResult(
+            status=response.status_code, retry_after=retry_after_from_response(response), ttfb=ttfb,
+            retryable=client.retry_policy.is_retryable_status(response.status_code, client._can_switch_key())
+        )
+
+    def stream(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": api_key
+        }
+        ttfb = None
+        try:
+            with client.session.post(
+                client.stream_url,
+                headers=headers,
+                json=build_request_body(prompt, temperature, system_instruction, cached_content,
+                                        client.generation_config),
+                timeout=client._attempt_timeout(deadline),
+                stream=True
+            ) as response:
+                ttfb = response.elapsed.total_seconds()
+                if response.status_code != 200:
+                    return AttemptResult(
+                        status=response.status_code, retry_after=retry_after_from_response(response), ttfb=ttfb,
+                        retryable=client.retry_policy.is_retryable_status(response.status_code,
+                                                                          client._can_switch_key())
+                    )
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    text = parse_sse_line(line) if line else None
+                    if text:
+                        yield text
+        except (RequestException, Timeout, ValueError) as e:
+            return AttemptResult(error=e, ttfb=ttfb)
+        return AttemptResult(status=200, ttfb=ttfb)
+
+
+class AsyncRESTTransport(Transport):
+    """
+    generateContent over aiohttp on a shared background event loop.
+
+    Calls still block their thread, but the request itself runs on the loop,
+    so a call whose deadline is cancelled (a lost race) aborts its request.
+    It has no streaming endpoint: a stream arrives as one chunk.
+    """
+
+    name = "async_rest"
+
+    # How often a waiting call checks whether its deadline was cancelled
+    POLL_INTERVAL = 0.05
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        # Imported here: async_api_client itself imports this module
+        from async_api_client import aiohttp, submit_to_background_loop
+        if aiohttp is None:
+            return AttemptResult(error=ImportError("aiohttp is required for the async_rest transport"),
+                                 retryable=False)
+
+        timeout = client._attempt_timeout(deadline)
+        future = submit_to_background_loop(self._post(
+            client.base_url, api_key,
+            build_request_body(prompt, temperature, system_instruction, cached_content, client.generation_config),
+            timeout
+        ))
+        try:
+            while True:
+                try:
+                    status, headers, result, ttfb = future.result(timeout=self.POLL_INTERVAL)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if deadline is not None and deadline.cancelled:
+                        future.cancel()
+                        return AttemptResult(error=concurrent.futures.CancelledError("Call was cancelled"),
+                                             retryable=False)
+        except Exception as e:
+            return AttemptResult(error=e)
+
+        if status == 200:
+            text = extract_text(result) if isinstance(result, dict) else None
+            if text:
+                return AttemptResult(text=text, status=200, usage=result.get("usageMetadata"), ttfb=ttfb)
+            return AttemptResult(status=200, ttfb=ttfb)
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is None and status in (429, 503):
+            retry_after = retry_after_from_body(result)
+        return AttemptResult(
+            status=status, retry_after=retry_after, ttfb=ttfb,
+            retryable=client.retry_policy.is_retryable_status(status, client._can_switch_key())
+        )
+
+    @staticmethod
+    async def _post(url: str, api_key: str, body: Dict[str, Any],
+                    timeout: float) -> Tuple[int, Dict[str, str], Any, float]:
+        from async_api_client import aiohttp, get_async_session
+        session = await get_async_session(url)
+        headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
+        started = time.monotonic()
+        async with session.post(url, headers=headers, json=body,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            ttfb = time.monotonic() - started
+            try:
+                result = await response.json(content_type=None)
+            except ValueError:
+                result = None
+            return response.status, dict(response.headers), result, ttfb
+
+
+class MockTransport(Transport):
+    """
+    In-process stand-in for Gemini, with the mock server's latency and error model.
+
+    Sends nothing over the network, so transport strategies can be exercised
+    without keys or a running mock server.
+    """
+
+    name = "mock"
+
+    def __init__(self, settings: Any = None):
+        """
+        Initialize the mock transport.
+
+        Args:
+            settings: A mock_gemini_server.MockSettings (defaults to its defaults)
+        """
+        import mock_gemini_server
+        self._mock = mock_gemini_server
+        self.state = mock_gemini_server.MockState(settings or mock_gemini_server.MockSettings())
+
+    @staticmethod
+    def _wait(delay: float, deadline: Optional[Deadline]) -> bool:
+        """Sleep like a request in flight; False if the deadline was cancelled meanwhile."""
+        if deadline is None:
+            time.sleep(delay)
+            return True
+        return deadline.sleep(delay)
+
+    def _start(self, client, api_key, prompt, status, latency, first_byte, deadline) -> Optional[AttemptResult]:
+        """Play out a request up to its first byte; the failed result, or None if the response goes ahead."""
+        if deadline is not None and first_byte > deadline.remaining():
+            deadline.sleep(deadline.remaining())
+            return AttemptResult(error=Timeout("Mock request timed out"))
+        if not self._wait(min(latency, 0.05) if status != 200 else first_byte, deadline):
+            # Cancelled in flight, as an aborted connection would be
+            return AttemptResult(error=Timeout("Mock request cancelled"), retryable=False)
+        if status == 200:
+            return None
+        self.state.record("generateContent", api_key, status, len(prompt), 0)
+        return AttemptResult(
+            status=status, ttfb=min(latency, 0.05),
+            retry_after=self.state.settings.retry_after if status in (429, 503) else None,
+            retryable=client.retry_policy.is_retryable_status(status, client._can_switch_key())
+        )
+
+    def _respond(self, client, api_key, prompt, system_instruction, length, method):
+        """Generate a response's text and record it; returns the text and its usageMetadata."""
+        json_output = (client.generation_config or {}).get("responseMimeType") == "application/json"
+        text = self._mock.generate_text(f"{system_instruction or ''}\n{prompt}", length, json_output)
+        prompt_tokens = self._mock.count_tokens(system_instruction or "") + self._mock.count_tokens(prompt)
+        self.state.record(method, api_key, 200, len(prompt), len(text),
+                          prompt_tokens, self._mock.count_tokens(text))
+        return text, {"promptTokenCount": prompt_tokens, "candidatesTokenCount": self._mock.count_tokens(text)}
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        status, latency, length = self.state.plan()
+        failed = self._start(client, api_key, prompt, status, latency, latency, deadline)
+        if failed is not None:
+            return failed
+        text, usage = self._respond(client, api_key, prompt, system_instruction, length, "generateContent")
+        return AttemptResult(text=text, status=200, usage=usage, ttfb=latency)
+
+    def stream(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        status, latency, length = self.state.plan()
+        ttfb = latency * self.state.settings.ttfb_fraction
+        failed = self._start(client, api_key, prompt, status, latency, ttfb, deadline)
+        if failed is not None:
+            return failed
+        text, usage = self._respond(client, api_key, prompt, system_instruction, length, "streamGenerateContent")
+        # Chunked as the mock server chunks its streams
+        size = max(1, math.ceil(len(text) / self.state.settings.chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        interval = (latency - ttfb) / max(1, len(pieces) - 1)
+        for index, piece in enumerate(pieces):
+            if index and not self._wait(interval, deadline):
+                return AttemptResult(error=Timeout("Mock stream cancelled"), retryable=False, ttfb=ttfb)
+            yield piece
+        return AttemptResult(status=200, usage=usage, ttfb=ttfb)
+
+
+TRANSPORT_CLASSES = {
+    SDKTransport.name: SDKTransport,
+    RESTTransport.name: RESTTransport,
+    AsyncRESTTransport.name: AsyncRESTTransport,
+    MockTransport.name: MockTransport
+}
+
+
+def build_transports(names: Sequence[str]) -> List[Transport]:
+    """
+    Create transports by name.
+
+    Args:
+        names: Transport names, e.g. ["sdk", "rest"]
+
+    Returns:
+        One transport per name, in order
+
+    Raises:
+        ValueError: If a name is unknown
+    """
+    transports = []
+    for name in names:
+        if name not in TRANSPORT_CLASSES:
+            raise ValueError(f"Unknown transport {name!r}; expected one of {sorted(TRANSPORT_CLASSES)}")
+        transports.append(TRANSPORT_CLASSES[name]())
+    return transports
+
 class GeminiAPIClient:
     """Client for interacting with the Gemini-2.0-Flash API."""
 
-    def __init__(self, api_key: str, agent_name: str = "Unknown"):
+    def __init__(self, api_key: str, agent_name: str = "Unknown",
+                 response_cache: Optional[ResponseCache] = None, key_pool: Optional[APIKeyPool] = None,
+                 hedger: Optional[RequestHedger] = None, context_cache: Optional[ContextCacheRegistry] = None,
+                 transports: Optional[Sequence[Transport]] = None,
+                 transport_selector: Optional[TransportSelector] = None, hooks: Optional[Sequence[Hook]] = None,
+                 generation_config: Optional[Dict[str, Any]] = None):
         """
         Initialize the Gemini API client.
 
         Args:
             api_key: The API key for authentication
             agent_name: Name of the agent using this client (for logging)
+            response_cache: Cache for generated responses (defaults to the
+                            process-wide cache when RESPONSE_CACHE_ENABLED is set)
+            key_pool: Pool to draw a key from on every attempt; api_key is
+                      used only when no pool is given
+            hedger: Hedges slow generations with a second request (defaults to
+                    the process-wide hedger when HEDGE_REQUESTS is set)
+            context_cache: Keeps system instructions in Gemini's context cache
+                           (defaults to the process-wide registry when
+                           CONTEXT_CACHE_ENABLED is set)
+            transports: Transports for generate calls in order of preference
+                        (defaults to the TRANSPORTS setting)
+            transport_selector: Orders the transports per call and holds their
+                                latency stats (defaults to the process-wide selector)
+            hooks: Callables that receive an AttemptEvent for every attempt
+                   (defaults to the sinks named in INSTRUMENTATION_SINKS)
+            generation_config: Extra generationConfig fields in REST form sent with
+                               every call, e.g. responseMimeType and responseSchema
+                               for structured output
         """
         self.api_key = api_key
         self.agent_name = agent_name
         self.base_url = GEMINI_API_BASE_URL
+        self.stream_url = GEMINI_STREAM_URL
         self.timeout = REQUEST_TIMEOUT
         self.max_retries = MAX_RETRIES
+        self.retry_policy = RetryPolicy(max_attempts=self.max_retries)
+
+        # Shared keep-alive session for the REST path (one pool per origin)
+        self.session = get_session(self.base_url)
+
+        # Bounded LRU cache of SDK model objects, reused across calls and attempts
+        self.model_cache_size = MODEL_CACHE_SIZE
+        self._model_cache: "OrderedDict[Tuple[str, float, str, str, str, str], Any]" = OrderedDict()
+        self._model_cache_lock = threading.Lock()
+        self._model_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        # Optional cache of generated responses for identical prompts
+        self.response_cache = response_cache if response_cache is not None else get_default_cache()
+        self.cache_bypasses = 0
+
+        # Spread attempts over several keys when a pool is supplied
+        self.key_pool = key_pool
+
+        # Optional hedging of slow generations; with a pool the hedge lands on
+        # another key, since the primary leg still holds its key
+        self.hedger = hedger if hedger is not None else get_default_hedger()
+
+        # Optional context caching of system instructions
+        self.context_cache = context_cache if context_cache is not None else get_default_context_cache()
+
+        # Pluggable transports, ordered per call by measured latency and failure rate
+        self.transports: Dict[str, Transport] = {
+            transport.name: transport for transport in (transports or build_transports(TRANSPORTS))
+        }
+        self.transport_selector = (
+            transport_selector if transport_selector is not None else get_default_transport_selector()
+        )
+
+        # Per-attempt instrumentation
+        self.hooks: List[Hook] = list(hooks) if hooks is not None else list(get_default_hooks())
+
+        # Structured-output and other generation settings; part of every cache key
+        self.generation_config = dict(generation_config) if generation_config else None
+        self._generation_config_key = json.dumps(self.generation_config, sort_keys=True) if generation_config else ""
+
+    def _get_model(self, temperature: float, model_name: str = GEMINI_MODEL_NAME,
+                   generation_config: Optional[Dict[str, Any]] = None, api_key: Optional[str] = None,
+                   system_instruction: Optional[str] = None, cached_content: Optional[str] = None) -> Any:
+        """
+        Get a GenerativeModel for the given settings, reusing a cached instance if possible.
+
+        Args:
+            temperature: Controls randomness (0.0 to 1.0)
+            model_name: The Gemini model to use
+            generation_config: Extra generation settings merged over the temperature
+            api_key: The key the model's SDK client is bound to (defaults to this client's key)
+            system_instruction: Static instructions the model is created with
+            cached_content: cachedContents name used instead of the system instruction
+
+        Returns:
+            A configured genai.GenerativeModel
+        """
+        config = {"temperature": temperature}
+        if generation_config:
+            config.update(generation_config)
+        # Each model is bound to its key's own SDK client, so models are cached per key
+        api_key = api_key or self.api_key
+        system_instruction = None if cached_content else system_instruction
+        key = (model_name, temperature, json.dumps(config, sort_keys=True),
+               hash_api_key(api_key), cached_content or "", system_instruction or "")
+
+        with self._model_cache_lock:
+            model = self._model_cache.get(key)
+            if model is not None:
+                self._model_cache.move_to_end(key)
+                self._model_cache_stats["hits"] += 1
+                return model
+
+            self._model_cache_stats["misses"] += 1
+            model = genai.GenerativeModel(model_name=model_name, generation_config=config,
+                                          system_instruction=system_instruction)
+            if cached_content:
+                # What GenerativeModel.from_cached_content sets, minus its extra lookup call
+                model._cached_content = cached_content
+            # Bind the key's client up front; the SDK would otherwise use its global default
+            model._client = get_sdk_client(api_key)
+            self._model_cache[key] = model
+            if len(self._model_cache) > self.model_cache_size:
+                self._model_cache.popitem(last=False)
+                self._model_cache_stats["evictions"] += 1
+
+        return model
+
+    def get_model_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/eviction counters for the model cache.
+
+        Returns:
+            A dictionary with the counters, current size and hit rate
+        """
+        with self._model_cache_lock:
+            stats = dict(self._model_cache_stats)
+            stats["size"] = len(self._model_cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def get_response_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get counters for the response cache used by this client.
+
+        Returns:
+            The cache's stats plus this client's bypass count, or None if caching is off
+        """
+        if self.response_cache is None:
+            return None
+        stats = self.response_cache.stats()
+        stats["bypasses"] = self.cache_bypasses
+        return stats
+
+    def get_hedge_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get hedge counters for this client's hedger.
+
+        Returns:
+            The hedger's stats, or None if hedging is off
+        """
+        return self.hedger.stats() if self.hedger is not None else None
+
+    def _checkout_key(self, exclude: Sequence[str] = (), transport: str = "rest") -> Optional[PooledKey]:
+        """
+        Check out a key from the pool for one attempt.
+
+        Keys whose circuit for the transport is open are avoided when possible.
+
+        Args:
+            exclude: Key ids that already failed during this call
+            transport: "sdk" or "rest"
+
+        Returns:
+            The pooled key, or None when this client uses its own key only
+        """
+        if self.key_pool is None:
+            return None
+        open_circuits = [
+            key.key_id for key in self.key_pool.keys
+            if get_breaker(f"{key.key_id}:{transport}").is_open()
+        ]
+        return self.key_pool.acquire(list(exclude) + open_circuits)
+
+    def _checkin_key(self, key: Optional[PooledKey], outcome: str) -> None:
+        """Return a pooled key and report how the attempt went."""
+        if key is not None:
+            self.key_pool.release(key, outcome)
+
+    def _finish_attempt(self, key: Optional[PooledKey], breaker: CircuitBreaker, outcome: str) -> None:
+        """Report an attempt's outcome to the key pool and the circuit breaker."""
+        self._checkin_key(key, outcome)
+        if outcome == SUCCESS:
+            breaker.record_success()
+        elif outcome in (FAILURE, EXHAUSTED):
+            breaker.record_failure()
+        elif outcome == SKIPPED:
+            breaker.cancel()
+
+    def _acquire_rate_limit(self, prompt: str, api_key: str, deadline: Optional[Deadline] = None) -> bool:
+        """
+        Wait for a key's request and token budget before sending a request.
+
+        Args:
+            prompt: The prompt about to be sent
+            api_key: The key the request will use
+            deadline: The request's deadline; the wait must leave time for the attempt,
+                      and ends early if the deadline is cancelled
 
-        # Configure the Gemini client
-        genai.configure(api_key=api_key)
+        Returns:
+            True if the request may be sent, False if the wait would be too long
+            or was cancelled
+        """
+        rate_limiter = get_rate_limiter(api_key)
+        if rate_limiter is None:
+            return True
+        max_wait = RATE_LIMIT_MAX_WAIT
+        if deadline is not None:
+            max_wait = min(max_wait, deadline.remaining() - self.retry_policy.min_attempt_time)
+        try:
+            rate_limiter.acquire(estimate_tokens(prompt), max_wait, deadline)
+            return True
+        except RateLimitExceeded as e:
+            logger.warning(f"[{self.agent_name}] {str(e)}; not sending request")
+            return False
+        except RateLimitWaitCancelled as e:
+            logger.info(f"[{self.agent_name}] {str(e)}; not sending request")
+            return False
+
+    def _can_switch_key(self) -> bool:
+        """Return True if a retry may land on a different API key."""
+        return self.key_pool is not None and len(self.key_pool) > 1
+
+    def _attempt_timeout(self, deadline: Optional[Deadline]) -> float:
+        """Get the timeout for one attempt, cut short by the deadline."""
+        return deadline.cap(self.timeout) if deadline is not None else self.timeout
+
+    def _cut_short(self, deadline: Optional[Deadline], timeout: float) -> bool:
+        """
+        Check whether a failed attempt was ended by its deadline rather than upstream.
+
+        Args:
+            deadline: The attempt's deadline
+            timeout: The timeout the attempt ran with
+
+        Returns:
+            True if the deadline was cancelled (a lost race or hedge), or if it
+            shortened the attempt's timeout and has since run out
+        """
+        if deadline is None:
+            return False
+        return deadline.cancelled or (timeout < self.timeout and deadline.expired())
+
+    def _deadline_allows_attempt(self, attempt: int, deadline: Optional[Deadline]) -> bool:
+        """Check the deadline before an attempt, logging when it is too close."""
+        if self.retry_policy.can_start_attempt(deadline):
+            return True
+        if deadline.cancelled:
+            logger.info(f"[{self.agent_name}] Call was cancelled; not starting attempt {attempt+1}")
+            return False
+        logger.warning(f"[{self.agent_name}] Only {deadline.remaining():.1f}s left before the deadline; "
+                       f"not starting attempt {attempt+1}")
+        return False
+
+    def _backoff(self, attempt: int, deadline: Optional[Deadline], retry_after: Optional[float] = None) -> bool:
+        """
+        Sleep before the next attempt as the retry policy dictates.
+
+        Args:
+            attempt: Zero-based index of the attempt that failed
+            deadline: The request's deadline, if any
+            retry_after: Delay the server asked for, if any
+
+        Returns:
+            True to retry, False to give up
+        """
+        # A key's Retry-After does not bind a retry that moves to another key
+        if self._can_switch_key():
+            retry_after = None
+        delay = self.retry_policy.next_delay(attempt, deadline, retry_after)
+        if delay is None:
+            logger.error(f"[{self.agent_name}] Failed after {attempt+1} attempts")
+            return False
+        logger.info(f"[{self.agent_name}] Retrying in {delay:.2f} seconds...")
+        if deadline is None:
+            time.sleep(delay)
+        elif not deadline.sleep(delay):
+            logger.info(f"[{self.agent_name}] Call was cancelled during backoff")
+            return False
+        return True
+
+    def _record_output_tokens(self, text: str, api_key: str) -> int:
+        """Debit the tokens of generated text from a key's budget and return the estimate."""
+        tokens = estimate_tokens(text)
+        rate_limiter = get_rate_limiter(api_key)
+        if rate_limiter is not None:
+            rate_limiter.record_tokens(tokens)
+        return tokens
+
+    def _guard_prompt(self, prompt: str, system_instruction: Optional[str] = None) -> Optional[str]:
+        """
+        Check a prompt's estimated size before anything is sent.
+
+        Args:
+            prompt: The prompt about to be sent
+            system_instruction: The system instruction sent with it, which
+                                counts against the same limit but is never trimmed
+
+        Returns:
+            The prompt (trimmed if PROMPT_OVERFLOW_POLICY is "trim"), or None
+            if it is too large and the policy is "reject"
+        """
+        estimator = get_default_estimator()
+        system_tokens = estimator.estimate(system_instruction or "")
+        tokens = estimator.estimate(prompt) + system_tokens
+        if tokens <= MAX_PROMPT_TOKENS:
+            return prompt
+        if PROMPT_OVERFLOW_POLICY == "reject":
+            logger.error(f"[{self.agent_name}] Prompt of ~{tokens} tokens exceeds the "
+                         f"{MAX_PROMPT_TOKENS}-token limit; not sending it")
+            return None
+        logger.warning(f"[{self.agent_name}] Trimming prompt of ~{tokens} tokens to the "
+                       f"{MAX_PROMPT_TOKENS}-token limit")
+        return estimator.trim(prompt, max(0, MAX_PROMPT_TOKENS - system_tokens))
 
-    def generate_content(self, prompt: str, temperature: float = 0.7) -> Optional[str]:
+    def _log_token_usage(self, prompt: str, output_tokens: int, usage: Optional[Dict[str, int]] = None,
+                         system_instruction: Optional[str] = None) -> None:
+        """
+        Log a call's input and output token estimates, calibrating against reported counts.
+
+        Args:
+            prompt: The prompt that was sent
+            output_tokens: Estimated tokens of the generated text
+            usage: usageMetadata reported by Gemini, if any
+            system_instruction: The system instruction sent with the prompt, if any
+        """
+        estimator = get_default_estimator()
+        # Gemini's promptTokenCount covers the system instruction (cached or not) too
+        text = f"{system_instruction}\n{prompt}" if system_instruction else prompt
+        input_tokens = estimator.estimate(text)
+        if usage and usage.get("promptTokenCount"):
+            estimator.calibrate(text, usage["promptTokenCount"])
+            cached = usage.get("cachedContentTokenCount")
+            logger.info(f"[{self.agent_name}] Tokens: input ~{input_tokens} "
+                        f"(reported {usage['promptTokenCount']}"
+                        f"{f', {cached} from context cache' if cached else ''}), output ~{output_tokens} "
+                        f"(reported {usage.get('candidatesTokenCount', 0)})")
+        else:
+            logger.info(f"[{self.agent_name}] Tokens: input ~{input_tokens}, output ~{output_tokens}")
+
+    def _cached_context(self, api_key: str, system_instruction: Optional[str],
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Get the cachedContents name holding a system instruction, or None to send it inline."""
+        if not system_instruction or self.context_cache is None:
+            return None
+        return self.context_cache.get(api_key, system_instruction, self._attempt_timeout(deadline))
+
+    def _drop_cached_context(self, api_key: str, system_instruction: Optional[str],
+                             cached_content: Optional[str], status: Optional[int]) -> bool:
+        """
+        Forget a context cache entry that Gemini no longer knows.
+
+        Args:
+            api_key: The key the attempt used
+            system_instruction: The system instruction the entry holds
+            cached_content: The cachedContents name the attempt sent, if any
+            status: The HTTP status of the failed attempt
+
+        Returns:
+            True if the entry was dropped and the attempt should be repeated inline
+        """
+        if not cached_content or status not in (403, 404):
+            return False
+        logger.warning(f"[{self.agent_name}] Context cache {cached_content} rejected with status {status}; "
+                       f"dropping it and retrying")
+        self.context_cache.invalidate(api_key, system_instruction)
+        return True
+
+    def generate_content(self, prompt: str, temperature: float = 0.7, *, use_cache: bool = True,
+                         deadline: Optional[Deadline] = None,
+                         system_instruction: Optional[str] = None) -> Optional[str]:
         """
         Generate content using the Gemini-2.0-Flash model.
 
@@ -53,55 +1032,338 @@ class GeminiAPIClient:
                          Higher values (0.7-1.0) produce more creative outputs
                          Lower values (0.1-0.3) produce more focused outputs
                          For web design tasks, use 0.85-0.95 for maximum creativity
+            use_cache: Whether the response cache may serve or store this request
+            deadline: When the caller needs an answer by; no attempt starts
+                      that could not finish before it
+            system_instruction: Static instructions sent as the model's system
+                                instruction, separately from the per-call prompt
 
         Returns:
             The generated text or None if an error occurred
         """
-        # For web design tasks, ensure temperature is high enough for creativity
-        if "html" in prompt.lower() and "css" in prompt.lower():
-            # Ensure minimum temperature of 0.85 for web design tasks
-            temperature = max(temperature, 0.85)
-        logger.info(f"[{self.agent_name}] Sending request to Gemini API")
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        prompt = self._guard_prompt(prompt, system_instruction)
+        if prompt is None:
+            return None
 
-        for attempt in range(self.max_retries):
-            try:
-                # Configure the model
-                model = genai.GenerativeModel(
-                    model_name="gemini-2.0-flash",
-                    generation_config={"temperature": temperature}
+        cache_key = None
+        if self.response_cache is not None:
+            if use_cache and temperature <= RESPONSE_CACHE_MAX_TEMPERATURE:
+                cache_key = make_cache_key(GEMINI_MODEL_NAME, prompt, temperature, system_instruction or "",
+                                           self._generation_config_key)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"[{self.agent_name}] Serving response from cache")
+                    return cached
+            else:
+                self.cache_bypasses += 1
+
+        def generate() -> Optional[str]:
+            if self.hedger is not None:
+                content = self.hedger.run(
+                    lambda leg_deadline: self._generate_uncached(prompt, temperature, leg_deadline,
+                                                                 system_instruction),
+                    deadline, self.retry_policy.min_attempt_time
                 )
+            else:
+                content = self._generate_uncached(prompt, temperature, deadline, system_instruction)
+            if content and cache_key is not None:
+                self.response_cache.set(cache_key, content)
+            return content
+
+        if not COALESCE_REQUESTS:
+            return generate()
+        return generation_flights.do(
+            fingerprint(GEMINI_MODEL_NAME, prompt, temperature, system_instruction, self._generation_config_key),
+            generate, deadline=deadline
+        )
+
+    def _transport(self, name: str) -> "Transport":
+        """Get this client's transport by name, creating a default one if it is not configured."""
+        transport = self.transports.get(name)
+        if transport is None:
+            transport = build_transports([name])[0]
+            self.transports[name] = transport
+        return transport
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+        Receive an AttemptEvent for every attempt this client makes.
+
+        Args:
+            hook: Callable taking the event; its exceptions are logged and ignored
+        """
+        self.hooks.append(hook)
+
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """
+        Get per-transport latency and outcome stats from this client's selector.
+
+        Returns:
+            The selector's strategy, current order and per-transport stats
+        """
+        return self.transport_selector.stats()
+
+    def _attempt(self, transport: "Transport", attempt: int, prompt: str, temperature: float,
+                 system_instruction: Optional[str], deadline: Optional[Deadline],
+                 failed_keys: List[str]) -> "AttemptResult":
+        """
+        Make one attempt on a transport with a checked-out key.
+
+        Args:
+            transport: The transport to send through
+            attempt: Zero-based attempt index (for logging)
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            deadline: When the caller needs an answer by
+            failed_keys: Key ids that already failed on this transport; updated in place
+
+        Returns:
+            The attempt's result
+        """
+        queued = time.monotonic()
+        key = self._checkout_key(failed_keys, transport.name)
+        api_key = key.api_key if key else self.api_key
+        breaker = get_breaker(f"{hash_api_key(api_key)}:{transport.name}")
+        if not breaker.allow():
+            # Fail fast on this key and transport; another may still be healthy
+            self._checkin_key(key, SKIPPED)
+            logger.warning(f"[{self.agent_name}] {transport.name} circuit open for key {hash_api_key(api_key)}, "
+                           f"skipping attempt")
+            if key is not None:
+                failed_keys.append(key.key_id)
+            result = AttemptResult(skipped=True)
+            self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, SKIPPED,
+                               queue_wait=time.monotonic() - queued)
+            return result
+        if not self._acquire_rate_limit(prompt, api_key, deadline):
+            # A local budget estimate says nothing about the key's health; move on to another key
+            breaker.cancel()
+            self._checkin_key(key, SKIPPED)
+            if key is not None:
+                failed_keys.append(key.key_id)
+            result = AttemptResult(rate_limited=True, retryable=self._can_switch_key())
+            self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, SKIPPED,
+                               queue_wait=time.monotonic() - queued)
+            return result
+
+        outcome = FAILURE
+        started = time.monotonic()
+        timeout = self._attempt_timeout(deadline)
+        try:
+            cached_content = self._cached_context(api_key, system_instruction, deadline)
+            result = transport.send(self, api_key, prompt, temperature, system_instruction, cached_content, deadline)
+            if not result.text and self._drop_cached_context(api_key, system_instruction, cached_content,
+                                                             result.status):
+                result = transport.send(self, api_key, prompt, temperature, system_instruction, None, deadline)
+            outcome = result.outcome
+            if not result.text and self._cut_short(deadline, timeout):
+                # Lost a race or hedge, or ran out of the caller's time; that says
+                # nothing about the key or transport
+                outcome = SKIPPED
+        finally:
+            self._finish_attempt(key, breaker, outcome)
+        latency = time.monotonic() - started
+        self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, outcome,
+                           queue_wait=started - queued, latency=latency)
+        if outcome == SKIPPED:
+            return AttemptResult(retryable=False, skipped=True)
+        self.transport_selector.record(transport.name, latency, bool(result.text))
+
+        if result.text:
+            logger.info(f"[{self.agent_name}] Successfully received response via {transport.name}")
+            output_tokens = self._record_output_tokens(result.text, api_key)
+            self._log_token_usage(prompt, output_tokens, result.usage, system_instruction)
+            return result
+
+        if key is not None:
+            failed_keys.append(key.key_id)
+        logger.error(f"[{self.agent_name}] {transport.name} attempt {attempt+1}/{self.max_retries} failed: "
+                     f"{result.describe()}")
+        if not result.retryable:
+            logger.error(f"[{self.agent_name}] {transport.name} failure is not retryable; giving up")
+        return result
+
+    def _emit_attempt(self, transport: str, attempt: int, api_key: str, prompt: str,
+                      system_instruction: Optional[str], result: AttemptResult, outcome: str,
+                      queue_wait: float = 0.0, latency: float = 0.0, streaming: bool = False,
+                      response_chars: Optional[int] = None) -> None:
+        """
+        Send the event for one attempt to this client's instrumentation hooks.
+
+        Args:
+            transport: The transport used
+            attempt: Zero-based attempt index
+            api_key: The key used (only its hash is reported)
+            prompt: The prompt sent
+            system_instruction: The system instruction sent with it, if any
+            result: The attempt's result
+            outcome: The key pool outcome
+            queue_wait: Seconds spent getting a key and rate-limit budget
+            latency: Seconds spent on the request
+            streaming: Whether this was a streaming attempt
+            response_chars: Characters received, for streams whose result carries no text
+        """
+        if not self.hooks:
+            return
+        usage = result.usage or {}
+        emit(self.hooks, AttemptEvent(
+            agent=self.agent_name,
+            key_id=hash_api_key(api_key),
+            transport=transport,
+            attempt=attempt + 1,
+            streaming=streaming,
+            queue_wait=queue_wait,
+            latency=latency,
+            ttfb=result.ttfb,
+            prompt_chars=len(prompt) + len(system_instruction or ""),
+            response_chars=response_chars if response_chars is not None else len(result.text or ""),
+            prompt_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount"),
+            cached_tokens=usage.get("cachedContentTokenCount"),
+            status=result.status,
+            outcome=outcome,
+            error=None if outcome == SUCCESS else result.describe()
+        ))
+
+    def _race(self, names: Sequence[str], attempt: int, prompt: str, temperature: float,
+              system_instruction: Optional[str], deadline: Optional[Deadline],
+              failed_keys: Dict[str, List[str]]) -> List["AttemptResult"]:
+        """
+        Make one attempt on several transports at once and keep the first answer.
+
+        Each leg gets its own deadline; the losers' deadlines are cancelled so
+        transports that can abort an in-flight request (async REST) do so.
+
+        Returns:
+            The winning result alone, or every leg's result if none succeeded
+        """
+        results: "queue.Queue" = queue.Queue()
+        legs: Dict[str, Deadline] = {}
+
+        for name in names:
+            leg_deadline = deadline.child() if deadline is not None else Deadline(math.inf)
+            legs[name] = leg_deadline
+
+            def target(name: str = name, leg_deadline: Deadline = leg_deadline) -> None:
+                try:
+                    result = self._attempt(self._transport(name), attempt, prompt, temperature,
+                                           system_instruction, leg_deadline, failed_keys[name])
+                except Exception as e:
+                    result = AttemptResult(error=e)
+                results.put((name, result))
 
-                # Generate content
-                response = model.generate_content(prompt)
-
-                # Extract and return the text
-                if response and hasattr(response, 'text'):
-                    logger.info(f"[{self.agent_name}] Successfully received response")
-                    return response.text
-                else:
-                    logger.warning(f"[{self.agent_name}] Received empty or invalid response")
-                    return None
-
-            except Exception as e:
-                logger.error(f"[{self.agent_name}] Error on attempt {attempt+1}/{self.max_retries}: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    # Exponential backoff: 1s, 2s, 4s, ...
-                    wait_time = 2 ** attempt
-                    logger.info(f"[{self.agent_name}] Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"[{self.agent_name}] Failed after {self.max_retries} attempts")
-                    # Try the direct REST API method as a fallback
-                    logger.info(f"[{self.agent_name}] Trying direct REST API method as fallback")
-                    return self.generate_content_direct(prompt, temperature)
+            threading.Thread(target=target, name=f"{self.agent_name}-{name}", daemon=True).start()
 
+        collected = []
+        for _ in names:
+            name, result = results.get()
+            if result.text:
+                self.transport_selector.record_win(name)
+                for other, leg_deadline in legs.items():
+                    if other != name:
+                        leg_deadline.cancel()
+                return [result]
+            collected.append(result)
+        return collected
+
+    def _run_transports(self, names: Sequence[str], strategy: str, prompt: str, temperature: float,
+                        system_instruction: Optional[str],
+                        deadline: Optional[Deadline]) -> Tuple[Optional[str], bool]:
+        """
+        Retry a generation over a set of transports.
+
+        Each round makes one attempt per transport ("fallback": in order,
+        moving on at once after a failure; "race": the two best at once);
+        only when the whole round fails does the retry policy back off.
+
+        Args:
+            names: The transports to use, in configured order
+            strategy: FALLBACK or RACE
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            deadline: When the caller needs an answer by
+
+        Returns:
+            (text, exhausted): the generated text or None, and whether the
+            retries simply ran out (as opposed to a failure not worth retrying)
+        """
+        failed_keys: Dict[str, List[str]] = {name: [] for name in names}
+        for attempt in range(self.max_retries):
+            if not self._deadline_allows_attempt(attempt, deadline):
+                return None, False
+            order = self.transport_selector.order(names)
+
+            if strategy == RACE and len(order) > 1:
+                results = self._race(order[:2], attempt, prompt, temperature, system_instruction,
+                                     deadline, failed_keys)
+            else:
+                results = []
+                for index, name in enumerate(order):
+                    if index and not self.retry_policy.can_start_attempt(deadline):
+                        break
+                    if index:
+                        logger.info(f"[{self.agent_name}] Falling back to the {name} transport")
+                    result = self._attempt(self._transport(name), attempt, prompt, temperature,
+                                           system_instruction, deadline, failed_keys[name])
+                    results.append(result)
+                    if result.text or not result.retryable:
+                        break
+
+            for result in results:
+                if result.text:
+                    return result.text, False
+            if any(not result.retryable for result in results):
+                return None, False
+            if all(result.skipped or result.rate_limited for result in results):
+                # Every circuit was open or key over its local budget; nothing was sent,
+                # so there is nothing to back off from
+                continue
+
+            # Full-jitter backoff, honouring the shortest server retry hint
+            hints = [result.retry_after for result in results if result.retry_after is not None]
+            if not self._backoff(attempt, deadline, min(hints) if hints else None):
+                break
+
+        return None, True
+
+    def _generate_uncached(self, prompt: str, temperature: float, deadline: Optional[Deadline] = None,
+                           system_instruction: Optional[str] = None) -> Optional[str]:
+        """
+        Generate over the configured transports as the selector's strategy dictates.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs an answer by
+            system_instruction: Static instructions sent as the system instruction
+
+        Returns:
+            The generated text or None if an error occurred
+        """
+        logger.info(f"[{self.agent_name}] Sending request to Gemini API")
+
+        names = list(self.transports)
+        strategy = self.transport_selector.strategy
+        if strategy != PREFERRED:
+            text, _ = self._run_transports(names, strategy, prompt, temperature, system_instruction, deadline)
+            return text
+
+        # Every retry on the best transport, then the next ones as a fallback
+        for index, name in enumerate(self.transport_selector.order(names)):
+            if index:
+                logger.info(f"[{self.agent_name}] Trying the {name} transport as fallback")
+            text, exhausted = self._run_transports([name], strategy, prompt, temperature,
+                                                   system_instruction, deadline)
+            if text or not exhausted:
+                return text
         return None
 
-    def generate_content_direct(self, prompt: str, temperature: float = 0.7) -> Optional[str]:
-        # For web design tasks, ensure temperature is high enough for creativity
-        if "html" in prompt.lower() and "css" in prompt.lower():
-            # Ensure minimum temperature of 0.85 for web design tasks
-            temperature = max(temperature, 0.85)
+    def generate_content_direct(self, prompt: str, temperature: float = 0.7, *,
+                                deadline: Optional[Deadline] = None,
+                                system_instruction: Optional[str] = None) -> Optional[str]:
         """
         Alternative implementation using direct REST API calls instead of the SDK.
         This can be used as a fallback if the SDK has issues.
@@ -109,64 +1371,287 @@ class GeminiAPIClient:
         Args:
             prompt: The prompt to send to the model
             temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs an answer by
+            system_instruction: Static instructions sent as the systemInstruction
 
         Returns:
             The generated text or None if an error occurred
         """
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": self.api_key
-        }
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        prompt = self._guard_prompt(prompt, system_instruction)
+        if prompt is None:
+            return None
 
-        data = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": temperature
-            }
-        }
+        text, _ = self._run_transports(["rest"], FALLBACK, prompt, temperature, system_instruction, deadline)
+        return text
+
+    def _stream_attempt(self, transport: "Transport", attempt: int, prompt: str, temperature: float,
+                        system_instruction: Optional[str], deadline: Optional[Deadline],
+                        failed_keys: List[str]) -> Generator[str, None, AttemptResult]:
+        """
+        Make one streaming attempt on a transport with a checked-out key.
+
+        The streaming counterpart of _attempt: the same key pool, breaker,
+        rate limit, context cache and instrumentation handling.
+
+        Args:
+            transport: The transport to stream through
+            attempt: Zero-based attempt index (for logging)
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            deadline: When the caller needs the stream to have started by
+            failed_keys: Key ids that already failed on this transport; updated in place
+
+        Yields:
+            Text chunks in order
 
+        Returns:
+            The attempt's result, with the delivered text (if any) as its text
+
+        Raises:
+            StreamInterruptedError: If the stream failed after some chunks were yielded
+        """
+        queued = time.monotonic()
+        key = self._checkout_key(failed_keys, transport.name)
+        api_key = key.api_key if key else self.api_key
+        breaker = get_breaker(f"{hash_api_key(api_key)}:{transport.name}")
+        if not breaker.allow():
+            self._checkin_key(key, SKIPPED)
+            logger.warning(f"[{self.agent_name}] {transport.name} circuit open for key {hash_api_key(api_key)}, "
+                           f"skipping attempt")
+            if key is not None:
+                failed_keys.append(key.key_id)
+            result = AttemptResult(skipped=True)
+            self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, SKIPPED,
+                               queue_wait=time.monotonic() - queued, streaming=True)
+            return result
+        if not self._acquire_rate_limit(prompt, api_key, deadline):
+            # A local budget estimate says nothing about the key's health; move on to another key
+            breaker.cancel()
+            self._checkin_key(key, SKIPPED)
+            if key is not None:
+                failed_keys.append(key.key_id)
+            result = AttemptResult(rate_limited=True, retryable=self._can_switch_key())
+            self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, SKIPPED,
+                               queue_wait=time.monotonic() - queued, streaming=True)
+            return result
+
+        chunks: List[str] = []
+        output_tokens = 0
+        outcome = FAILURE
+        started = time.monotonic()
+        timeout = self._attempt_timeout(deadline)
+        # What the attempt's instrumentation event reports
+        result = AttemptResult()
+        try:
+            cached_content = self._cached_context(api_key, system_instruction, deadline)
+            while True:
+                stream = transport.stream(self, api_key, prompt, temperature, system_instruction,
+                                          cached_content, deadline)
+                try:
+                    while True:
+                        try:
+                            text = next(stream)
+                        except StopIteration as stop:
+                            result = stop.value
+                            break
+                        chunks.append(text)
+                        output_tokens += self._record_output_tokens(text, api_key)
+                        yield text
+                finally:
+                    stream.close()
+                if chunks or not self._drop_cached_context(api_key, system_instruction, cached_content,
+                                                           result.status):
+                    break
+                cached_content = None
+            outcome = result.outcome
+            if result.error is None and result.status == 200:
+                outcome = SUCCESS
+            elif self._cut_short(deadline, timeout):
+                # Lost a race or ran out of the caller's time; that says nothing about the key or transport
+                outcome = SKIPPED
+        except GeneratorExit:
+            # The consumer stopped reading; that says nothing about the key
+            outcome = SUCCESS
+            raise
+        finally:
+            self._finish_attempt(key, breaker, outcome)
+            self._emit_attempt(transport.name, attempt, api_key, prompt, system_instruction, result, outcome,
+                               queue_wait=started - queued, latency=time.monotonic() - started,
+                               streaming=True, response_chars=sum(len(text) for text in chunks))
+        if outcome != SKIPPED:
+            self.transport_selector.record(transport.name, time.monotonic() - started, outcome == SUCCESS)
+
+        if outcome == SUCCESS:
+            logger.info(f"[{self.agent_name}] Successfully streamed response via {transport.name}")
+            self._log_token_usage(prompt, output_tokens, result.usage, system_instruction)
+            result.text = "".join(chunks)
+            return result
+        if chunks:
+            logger.error(f"[{self.agent_name}] {transport.name} stream interrupted after partial output: "
+                         f"{result.describe()}")
+            raise StreamInterruptedError(result.describe())
+        if outcome == SKIPPED:
+            return AttemptResult(retryable=False, skipped=True)
+
+        if key is not None:
+            failed_keys.append(key.key_id)
+        logger.error(f"[{self.agent_name}] {transport.name} stream attempt {attempt+1}/{self.max_retries} failed: "
+                     f"{result.describe()}")
+        if not result.retryable:
+            logger.error(f"[{self.agent_name}] {transport.name} failure is not retryable; giving up")
+        return result
+
+    def _run_stream_transports(self, names: Sequence[str], prompt: str, temperature: float,
+                               system_instruction: Optional[str],
+                               deadline: Optional[Deadline]) -> Generator[str, None, Tuple[bool, bool]]:
+        """
+        Retry a stream over a set of transports, one attempt per transport per round.
+
+        A stream cannot be raced without repeating output, so the race
+        strategy streams like the fallback one.
+
+        Args:
+            names: The transports to use, in configured order
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            system_instruction: Static instructions sent as the system instruction
+            deadline: When the caller needs the stream to have started by
+
+        Yields:
+            Text chunks in order
+
+        Returns:
+            (completed, exhausted): whether a stream ran to its end, and whether
+            the retries simply ran out (as opposed to a failure not worth retrying)
+        """
+        failed_keys: Dict[str, List[str]] = {name: [] for name in names}
         for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    json=data,
-                    timeout=self.timeout
-                )
+            if not self._deadline_allows_attempt(attempt, deadline):
+                return False, False
+            results = []
+            for index, name in enumerate(self.transport_selector.order(names)):
+                if index and not self.retry_policy.can_start_attempt(deadline):
+                    break
+                if index:
+                    logger.info(f"[{self.agent_name}] Falling back to the {name} transport")
+                result = yield from self._stream_attempt(self._transport(name), attempt, prompt, temperature,
+                                                         system_instruction, deadline, failed_keys[name])
+                if result.error is None and result.status == 200:
+                    return True, False
+                results.append(result)
+                if not result.retryable:
+                    break
 
-                if response.status_code == 200:
-                    result = response.json()
-                    if "candidates" in result and len(result["candidates"]) > 0:
-                        content = result["candidates"][0]["content"]
-                        if "parts" in content and len(content["parts"]) > 0:
-                            return content["parts"][0]["text"]
+            if any(not result.retryable for result in results):
+                return False, False
+            if all(result.skipped or result.rate_limited for result in results):
+                # Nothing was sent, so there is nothing to back off from
+                continue
 
-                logger.warning(f"[{self.agent_name}] API returned status code {response.status_code}")
+            hints = [result.retry_after for result in results if result.retry_after is not None]
+            if not self._backoff(attempt, deadline, min(hints) if hints else None):
+                break
 
-            except (RequestException, Timeout) as e:
-                logger.error(f"[{self.agent_name}] Request error on attempt {attempt+1}/{self.max_retries}: {str(e)}")
+        return False, True
 
-            if attempt < self.max_retries - 1:
-                wait_time = 2 ** attempt
-                logger.info(f"[{self.agent_name}] Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                logger.error(f"[{self.agent_name}] Failed after {self.max_retries} attempts")
+    def stream_content(self, prompt: str, temperature: float = 0.7, *,
+                       deadline: Optional[Deadline] = None,
+                       system_instruction: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate content and yield text chunks as they arrive.
 
-        return None
+        Streams over the configured transports in the selector's order, with
+        the same keys, breakers and retries as generate_content; transports
+        without a streaming endpoint deliver the whole text as one chunk.
+        Attempts that fail before any chunk has been yielded are retried;
+        once text has been delivered, a failure raises StreamInterruptedError
+        instead, since retrying would repeat output.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs the stream to have started by
+            system_instruction: Static instructions sent as the system instruction
+
+        Yields:
+            Text chunks in order (none if the stream completed empty)
+
+        Raises:
+            StreamFailedError: If every attempt failed before any output
+            StreamInterruptedError: If the stream failed after partial output
+        """
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        prompt = self._guard_prompt(prompt, system_instruction)
+        if prompt is None:
+            return
+        logger.info(f"[{self.agent_name}] Sending streaming request to Gemini API")
+
+        names = list(self.transports)
+        completed = False
+        if self.transport_selector.strategy != PREFERRED:
+            completed, _ = yield from self._run_stream_transports(names, prompt, temperature,
+                                                                  system_instruction, deadline)
+        else:
+            # Every retry on the best transport, then the next ones as a fallback
+            for index, name in enumerate(self.transport_selector.order(names)):
+                if index:
+                    logger.info(f"[{self.agent_name}] Trying the {name} transport as fallback")
+                completed, exhausted = yield from self._run_stream_transports([name], prompt, temperature,
+                                                                              system_instruction, deadline)
+                if completed or not exhausted:
+                    break
+        if not completed:
+            raise StreamFailedError(f"[{self.agent_name}] Stream failed before any output")
+
+    def stream_content_direct(self, prompt: str, temperature: float = 0.7, *,
+                              deadline: Optional[Deadline] = None,
+                              system_instruction: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream content through the REST streamGenerateContent endpoint (SSE) only.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs the stream to have started by
+            system_instruction: Static instructions sent as the systemInstruction
+
+        Yields:
+            Text chunks in order
+
+        Raises:
+            StreamFailedError: If every attempt failed before any output
+            StreamInterruptedError: If the stream failed after partial output
+        """
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        prompt = self._guard_prompt(prompt, system_instruction)
+        if prompt is None:
+            return
+
+        completed, _ = yield from self._run_stream_transports(["rest"], prompt, temperature,
+                                                              system_instruction, deadline)
+        if not completed:
+            raise StreamFailedError(f"[{self.agent_name}] Stream failed before any output")
 
-    def generate_response(self, prompt: str, temperature: float = 0.7) -> Dict[str, Any]:
+    def generate_response(self, prompt: str, temperature: float = 0.7, *, use_cache: bool = True,
+                          deadline: Optional[Deadline] = None,
+                          system_instruction: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a response and return it in a structured format.
 
         Args:
             prompt: The prompt to send to the model
             temperature: Controls randomness (0.0 to 1.0)
+            use_cache: Whether the response cache may serve or store this request
+            deadline: When the caller needs an answer by
+            system_instruction: Static instructions sent as the system instruction
 
         Returns:
             A dictionary containing the response and metadata
         """
-        content = self.generate_content(prompt, temperature)
+        content = self.generate_content(prompt, temperature, use_cache=use_cache, deadline=deadline,
+                                        system_instruction=system_instruction)
         
         if content:
             return {
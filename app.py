@@ -1,11 +1,12 @@
 from flask import Flask, render_template, request, jsonify
-from orchestrator import ParadoxGPTOrchestrator
+from orchestrator import ParadoxGPTOrchestrator, MODES
 import logging
 import sys
 import os
 import re
-from config import validate_api_keys
+from config import validate_api_keys, APP_REQUEST_DEADLINE
 from firebase_admin_config import verify_token, save_chat, get_user_chats, is_firebase_ready
+from retry_policy import Deadline
 from functools import wraps
 
 # Configure logging
@@ -471,18 +472,26 @@ def mobile_content():
 @optional_auth
 def chat():
     try:
+        # Budget for the whole request; none by default, as no platform limit applies here
+        deadline = Deadline.after(APP_REQUEST_DEADLINE)
+
         data = request.json
         task = data.get('message')
 
         if not task:
             return jsonify({'error': 'No message provided'}), 400
 
+        # Optional per-request pipeline, one of MODES: "single", "multi_agent" or "auto"
+        mode = data.get('mode')
+        if mode is not None and mode not in MODES:
+            return jsonify({'error': f"Unknown mode {mode!r}; expected one of {list(MODES)}"}), 400
+
         # Save user message if authenticated
         if hasattr(request, 'user') and request.user:
             save_chat(request.user['uid'], task, is_user=True)
 
         # Process the task
-        result = orchestrator.process_task(task)
+        result = orchestrator.process_task(task, deadline=deadline, mode=mode)
 
         if "final_solution" in result and result["final_solution"]:
             # Detect content type for enhanced frontend handling
@@ -501,6 +510,13 @@ def chat():
                     'has_html': content_type == 'html' or 'html' in content_type,
                     'has_code': '```' in content,
                     'generated_by': 'ParadoxGPT',
+                    'mode': result.get('metadata', {}).get('mode'),
+                    'route': (result.get('metadata', {}).get('routing') or {}).get('route'),
+                    'critical_path': (result.get('metadata', {}).get('timeline') or {}).get('critical_path'),
+                    'stream_time_saved': (result.get('metadata', {}).get('streaming') or {}).get('time_saved'),
+                    'missing_subtasks': [
+                        entry['number'] for entry in result.get('metadata', {}).get('missing_subtasks') or []
+                    ],
                     'user_authenticated': hasattr(request, 'user') and request.user is not None
                 }
             }
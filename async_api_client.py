@@ -0,0 +1,323 @@
+"""
+Async API Client module for ParadoxGPT.
+
+This module provides an asyncio counterpart to GeminiAPIClient that talks to
+the Gemini REST API over a shared aiohttp connection pool, so one process can
+keep many generations in flight without tying up a thread per call.
+
+It is a low-level client: it retries within a deadline but has none of
+GeminiAPIClient's key pool, circuit breakers, rate limiter, prompt guard,
+caches or instrumentation hooks. The pipeline uses this module's session
+pool through GeminiAPIClient's async_rest transport, which applies them.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, Awaitable, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+from config import GEMINI_API_BASE_URL, GEMINI_STREAM_URL, REQUEST_TIMEOUT, MAX_RETRIES, HTTP_POOL_SIZE, HTTP_KEEPALIVE
+from api_client import (
+    adjust_temperature, build_request_body, extract_text, parse_sse_line, StreamInterruptedError
+)
+from retry_policy import Deadline, RetryPolicy, parse_retry_after
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# aiohttp sessions are bound to an event loop, so the pool is kept per loop and origin.
+# A session holds its loop, so entries cannot be weak; loops found closed are dropped
+# instead, so short-lived loops (asyncio.run per call) do not pile up.
+_sessions: Dict[int, Tuple[asyncio.AbstractEventLoop, Dict[str, "aiohttp.ClientSession"]]] = {}
+_sessions_lock = threading.Lock()
+
+
+def _origin(url: str) -> str:
+    """Return the scheme://host[:port] part of a URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _loop_sessions(loop: asyncio.AbstractEventLoop) -> Dict[str, "aiohttp.ClientSession"]:
+    """Get a loop's sessions by origin, dropping those of loops that were closed."""
+    with _sessions_lock:
+        closed = [loop_id for loop_id, (owner, _) in _sessions.items() if owner.is_closed()]
+        for loop_id in closed:
+            del _sessions[loop_id]
+        if closed:
+            logger.info(f"Dropped async HTTP sessions of {len(closed)} closed event loops")
+        return _sessions.setdefault(id(loop), (loop, {}))[1]
+
+
+async def get_async_session(base_url: str) -> "aiohttp.ClientSession":
+    """
+    Get the shared aiohttp session for the running loop and a URL's origin.
+
+    Args:
+        base_url: Any URL on the target host
+
+    Returns:
+        The pooled session
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp is required for AsyncGeminiAPIClient. Install it with: pip install aiohttp")
+
+    sessions = _loop_sessions(asyncio.get_running_loop())
+    origin = _origin(base_url)
+    session = sessions.get(origin)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_SIZE,
+            keepalive_timeout=60 if HTTP_KEEPALIVE else 0,
+            force_close=not HTTP_KEEPALIVE
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        sessions[origin] = session
+        logger.info(f"Created pooled async HTTP session for {origin} (pool size {HTTP_POOL_SIZE})")
+    return session
+
+
+# Event loop run on a daemon thread for synchronous callers (the async_rest transport)
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def submit_to_background_loop(coroutine: Awaitable[Any]) -> "concurrent.futures.Future":
+    """
+    Run a coroutine on the shared background event loop.
+
+    Args:
+        coroutine: The coroutine to run
+
+    Returns:
+        A future for its result; cancelling it cancels the coroutine
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="gemini-async-loop", daemon=True).start()
+            logger.info("Started background event loop for async transports")
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop)
+
+
+async def close_async_sessions() -> None:
+    """Close the pooled sessions that belong to the running loop."""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        sessions = _sessions.pop(id(loop), (loop, {}))[1]
+    for session in sessions.values():
+        await session.close()
+
+
+class AsyncGeminiAPIClient:
+    """Low-level asyncio client for the Gemini-2.0-Flash API (retries only, no key pool or guards)."""
+
+    def __init__(self, api_key: str, agent_name: str = "Unknown"):
+        """
+        Initialize the async Gemini API client.
+
+        Args:
+            api_key: The API key for authentication
+            agent_name: Name of the agent using this client (for logging)
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncGeminiAPIClient. Install it with: pip install aiohttp")
+
+        self.api_key = api_key
+        self.agent_name = agent_name
+        self.base_url = GEMINI_API_BASE_URL
+        self.stream_url = GEMINI_STREAM_URL
+        self.timeout = REQUEST_TIMEOUT
+        self.max_retries = MAX_RETRIES
+        self.retry_policy = RetryPolicy(max_attempts=self.max_retries)
+
+    def _attempt_timeout(self, deadline: Optional[Deadline]) -> "aiohttp.ClientTimeout":
+        """Get the timeout for one attempt, cut short by the deadline."""
+        return aiohttp.ClientTimeout(total=deadline.cap(self.timeout) if deadline is not None else self.timeout)
+
+    async def _backoff(self, attempt: int, deadline: Optional[Deadline], retry_after: Optional[float] = None) -> bool:
+        """
+        Sleep before the next attempt as the retry policy dictates.
+
+        Args:
+            attempt: Zero-based index of the attempt that failed
+            deadline: The request's deadline, if any
+            retry_after: Delay the server asked for, if any
+
+        Returns:
+            True to retry, False to give up
+        """
+        delay = self.retry_policy.next_delay(attempt, deadline, retry_after)
+        if delay is None:
+            logger.error(f"[{self.agent_name}] Failed after {attempt+1} attempts")
+            return False
+        logger.info(f"[{self.agent_name}] Retrying in {delay:.2f} seconds...")
+        await asyncio.sleep(delay)
+        return True
+
+    async def generate_content(self, prompt: str, temperature: float = 0.7, *,
+                               deadline: Optional[Deadline] = None,
+                               system_instruction: Optional[str] = None) -> Optional[str]:
+        """
+        Generate content using the Gemini-2.0-Flash model.
+
+        Cancelling the awaiting task aborts the in-flight request or backoff
+        sleep immediately; the pooled connection is released by aiohttp.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs an answer by
+            system_instruction: Static instructions sent as the systemInstruction
+
+        Returns:
+            The generated text or None if an error occurred
+        """
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        logger.info(f"[{self.agent_name}] Sending async request to Gemini API")
+
+        headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": self.api_key
+        }
+        data = build_request_body(prompt, temperature, system_instruction)
+        session = await get_async_session(self.base_url)
+
+        for attempt in range(self.max_retries):
+            if not self.retry_policy.can_start_attempt(deadline):
+                logger.warning(f"[{self.agent_name}] Deadline too close; not starting attempt {attempt+1}")
+                return None
+            retry_after = None
+            try:
+                async with session.post(self.base_url, headers=headers, json=data,
+                                        timeout=self._attempt_timeout(deadline)) as response:
+                    if response.status == 200:
+                        text = extract_text(await response.json())
+                        if text:
+                            logger.info(f"[{self.agent_name}] Successfully received response")
+                            return text
+                        # An empty answer (e.g. blocked content) would come back empty again
+                        logger.error(f"[{self.agent_name}] API returned an empty response; giving up")
+                        return None
+
+                    logger.warning(f"[{self.agent_name}] API returned status code {response.status}")
+                    if not self.retry_policy.is_retryable_status(response.status):
+                        logger.error(f"[{self.agent_name}] Status {response.status} is not retryable; giving up")
+                        return None
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # A body that is not JSON (ContentTypeError, ValueError) is retried like a request error
+                logger.error(f"[{self.agent_name}] Request error on attempt {attempt+1}/{self.max_retries}: {str(e)}")
+
+            if not await self._backoff(attempt, deadline, retry_after):
+                break
+
+        return None
+
+    async def stream_content(self, prompt: str, temperature: float = 0.7, *,
+                             deadline: Optional[Deadline] = None,
+                             system_instruction: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream content through the REST streamGenerateContent endpoint (SSE).
+
+        Attempts that fail before any chunk is yielded are retried; a failure
+        after partial output raises StreamInterruptedError.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs the stream to have started by
+            system_instruction: Static instructions sent as the systemInstruction
+
+        Yields:
+            Text chunks in order
+        """
+        temperature = adjust_temperature(prompt, temperature, system_instruction or "")
+        logger.info(f"[{self.agent_name}] Sending async streaming request to Gemini API")
+
+        headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": self.api_key
+        }
+        data = build_request_body(prompt, temperature, system_instruction)
+        session = await get_async_session(self.stream_url)
+
+        for attempt in range(self.max_retries):
+            if not self.retry_policy.can_start_attempt(deadline):
+                logger.warning(f"[{self.agent_name}] Deadline too close; not starting attempt {attempt+1}")
+                return
+            delivered = False
+            retry_after = None
+            try:
+                async with session.post(self.stream_url, headers=headers, json=data,
+                                        timeout=self._attempt_timeout(deadline)) as response:
+                    if response.status == 200:
+                        async for raw_line in response.content:
+                            text = parse_sse_line(raw_line.decode("utf-8"))
+                            if text:
+                                delivered = True
+                                yield text
+                        logger.info(f"[{self.agent_name}] Successfully streamed response")
+                        return
+
+                    logger.warning(f"[{self.agent_name}] API returned status code {response.status}")
+                    if not self.retry_policy.is_retryable_status(response.status):
+                        logger.error(f"[{self.agent_name}] Status {response.status} is not retryable; giving up")
+                        return
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                if delivered:
+                    logger.error(f"[{self.agent_name}] Stream interrupted after partial output: {str(e)}")
+                    raise StreamInterruptedError(str(e)) from e
+                logger.error(f"[{self.agent_name}] Request error on attempt {attempt+1}/{self.max_retries}: {str(e)}")
+
+            if not await self._backoff(attempt, deadline, retry_after):
+                break
+
+    async def generate_response(self, prompt: str, temperature: float = 0.7, *,
+                                deadline: Optional[Deadline] = None,
+                                system_instruction: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a response and return it in a structured format.
+
+        Args:
+            prompt: The prompt to send to the model
+            temperature: Controls randomness (0.0 to 1.0)
+            deadline: When the caller needs an answer by
+            system_instruction: Static instructions sent as the systemInstruction
+
+        Returns:
+            A dictionary containing the response and metadata
+        """
+        content = await self.generate_content(prompt, temperature, deadline=deadline,
+                                             system_instruction=system_instruction)
+
+        if content:
+            return {
+                "success": True,
+                "content": content,
+                "agent_name": self.agent_name
+            }
+        else:
+            return {
+                "success": False,
+                "content": "",
+                "agent_name": self.agent_name,
+                "error": "Failed to generate content"
+            }
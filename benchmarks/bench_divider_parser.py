@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DividerAgent's subtask parser.
+
+Builds synthetic divider outputs of increasing size in the three shapes the
+parser handles - schema-constrained JSON, "Subtask N:" blocks and a plain
+numbered list - and times parsing each one. Time per kilobyte should stay
+flat as the output grows; a parser that rescans or re-concatenates text
+shows up as a per-kilobyte time that climbs with size.
+
+Usage:
+    python benchmarks/bench_divider_parser.py --subtasks 10 100 1000 --repeat 20
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DividerAgent
+
+
+def json_output(count, lines):
+    """A {"subtasks": [...]} response with count subtasks."""
+    return json.dumps({"subtasks": [
+        {"number": n, "title": f"Component {n} of the system",
+         "description": " ".join(f"Detail line {i} for subtask {n} covering inputs and outputs." for i in range(lines))}
+        for n in range(1, count + 1)
+    ]})
+
+
+def marker_output(count, lines):
+    """A free-text response with "Subtask N:" headers, bullets and a code fence per subtask."""
+    blocks = []
+    for n in range(1, count + 1):
+        body = "\n".join(f"Detail line {i} for subtask {n} covering inputs and outputs." for i in range(lines))
+        blocks.append(f"Subtask {n}: Component {n} of the system\n{body}\n- Bullet for {n}\n"
+                      f"```python\n1. not a header\n```")
+    return "Here is the breakdown.\n\n" + "\n\n".join(blocks)
+
+
+def numbered_output(count, lines):
+    """A free-text numbered list with indented, nested items."""
+    blocks = []
+    for n in range(1, count + 1):
+        body = "\n".join(f"   {i + 1}. Detail line {i} for subtask {n}." for i in range(lines))
+        blocks.append(f"{n}. Component {n} of the system\n{body}")
+    return "\n".join(blocks)
+
+
+SHAPES = {"json": json_output, "markers": marker_output, "numbered": numbered_output}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time DividerAgent's subtask parser on large outputs")
+    parser.add_argument("--subtasks", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Subtask counts to generate")
+    parser.add_argument("--lines", type=int, default=8, help="Detail lines per subtask")
+    parser.add_argument("--repeat", type=int, default=20, help="Parses per measurement (best is reported)")
+    args = parser.parse_args()
+
+    # The parser warns about count mismatches; keep the table readable
+    logging.getLogger("models").setLevel(logging.ERROR)
+    divider = DividerAgent.__new__(DividerAgent)
+    divider.name = "Bench Divider"
+
+    print(f"{'shape':<10} {'subtasks':>8} {'KiB':>9} {'parsed':>7} {'best ms':>9} {'us/KiB':>8}")
+    for shape, build in SHAPES.items():
+        for count in args.subtasks:
+            text = build(count, args.lines)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subtasks = divider._parse_subtasks(text, count)
+                best = min(best, time.perf_counter() - start)
+            kib = len(text) / 1024
+            print(f"{shape:<10} {count:>8} {kib:>9.1f} {len(subtasks):>7} {best * 1000:>9.2f} "
+                  f"{best * 1e6 / kib:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark for pooled keep-alive HTTP sessions.
+
+Starts a local HTTPS stand-in for the Gemini generateContent endpoint (with a
+throwaway self-signed certificate) and times a burst of calls made with a cold
+requests.post per call versus the shared pooled session from http_pool.
+
+Usage:
+    python benchmarks/bench_http_pool.py --calls 50
+"""
+
+import os
+import sys
+import ssl
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_pool
+
+RESPONSE_BODY = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "Hello from the stand-in server"}]}}]
+}).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal generateContent handler that keeps connections alive."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    handshakes = 0
+
+    def setup(self):
+        super().setup()
+        StandInHandler.handshakes += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_certificate(directory: str):
+    """Create a self-signed certificate for localhost with the openssl CLI."""
+    cert_file = os.path.join(directory, "cert.pem")
+    key_file = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key_file, "-out", cert_file, "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"
+        ],
+        check=True,
+        capture_output=True
+    )
+    return cert_file, key_file
+
+
+def start_server(cert_file: str, key_file: str) -> ThreadingHTTPServer:
+    """Start the HTTPS stand-in server on a free port."""
+    server = ThreadingHTTPServer(("localhost", 0), StandInHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_burst(post, url: str, calls: int, cert_file: str) -> float:
+    """Issue a burst of sequential calls and return the elapsed time."""
+    payload = {"contents": [{"parts": [{"text": "ping"}]}]}
+    start = time.perf_counter()
+    for _ in range(calls):
+        response = post(url, json=payload, timeout=10, verify=cert_file)
+        response.raise_for_status()
+        response.json()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs cold HTTPS calls")
+    parser.add_argument("--calls", type=int, default=50, help="Number of calls per burst")
+    parser.add_argument("--prewarm", type=int, default=4, help="Connections to pre-warm")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_file, key_file = make_certificate(directory)
+        server = start_server(cert_file, key_file)
+        host, port = server.server_address[:2]
+        url = f"https://localhost:{port}/v1beta/models/gemini-2.0-flash:generateContent"
+
+        try:
+            StandInHandler.handshakes = 0
+            cold_time = run_burst(requests.post, url, args.calls, cert_file)
+            cold_handshakes = StandInHandler.handshakes
+
+            # Session-level verify is overridden by CA bundle environment variables
+            os.environ["REQUESTS_CA_BUNDLE"] = cert_file
+            http_pool.get_session(url)
+            StandInHandler.handshakes = 0
+            warmed = http_pool.prewarm(url, args.prewarm)
+            pooled_time = run_burst(http_pool.get_session(url).post, url, args.calls, cert_file)
+            pooled_handshakes = StandInHandler.handshakes
+        finally:
+            http_pool.close_all()
+            server.shutdown()
+
+    print(f"Calls per burst:        {args.calls}")
+    print(f"Cold requests.post:     {cold_time * 1000:.1f} ms total, "
+          f"{cold_time * 1000 / args.calls:.2f} ms/call, {cold_handshakes} handshakes")
+    print(f"Pooled session:         {pooled_time * 1000:.1f} ms total, "
+          f"{pooled_time * 1000 / args.calls:.2f} ms/call, {pooled_handshakes} handshakes "
+          f"({warmed} pre-warmed)")
+    if pooled_time > 0:
+        print(f"Speedup:                {cold_time / pooled_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
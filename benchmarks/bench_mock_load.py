@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for GeminiAPIClient against the mock Gemini server.
+
+Starts mock_gemini_server in-process with the requested latency, error and
+429-burst profile, points the client at it through GEMINI_API_BASE_URL and
+fires concurrent generations, then reports latency percentiles, success rate
+and what the server saw. Runs are reproducible with --seed.
+
+Usage:
+    python benchmarks/bench_mock_load.py --calls 200 --concurrency 20 --error-rate 0.05
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_gemini_server import MockSettings, start_mock_server
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Gemini client against the mock server")
+    parser.add_argument("--calls", type=int, default=100, help="Total generations")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent callers")
+    parser.add_argument("--keys", type=int, default=3, help="Fake API keys in the pool")
+    parser.add_argument("--path", choices=["sdk", "rest"], default="rest",
+                        help="Client entry point: generate_content (all transports) or generate_content_direct")
+    parser.add_argument("--transports", default="sdk,rest", help="Transports used by generate_content")
+    parser.add_argument("--strategy", choices=["preferred", "fallback", "race"], default="fallback",
+                        help="How generate_content combines the transports")
+    parser.add_argument("--latency-median", type=float, default=0.3, help="Mock median latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Mock log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock random error probability")
+    parser.add_argument("--burst-every", type=int, default=0, help="Mock 429 burst period in requests")
+    parser.add_argument("--burst-length", type=int, default=0, help="Mock 429 burst length in requests")
+    parser.add_argument("--response-chars", type=int, default=1200, help="Mock response length")
+    parser.add_argument("--seed", type=int, default=7, help="Mock random seed")
+    args = parser.parse_args()
+
+    server = start_mock_server(MockSettings(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma, error_rate=args.error_rate,
+        burst_every=args.burst_every, burst_length=args.burst_length, retry_after=0.5,
+        response_chars=args.response_chars, seed=args.seed
+    ))
+
+    # Configuration is read at import time, so point it at the mock first
+    os.environ["GEMINI_API_BASE_URL"] = server.base_url()
+    os.environ["GEMINI_SDK_ENDPOINT"] = server.origin
+    os.environ["GEMINI_SDK_TRANSPORT"] = "rest"
+    os.environ.setdefault("GEMINI_RPM_LIMIT", "0")
+    os.environ.setdefault("GEMINI_TPM_LIMIT", "0")
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+    os.environ["TRANSPORTS"] = args.transports
+    os.environ["TRANSPORT_STRATEGY"] = args.strategy
+
+    from api_client import GeminiAPIClient
+    from key_pool import APIKeyPool
+
+    pool = APIKeyPool([f"mock-key-{i}" for i in range(args.keys)])
+    client = GeminiAPIClient("mock-key-0", "Bench", key_pool=pool)
+    generate = client.generate_content if args.path == "sdk" else client.generate_content_direct
+
+    def one_call(index):
+        start = time.perf_counter()
+        text = generate(f"Benchmark prompt {index}", 0.3)
+        return time.perf_counter() - start, bool(text)
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(one_call, range(args.calls)))
+        elapsed = time.perf_counter() - start
+        stats = server.state.snapshot()
+    finally:
+        server.shutdown()
+
+    latencies = [latency for latency, _ in results]
+    successes = sum(1 for _, ok in results if ok)
+    print(f"Calls:                  {args.calls} ({args.concurrency} concurrent, {args.keys} keys, {args.path})")
+    print(f"Succeeded:              {successes} ({successes * 100 / args.calls:.1f}%)")
+    print(f"Throughput:             {args.calls / elapsed:.1f} calls/s")
+    print(f"Latency p50/p95/p99:    {percentile(latencies, 50) * 1000:.0f} / "
+          f"{percentile(latencies, 95) * 1000:.0f} / {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"Upstream requests:      {stats['requests']} {stats['statuses']}")
+    print(f"Upstream bytes in/out:  {stats['bytes_in']} / {stats['bytes_out']}")
+    if args.path == "sdk":
+        for name, transport in client.get_transport_stats()["transports"].items():
+            print(f"Transport {name + ':':<13} {transport['successes']}/{transport['attempts']} ok, "
+                  f"p50 {transport['p50_latency']}s, {transport['wins']} race wins")
+
+
+if __name__ == "__main__":
+    main()
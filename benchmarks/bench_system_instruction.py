@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the split system/user prompts against the mock Gemini server.
+
+Sends the same thinker calls three ways - the legacy single inlined prompt,
+the static part as systemInstruction, and the static part in a context cache
+(cachedContents) - and reports request bytes and prompt tokens per call as
+seen by the mock, as a change against the inline prompt.
+
+systemInstruction on its own saves nothing: the same tokens are billed and
+the request is slightly larger (about 2% with the built-in thinker prompt).
+It only matters as what a context cache stores. The cachedContent run lowers
+the cache's minimum to 0 to show what caching would do; Gemini only caches
+contexts of at least CONTEXT_CACHE_MIN_TOKENS (4096 by default), the built-in
+prompts are a few hundred tokens, and CONTEXT_CACHE_ENABLED is off by
+default, so a default deployment sends every system prompt inline. Pass
+--system-repeat to model a system prompt large enough to be cached.
+
+Usage:
+    python benchmarks/bench_system_instruction.py --calls 50 --system-repeat 8
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_gemini_server import MockSettings, start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline, systemInstruction and cached system prompts")
+    parser.add_argument("--calls", type=int, default=30, help="Generations per mode")
+    parser.add_argument("--system-repeat", type=int, default=1,
+                        help="Repeat the thinker system prompt this many times to model larger instructions")
+    parser.add_argument("--path", choices=["sdk", "rest"], default="rest",
+                        help="Client entry point: generate_content (SDK first) or generate_content_direct")
+    args = parser.parse_args()
+
+    server = start_mock_server(MockSettings(latency_median=0.01, latency_sigma=0, response_chars=200, seed=1))
+
+    # Configuration is read at import time, so point it at the mock first
+    os.environ["GEMINI_API_BASE_URL"] = server.base_url()
+    os.environ["GEMINI_SDK_ENDPOINT"] = server.origin
+    os.environ["GEMINI_SDK_TRANSPORT"] = "rest"
+    os.environ.setdefault("GEMINI_RPM_LIMIT", "0")
+    os.environ.setdefault("GEMINI_TPM_LIMIT", "0")
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+    os.environ.setdefault("COALESCE_REQUESTS", "false")
+
+    import prompts
+    from api_client import GeminiAPIClient
+    from context_cache import ContextCacheRegistry
+
+    system = "\n\n".join([prompts.THINKER_SYSTEM_PROMPT] * args.system_repeat)
+    subtasks = [
+        prompts.THINKER_USER_PROMPT.format(subtask=f"Subtask {i}: Write part {i} of the answer", subtask_number=i)
+        for i in range(1, args.calls + 1)
+    ]
+
+    modes = {
+        "inline": (GeminiAPIClient("mock-key", "Inline"), None),
+        "systemInstruction": (GeminiAPIClient("mock-key", "System"), system),
+        "cachedContent": (
+            GeminiAPIClient("mock-key", "Cached", context_cache=ContextCacheRegistry(min_tokens=0)), system
+        )
+    }
+
+    results = {}
+    try:
+        for mode, (client, system_instruction) in modes.items():
+            generate = client.generate_content if args.path == "sdk" else client.generate_content_direct
+            server.state.reset()
+            for user_part in subtasks:
+                prompt = user_part if system_instruction else f"{system}\n\n{user_part}"
+                if args.path == "sdk":
+                    generate(prompt, 0.3, use_cache=False, system_instruction=system_instruction)
+                else:
+                    generate(prompt, 0.3, system_instruction=system_instruction)
+            results[mode] = server.state.snapshot()
+    finally:
+        server.shutdown()
+
+    print(f"System prompt: {len(system)} chars; {args.calls} calls per mode ({args.path})")
+    print(f"{'mode':<20}{'bytes/call':>12}{'tokens/call':>13}{'uncached/call':>15}{'requests':>10}")
+    baseline = None
+    for mode, stats in results.items():
+        calls = args.calls
+        bytes_in = stats["bytes_in"] / calls
+        tokens = stats["prompt_tokens"] / calls
+        uncached = (stats["prompt_tokens"] - stats["cached_tokens"]) / calls
+        print(f"{mode:<20}{bytes_in:>12.0f}{tokens:>13.0f}{uncached:>15.0f}{stats['requests']:>10}")
+        if baseline is None:
+            baseline = (bytes_in, uncached)
+        else:
+            print(f"{'':<20}{(bytes_in / baseline[0] - 1) * 100:>+11.1f}%"
+                  f"{'':>13}{(uncached / baseline[1] - 1) * 100:>+14.1f}%  change vs inline")
+    print("cachedContent ran with the cache minimum at 0; Gemini caches only contexts of at least "
+          "CONTEXT_CACHE_MIN_TOKENS tokens (4096 by default), so smaller system prompts go inline.")
+
+
+if __name__ == "__main__":
+    main()
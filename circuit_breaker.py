@@ -0,0 +1,197 @@
+"""
+Circuit Breaker module for ParadoxGPT.
+
+This module tracks the health of each upstream path (API key x transport) and
+fails fast while a path is known to be down, instead of spending every retry
+and backoff on it. Breaker states are exposed for health checks.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, List
+
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT, CIRCUIT_HALF_OPEN_MAX_CALLS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Closed: calls flow and consecutive failures are counted. Open: calls are
+    refused until the recovery timeout passes. Half-open: a limited number of
+    trial calls are let through; one success closes the circuit again and a
+    failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            name: Name of the guarded path (e.g. "<key id>:rest")
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before allowing trial calls
+            half_open_max_calls: Trial calls allowed at once while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def _current_state(self, now: float) -> str:
+        """Advance open -> half-open once the recovery timeout has passed."""
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"Circuit {self.name} is half-open; allowing trial calls")
+        return self._state
+
+    @property
+    def state(self) -> str:
+        """The breaker's current state."""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def is_open(self) -> bool:
+        """Return True if calls would currently be refused (without taking a trial slot)."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == OPEN or (state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls)
+
+    def allow(self) -> bool:
+        """
+        Ask permission for one call.
+
+        Returns:
+            True if the call may proceed; the caller must then report its outcome
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def cancel(self) -> None:
+        """Give back permission from allow() for a call that was never made."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        """Report a successful call."""
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed after a successful trial call")
+            self._state = CLOSED
+            self._half_open_calls = 0
+
+    def record_failure(self) -> None:
+        """Report a failed call."""
+        with self._lock:
+            now = time.monotonic()
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            state = self._current_state(now)
+            if state == HALF_OPEN or (state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = now
+                self._counters["opened"] += 1
+                logger.warning(f"Circuit {self.name} opened after {self._consecutive_failures} consecutive failures")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the breaker's state and counters.
+
+        Returns:
+            A dictionary suitable for health checks
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            snapshot = dict(self._counters)
+            snapshot.update({
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in": round(max(0.0, self.recovery_timeout - (now - self._opened_at)), 1) if state == OPEN else 0.0
+            })
+        return snapshot
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the process-wide breaker for a path, creating it on first use.
+
+    Args:
+        name: Name of the guarded path (e.g. "<key id>:sdk")
+
+    Returns:
+        The shared breaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states() -> List[Dict[str, Any]]:
+    """
+    Get snapshots of every breaker created so far.
+
+    Returns:
+        One snapshot per breaker
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
+
+
+def upstream_health() -> Dict[str, Any]:
+    """
+    Summarize upstream health from the breaker states.
+
+    Returns:
+        "healthy" when no circuit is open, "degraded" when some are, and
+        "down" when every known circuit is open, plus the breaker snapshots
+    """
+    states = breaker_states()
+    open_count = sum(1 for state in states if state["state"] == OPEN)
+    if open_count == 0:
+        status = "healthy"
+    elif open_count < len(states):
+        status = "degraded"
+    else:
+        status = "down"
+    return {"status": status, "open_circuits": open_count, "circuits": states}
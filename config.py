@@ -6,6 +6,7 @@ for the ParadoxGPT distributed multi-agent code generation system.
 """
 
 import os
+import tempfile
 from typing import Dict, List
 from dotenv import load_dotenv
 
@@ -29,12 +30,106 @@ MID_COMBINER_API_KEYS = [
 # Final Combiner API Key
 FINAL_COMBINER_API_KEY = os.getenv("FINAL_COMBINER_API_KEY")
 
+# Every distinct configured key, for spreading load across all of them
+ALL_API_KEYS = list(dict.fromkeys(
+    key for key in [DIVIDER_API_KEY, *THINKER_API_KEYS, *MID_COMBINER_API_KEYS, FINAL_COMBINER_API_KEY] if key
+))
+
 # API Configuration
 GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", 
                                "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent")
+GEMINI_STREAM_URL = os.getenv("GEMINI_STREAM_URL",
+                              GEMINI_API_BASE_URL.replace(":generateContent", ":streamGenerateContent") + "?alt=sse")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash")
+GEMINI_SDK_TRANSPORT = os.getenv("GEMINI_SDK_TRANSPORT", "grpc")  # "grpc" or "rest"
+GEMINI_SDK_ENDPOINT = os.getenv("GEMINI_SDK_ENDPOINT")  # e.g. http://127.0.0.1:8787 for mock_gemini_server.py
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 60))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
 
+# Transports for generate calls, in order of preference: "sdk", "rest", "async_rest", "mock"
+TRANSPORTS = [name.strip() for name in os.getenv("TRANSPORTS", "sdk,rest").split(",") if name.strip()]
+# "preferred" (retry the first, then fall back), "fallback" (fail fast to the next) or "race"
+TRANSPORT_STRATEGY = os.getenv("TRANSPORT_STRATEGY", "fallback").lower()
+TRANSPORT_AUTO_PREFER = os.getenv("TRANSPORT_AUTO_PREFER", "true").lower() in ["true", "1", "yes"]
+TRANSPORT_MIN_SAMPLES = int(os.getenv("TRANSPORT_MIN_SAMPLES", 20))
+TRANSPORT_WINDOW = int(os.getenv("TRANSPORT_WINDOW", 100))
+TRANSPORT_EXPLORE_RATE = float(os.getenv("TRANSPORT_EXPLORE_RATE", 0.05))
+
+# HTTP Connection Pool Configuration
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+HTTP_KEEPALIVE = os.getenv("HTTP_KEEPALIVE", "true").lower() in ["true", "1", "yes"]
+HTTP_PREWARM_CONNECTIONS = int(os.getenv("HTTP_PREWARM_CONNECTIONS", 0))
+
+# SDK model instances kept per client (keyed by model name and generation config)
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", 8))
+
+# Response Cache Configuration
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ["true", "1", "yes"]
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+# The SQLite backend is shared by all worker processes on a host (/tmp is writable on Vercel)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH",
+                                os.path.join(tempfile.gettempdir(), "paradoxgpt_responses.db"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+# Requests hotter than this are creative and always regenerated
+RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", 0.8))
+
+# Client-side rate limits per API key (0 disables a limit). Off by default, since
+# quotas depend on the account's tier; set them to the tier's limits (free tier:
+# 15 RPM, 1000000 TPM) to queue calls locally instead of drawing 429s
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", 0))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", 0))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 10))
+
+# API key pool: spread calls over all keys ("least_loaded" or "round_robin")
+KEY_POOL_ENABLED = os.getenv("KEY_POOL_ENABLED", "true").lower() in ["true", "1", "yes"]
+KEY_POOL_STRATEGY = os.getenv("KEY_POOL_STRATEGY", "least_loaded")
+KEY_POOL_FAILURE_THRESHOLD = int(os.getenv("KEY_POOL_FAILURE_THRESHOLD", 3))
+KEY_POOL_COOLDOWN = float(os.getenv("KEY_POOL_COOLDOWN", 60))
+
+# Circuit breakers per API key and transport (SDK / REST)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", 30))
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", 1))
+
+# Prompt size guard, checked locally before sending ("trim" or "reject" oversize prompts)
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", 1000000))
+PROMPT_OVERFLOW_POLICY = os.getenv("PROMPT_OVERFLOW_POLICY", "trim")
+TOKEN_CHARS_PER_TOKEN = float(os.getenv("TOKEN_CHARS_PER_TOKEN", 4.0))  # starting ratio, refined from usageMetadata
+
+# Retries: full-jitter backoff bounded by the request deadline
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 8))
+RETRY_MIN_ATTEMPT_TIME = float(os.getenv("RETRY_MIN_ATTEMPT_TIME", 2))
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", 25))  # serverless (api/index.py); 0 disables; keep below the platform limit
+APP_REQUEST_DEADLINE = float(os.getenv("APP_REQUEST_DEADLINE", 0))  # Flask server (app.py); 0 means no deadline
+
+# Hedged requests: resend a slow call once it passes a latency percentile (costs extra quota)
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() in ["true", "1", "yes"]
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+HEDGE_INITIAL_DELAY = float(os.getenv("HEDGE_INITIAL_DELAY", 8))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 1))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", 15))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", 200))
+
+# Gemini context caching of the static system prompts (cachedContents)
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() in ["true", "1", "yes"]
+CONTEXT_CACHE_TTL = float(os.getenv("CONTEXT_CACHE_TTL", 3600))
+CONTEXT_CACHE_REFRESH_MARGIN = float(os.getenv("CONTEXT_CACHE_REFRESH_MARGIN", 300))
+# Gemini refuses to cache contexts below a per-model minimum
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", 4096))
+
+# Per-attempt instrumentation sinks: "histogram" (also served at /metrics) and/or "json"
+INSTRUMENTATION_SINKS = [
+    name.strip() for name in os.getenv("INSTRUMENTATION_SINKS", "histogram").split(",") if name.strip()
+]
+INSTRUMENTATION_LOG_NAME = os.getenv("INSTRUMENTATION_LOG_NAME", "paradoxgpt.attempts")
+
+# Merge concurrent identical requests into one in-flight generation
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() in ["true", "1", "yes"]
+
 # Validate that all required API keys are present
 def validate_api_keys() -> bool:
     """Validate that all required API keys are present."""
@@ -62,3 +157,35 @@ def validate_api_keys() -> bool:
 NUM_THINKERS = 10
 NUM_MID_COMBINERS = 2
 THINKERS_PER_MID_COMBINER = NUM_THINKERS // NUM_MID_COMBINERS  # Should be 5
+
+# Multi-agent fan-out is sized per request from a task-complexity estimate within these
+# bounds; each mid-combiner merges up to THINKERS_PER_MID_COMBINER results
+ADAPTIVE_FAN_OUT = os.getenv("ADAPTIVE_FAN_OUT", "true").lower() in ["true", "1", "yes"]
+MIN_THINKERS = int(os.getenv("MIN_THINKERS", 2))
+MAX_THINKERS = int(os.getenv("MAX_THINKERS", NUM_THINKERS))
+
+# Ask the divider for schema-constrained JSON (responseMimeType/responseSchema) instead of free text
+DIVIDER_JSON_OUTPUT = os.getenv("DIVIDER_JSON_OUTPUT", "true").lower() in ["true", "1", "yes"]
+
+# Stream the divider's response and start each thinker as soon as its subtask is complete
+STREAM_DIVIDER = os.getenv("STREAM_DIVIDER", "true").lower() in ["true", "1", "yes"]
+
+# Thinker stage completion: go on once this share of the subtasks is solved, or once the stage
+# has run this many seconds (0 disables), cancelling the thinkers still running
+THINKER_QUORUM = float(os.getenv("THINKER_QUORUM", 1.0))
+THINKER_STAGE_TIMEOUT = float(os.getenv("THINKER_STAGE_TIMEOUT", 12))
+
+# Routing in "auto" mode: short messages without stated requirements take one call,
+# tasks scoring below ROUTER_FULL_MIN_SCORE get a reduced tree of at most
+# ROUTER_REDUCED_THINKERS thinkers, and the rest the full pipeline
+ROUTER_SINGLE_MAX_WORDS = int(os.getenv("ROUTER_SINGLE_MAX_WORDS", 12))
+ROUTER_FULL_MIN_SCORE = float(os.getenv("ROUTER_FULL_MIN_SCORE", 6))
+ROUTER_REDUCED_THINKERS = int(os.getenv("ROUTER_REDUCED_THINKERS", 3))
+
+# How a request is answered: "single" (one conversational call), "multi_agent"
+# (divider -> thinkers -> mid-combiners -> final combiner) or "auto" (routed per request
+# from local task analysis); /api/chat and the CLI can override it
+ORCHESTRATION_MODE = os.getenv("ORCHESTRATION_MODE", "single")
+
+# Thinkers (and mid-combiners) run concurrently on a pool of at most this many threads
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", NUM_THINKERS))
@@ -0,0 +1,242 @@
+"""
+Context Cache module for ParadoxGPT.
+
+This module keeps the static system prompts in Gemini's context cache
+(cachedContents), so each call sends only a short cache name and its dynamic
+user part instead of re-sending and re-billing the full instructions. Cache
+entries are created on first use per API key, refreshed before their TTL runs
+out, and dropped when Gemini no longer knows them; callers fall back to an
+inline systemInstruction whenever no cache entry is available.
+
+Gemini only caches contexts of at least CONTEXT_CACHE_MIN_TOKENS (4096 by
+default). The built-in system prompts are far smaller, so with the defaults
+(and CONTEXT_CACHE_ENABLED off) nothing is cached and every call sends its
+system prompt inline; the cache pays off only for large custom instructions.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config import (
+    GEMINI_API_BASE_URL, GEMINI_MODEL_NAME, REQUEST_TIMEOUT, CONTEXT_CACHE_ENABLED, CONTEXT_CACHE_TTL,
+    CONTEXT_CACHE_REFRESH_MARGIN, CONTEXT_CACHE_MIN_TOKENS
+)
+from http_pool import get_session
+from single_flight import SingleFlight
+from token_estimator import get_default_estimator
+from utils import hash_api_key
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# How long a failed creation is remembered before it is tried again
+FAILURE_BACKOFF = 60.0
+
+
+def cached_contents_url(base_url: str) -> str:
+    """
+    Derive the cachedContents collection URL from a model's generateContent URL.
+
+    Args:
+        base_url: e.g. https://host/v1beta/models/gemini-2.0-flash:generateContent
+
+    Returns:
+        e.g. https://host/v1beta/cachedContents
+    """
+    root = base_url.split("/models/", 1)[0]
+    return f"{root}/cachedContents"
+
+
+class _Entry:
+    """A cachedContents resource known to exist for one key and system prompt."""
+
+    def __init__(self, name: str, expires_at: float):
+        self.name = name
+        self.expires_at = expires_at
+
+
+class ContextCacheRegistry:
+    """Creates, refreshes and hands out cachedContents names for system prompts."""
+
+    def __init__(self, base_url: str = GEMINI_API_BASE_URL, model_name: str = GEMINI_MODEL_NAME,
+                 ttl: float = CONTEXT_CACHE_TTL, refresh_margin: float = CONTEXT_CACHE_REFRESH_MARGIN,
+                 min_tokens: int = CONTEXT_CACHE_MIN_TOKENS):
+        """
+        Initialize the registry.
+
+        Args:
+            base_url: The model's generateContent URL
+            model_name: The model the cached contexts are created for
+            ttl: Lifetime of a cache entry in seconds
+            refresh_margin: Extend an entry's TTL once less than this is left
+            min_tokens: System prompts estimated below this are not cached
+                        (Gemini rejects contexts under its per-model minimum)
+        """
+        self.url = cached_contents_url(base_url)
+        self.root = self.url.rsplit("/cachedContents", 1)[0]
+        self.model_name = model_name
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._failures: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight("ContextCache")
+        self._counters = {
+            "hits": 0, "created": 0, "refreshed": 0, "invalidated": 0, "failures": 0, "too_small": 0
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _entry_key(api_key: str, system_instruction: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()
+        return hash_api_key(api_key), digest
+
+    def get(self, api_key: str, system_instruction: str, timeout: float = REQUEST_TIMEOUT) -> Optional[str]:
+        """
+        Get the cachedContents name holding a system prompt, creating it if needed.
+
+        Args:
+            api_key: The key the generation will use (caches belong to its project)
+            system_instruction: The static system prompt
+            timeout: Timeout for a create or refresh call
+
+        Returns:
+            The resource name (cachedContents/...), or None to send the
+            system prompt inline instead
+        """
+        if not system_instruction:
+            return None
+        if get_default_estimator().estimate(system_instruction) < self.min_tokens:
+            self._count("too_small")
+            return None
+
+        entry_key = self._entry_key(api_key, system_instruction)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            failed_at = self._failures.get(entry_key)
+        if failed_at is not None and now - failed_at < FAILURE_BACKOFF:
+            return None
+
+        if entry is not None and entry.expires_at > now:
+            if entry.expires_at - now < self.refresh_margin:
+                self._flights.do(f"refresh:{entry.name}", self._refresh, api_key, entry, timeout)
+            self._count("hits")
+            return entry.name
+
+        # Concurrent callers for the same prompt and key share one creation
+        flight_key = "create:" + ":".join(entry_key)
+        return self._flights.do(flight_key, self._create, api_key, system_instruction, entry_key, timeout)
+
+    def _create(self, api_key: str, system_instruction: str, entry_key: Tuple[str, str],
+                timeout: float) -> Optional[str]:
+        """Create a cachedContents resource and remember it."""
+        body = {
+            "model": f"models/{self.model_name}",
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "ttl": f"{int(self.ttl)}s"
+        }
+        try:
+            response = get_session(self.url).post(
+                self.url,
+                headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+                json=body,
+                timeout=timeout
+            )
+            if response.status_code == 200:
+                name = response.json().get("name")
+                if name:
+                    with self._lock:
+                        self._entries[entry_key] = _Entry(name, time.monotonic() + self.ttl)
+                        self._failures.pop(entry_key, None)
+                    self._count("created")
+                    logger.info(f"Created context cache {name} for key {entry_key[0]}")
+                    return name
+            logger.warning(f"Context cache creation returned status code {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Context cache creation failed: {str(e)}")
+
+        with self._lock:
+            self._failures[entry_key] = time.monotonic()
+        self._count("failures")
+        return None
+
+    def _refresh(self, api_key: str, entry: _Entry, timeout: float) -> None:
+        """Extend an entry's TTL; on failure it simply expires and is recreated."""
+        url = f"{self.root}/{entry.name}?updateMask=ttl"
+        try:
+            response = get_session(url).patch(
+                url,
+                headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+                json={"ttl": f"{int(self.ttl)}s"},
+                timeout=timeout
+            )
+            if response.status_code == 200:
+                entry.expires_at = time.monotonic() + self.ttl
+                self._count("refreshed")
+                return
+            logger.warning(f"Context cache refresh of {entry.name} returned status code {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Context cache refresh of {entry.name} failed: {str(e)}")
+
+    def invalidate(self, api_key: str, system_instruction: str) -> None:
+        """
+        Forget the entry for a key and system prompt, e.g. after Gemini returned 404 for it.
+
+        Args:
+            api_key: The key the entry belongs to
+            system_instruction: The static system prompt
+        """
+        with self._lock:
+            entry = self._entries.pop(self._entry_key(api_key, system_instruction), None)
+        if entry is not None:
+            self._count("invalidated")
+            logger.info(f"Dropped context cache {entry.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get creation, refresh and hit counters.
+
+        Returns:
+            A dictionary of counters and the number of live entries
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        stats["ttl"] = self.ttl
+        stats["min_tokens"] = self.min_tokens
+        return stats
+
+
+_default_context_cache: Optional[ContextCacheRegistry] = None
+_default_context_cache_lock = threading.Lock()
+
+
+def get_default_context_cache() -> Optional[ContextCacheRegistry]:
+    """
+    Get the process-wide context cache registry, if context caching is enabled.
+
+    Returns:
+        The shared registry, or None when CONTEXT_CACHE_ENABLED is off
+    """
+    global _default_context_cache
+    if not CONTEXT_CACHE_ENABLED:
+        return None
+
+    with _default_context_cache_lock:
+        if _default_context_cache is None:
+            _default_context_cache = ContextCacheRegistry()
+            logger.info(f"Context cache enabled (TTL {CONTEXT_CACHE_TTL}s, "
+                        f"min {CONTEXT_CACHE_MIN_TOKENS} tokens)")
+        return _default_context_cache
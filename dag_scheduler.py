@@ -0,0 +1,385 @@
+"""
+DAG Scheduler module for ParadoxGPT.
+
+This module runs a pipeline expressed as a dependency graph: every node is
+submitted to a thread pool the moment all of its inputs are ready, rather
+than stage by stage, so a mid-combiner can start while thinkers feeding the
+other combiner are still running. Each run records when every node became
+ready, started and finished, and reports the critical path - the chain of
+nodes that actually bounded the request's latency. A node can also publish
+named partial results while it runs, releasing the nodes that need only
+those before it finishes, and a listener can resolve nodes that are still
+running (or not yet started) with a substitute result so the rest of the
+graph need not wait for them.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class Node:
+    """One step of a pipeline: a callable and the nodes whose results it needs."""
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (),
+                 publishes: Sequence[str] = ()):
+        """
+        Initialize a node.
+
+        Args:
+            name: Unique name of the node within its graph
+            fn: Called with {dependency name: result} once every dependency
+                finished; a node that publishes also gets publish(name, value)
+            deps: Names of the nodes this one needs
+            publishes: Names of partial results fn hands out before it returns;
+                       other nodes depend on them like on nodes. One fn never
+                       published resolves to None when fn returns (or is
+                       skipped, if fn failed)
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.publishes = tuple(publishes)
+
+
+class NodeTiming:
+    """When a node became ready, started and finished (monotonic seconds)."""
+
+    __slots__ = ("ready", "started", "finished")
+
+    def __init__(self):
+        self.ready: Optional[float] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+
+class DAGRun:
+    """Results, errors and timings of one execution of a graph."""
+
+    def __init__(self, nodes: Dict[str, Node]):
+        self.nodes = nodes
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+        self.abandoned: List[str] = []
+        self.timings: Dict[str, NodeTiming] = {name: NodeTiming() for name in nodes}
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        # Set by DAGScheduler.run while the graph is executing
+        self._resolve: Optional[Callable[[str, Any], bool]] = None
+
+    def resolve(self, name: str, value: Any) -> bool:
+        """
+        Finish a node now with a substitute result.
+
+        A running node's eventual result is discarded; a node that has not
+        started never runs. Dependents see value as the node's result.
+
+        Args:
+            name: The node to resolve
+            value: The result its dependents get
+
+        Returns:
+            True if the node was resolved, False if it had already finished
+            (or the run is over)
+        """
+        return self._resolve(name, value) if self._resolve is not None else False
+
+    def critical_path(self) -> List[str]:
+        """
+        Get the chain of nodes that bounded the run's latency.
+
+        Starts at the node that finished last and walks back through the
+        dependency that finished last, i.e. the one each node was waiting for.
+
+        Returns:
+            Node names from the first to the last node on the path
+        """
+        finished = {name: t.finished for name, t in self.timings.items() if t.finished is not None}
+        if not finished:
+            return []
+        path = [max(finished, key=finished.get)]
+        while True:
+            deps = [dep for dep in self.nodes[path[-1]].deps if dep in finished]
+            if not deps:
+                break
+            path.append(max(deps, key=finished.get))
+        path.reverse()
+        return path
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get per-node timings and the critical path, relative to the start of the run.
+
+        Returns:
+            A JSON-friendly dictionary: total seconds, per-node ready/start/end,
+            wait (ready to start) and duration, and the critical path with the
+            time each of its nodes spent waiting and running
+        """
+        def offset(moment: Optional[float]) -> Optional[float]:
+            return round(moment - self.started, 3) if moment is not None else None
+
+        nodes: Dict[str, Any] = {}
+        for name, timing in self.timings.items():
+            entry: Dict[str, Any] = {
+                "ready": offset(timing.ready), "start": offset(timing.started), "end": offset(timing.finished)
+            }
+            if timing.started is not None and timing.finished is not None:
+                entry["wait"] = round(timing.started - timing.ready, 3)
+                entry["duration"] = round(timing.finished - timing.started, 3)
+            if name in self.errors:
+                entry["error"] = str(self.errors[name])
+            if name in self.skipped:
+                entry["skipped"] = True
+            if name in self.abandoned:
+                entry["abandoned"] = True
+            nodes[name] = entry
+
+        path = self.critical_path()
+        end = self.finished if self.finished is not None else time.monotonic()
+        return {
+            "total": round(end - self.started, 3),
+            "nodes": nodes,
+            "critical_path": [
+                {"node": name, "wait": nodes[name].get("wait"), "duration": nodes[name].get("duration")}
+                for name in path
+            ]
+        }
+
+    def estimate_total(self, not_before: Dict[str, float]) -> float:
+        """
+        Estimate how long the run would have taken had some nodes started later.
+
+        Replays the graph with every node's measured duration, starting each
+        one when its dependencies finished (a published result as far into
+        its producer's run as it was published) or at its not_before time,
+        whichever is later. Queueing
+        for pool workers is not modelled, so compare the estimate against
+        estimate_total({}) rather than against the measured total.
+
+        Args:
+            not_before: Node name -> earliest start, in monotonic seconds
+
+        Returns:
+            Estimated seconds from the start of the run to the last node finishing
+        """
+        starts: Dict[str, float] = {}
+        ends: Dict[str, float] = {}
+        pending = {name: len(node.deps) for name, node in self.nodes.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for name, node in self.nodes.items():
+            for dep in node.deps:
+                dependents[dep].append(name)
+        ready = [name for name, count in pending.items() if count == 0]
+        while ready:
+            name = ready.pop()
+            timing = self.timings[name]
+            node = self.nodes[name]
+            if node.fn is None and timing.started is not None and self.timings[node.deps[0]].started is not None:
+                # A published result: as far into its producer's run as it was published
+                producer = node.deps[0]
+                start = starts[producer] + (timing.started - self.timings[producer].started)
+            else:
+                start = max([ends[dep] for dep in node.deps], default=self.started)
+            if not node.deps:
+                start = max(start, timing.started if timing.started is not None else self.started)
+            start = max(start, not_before.get(name, start))
+            starts[name] = start
+            duration = (timing.finished - timing.started
+                        if timing.started is not None and timing.finished is not None else 0.0)
+            ends[name] = start + duration
+            for dependent in dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        return max(ends.values(), default=self.started) - self.started
+
+    def describe_critical_path(self) -> str:
+        """One-line summary of the critical path for logging."""
+        report = self.report()
+        steps = " -> ".join(f"{step['node']} {step['duration'] or 0:.2f}s" for step in report["critical_path"])
+        return f"{steps} (total {report['total']:.2f}s)"
+
+
+class DAGScheduler:
+    """Runs graphs of Nodes on an executor, starting each node as soon as its inputs are ready."""
+
+    def __init__(self, executor: Executor):
+        """
+        Initialize the scheduler.
+
+        Args:
+            executor: Runs the nodes; nodes never wait on each other inside it,
+                      so a bounded pool cannot deadlock
+        """
+        self.executor = executor
+
+    def run(self, nodes: Sequence[Node], timeout: Optional[float] = None,
+            listener: Optional[Callable[[DAGRun, str], None]] = None) -> DAGRun:
+        """
+        Execute a graph and wait for it to finish.
+
+        A node whose dependency failed or was skipped is skipped as well.
+
+        Args:
+            nodes: The graph's nodes; dependencies must name nodes in it
+            timeout: Most seconds to wait for the whole graph (None waits indefinitely)
+            listener: Called with the run and a node's name each time a node
+                      finishes (run, failed, skipped, published or resolved),
+                      before its dependents start; it may call run.resolve
+
+        Returns:
+            The run's results, errors and timings
+
+        Raises:
+            ValueError: If a dependency is unknown or the graph has a cycle
+            TimeoutError: If the graph did not finish within timeout
+        """
+        graph = {node.name: node for node in nodes}
+        producers: Dict[str, str] = {}
+        for node in nodes:
+            for published in node.publishes:
+                # Each published result is a pseudo-node fed by its producer
+                producers[published] = node.name
+                graph.setdefault(published, Node(published, None, [node.name]))
+        if len(graph) != len(nodes) + len(producers):
+            raise ValueError("Node names must be unique")
+        dependents: Dict[str, List[str]] = {name: [] for name in graph}
+        for node in graph.values():
+            for dep in node.deps:
+                if dep not in graph:
+                    raise ValueError(f"Node {node.name!r} depends on unknown node {dep!r}")
+                dependents[dep].append(node.name)
+        self._check_acyclic(graph, dependents)
+
+        run = DAGRun(graph)
+        pending = {name: len(node.deps) for name, node in graph.items()}
+        remaining = [len(graph)]
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def finish(name: str) -> None:
+            """Mark a node done (run, failed or skipped) and release its dependents."""
+            ready: List[str] = []
+            with lock:
+                run.timings[name].finished = time.monotonic()
+                remaining[0] -= 1
+                for dependent in dependents[name]:
+                    if dependent in run.results or dependent in run.skipped:
+                        # Already published while its producer was running, or resolved
+                        continue
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+                if remaining[0] == 0:
+                    run.finished = time.monotonic()
+                    run._resolve = None
+                    done.set()
+            if listener is not None:
+                try:
+                    listener(run, name)
+                except Exception as e:
+                    logger.error(f"DAG listener failed on node {name}: {str(e)}")
+            for dependent in ready:
+                start(dependent)
+
+        def resolve(name: str, value: Any) -> bool:
+            with lock:
+                if (run.timings[name].finished is not None or name in run.results or name in run.errors
+                        or name in run.skipped):
+                    return False
+                run.results[name] = value
+                run.abandoned.append(name)
+            finish(name)
+            return True
+
+        def publisher(producer: str) -> Callable[[str, Any], None]:
+            def publish(name: str, value: Any) -> None:
+                with lock:
+                    if producers.get(name) != producer:
+                        raise ValueError(f"Node {producer!r} does not publish {name!r}")
+                    if name in run.results or run.timings[producer].finished is not None:
+                        return
+                    timing = run.timings[name]
+                    timing.ready = run.timings[producer].started
+                    timing.started = time.monotonic()
+                    run.results[name] = value
+                finish(name)
+            return publish
+
+        def execute(name: str) -> None:
+            node = graph[name]
+            run.timings[name].started = time.monotonic()
+            try:
+                inputs = {dep: run.results[dep] for dep in node.deps}
+                result = node.fn(inputs, publisher(name)) if node.publishes else node.fn(inputs)
+                error = None
+            except Exception as e:
+                result, error = None, e
+            with lock:
+                if name in run.abandoned:
+                    # Resolved while running; nothing waits for this outcome any more
+                    return
+                if error is None:
+                    run.results[name] = result
+                else:
+                    run.errors[name] = error
+            if error is not None:
+                logger.error(f"DAG node {name} failed: {str(error)}")
+            finish(name)
+
+        def start(name: str) -> None:
+            if name in run.abandoned:
+                # Resolved before it could start
+                return
+            run.timings[name].ready = time.monotonic()
+            if graph[name].fn is None and producers[name] in run.results:
+                # The producer finished without publishing this one
+                run.timings[name].started = run.timings[name].ready
+                run.results[name] = None
+                finish(name)
+                return
+            if any(dep not in run.results for dep in graph[name].deps):
+                # An input failed or was skipped; there is nothing to run on
+                run.skipped.append(name)
+                run.timings[name].started = run.timings[name].ready
+                finish(name)
+                return
+            self.executor.submit(execute, name)
+
+        if not graph:
+            run.finished = run.started
+            return run
+        run._resolve = resolve
+        for name, count in list(pending.items()):
+            if count == 0:
+                start(name)
+
+        if not done.wait(timeout):
+            raise TimeoutError(f"DAG did not finish within {timeout}s")
+        return run
+
+    @staticmethod
+    def _check_acyclic(graph: Dict[str, Node], dependents: Dict[str, List[str]]) -> None:
+        """Raise ValueError if the graph has a cycle (Kahn's algorithm)."""
+        pending = {name: len(node.deps) for name, node in graph.items()}
+        ready = [name for name, count in pending.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for dependent in dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(graph):
+            raise ValueError("The graph has a cycle")
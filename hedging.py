@@ -0,0 +1,205 @@
+"""
+Hedging module for ParadoxGPT.
+
+This module cuts tail latency by hedging slow calls: if the first request has
+not answered within a delay taken from a percentile of recent latencies, an
+identical second request is started. The first answer wins and the other leg
+is cancelled. Hedge rate and win counts are kept for tuning against quota.
+"""
+
+import math
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from config import (
+    HEDGE_REQUESTS, HEDGE_PERCENTILE, HEDGE_INITIAL_DELAY, HEDGE_MIN_DELAY, HEDGE_MAX_DELAY,
+    HEDGE_MIN_SAMPLES, HEDGE_WINDOW
+)
+from retry_policy import Deadline
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+class RequestHedger:
+    """Runs calls with an optional hedge leg and learns the hedge delay from latencies."""
+
+    def __init__(self, name: str = "default", percentile: float = HEDGE_PERCENTILE,
+                 initial_delay: float = HEDGE_INITIAL_DELAY, min_delay: float = HEDGE_MIN_DELAY,
+                 max_delay: float = HEDGE_MAX_DELAY, min_samples: int = HEDGE_MIN_SAMPLES,
+                 window: int = HEDGE_WINDOW):
+        """
+        Initialize the hedger.
+
+        Args:
+            name: Name of this hedger (for logging)
+            percentile: Latency percentile after which the hedge is sent
+            initial_delay: Hedge delay used until enough latencies are recorded
+            min_delay: Lower bound on the hedge delay in seconds
+            max_delay: Upper bound on the hedge delay in seconds
+            min_samples: Latencies needed before the percentile is trusted
+            window: Number of recent latencies kept
+        """
+        self.name = name
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0, "failed": 0, "cancelled": 0
+        }
+
+    def record_latency(self, seconds: float) -> None:
+        """Add the latency of a successful call to the window."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        """
+        Get how long to wait for the primary leg before hedging.
+
+        Returns:
+            The configured percentile of recent latencies, clamped to the bounds
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            index = min(len(samples) - 1, max(0, math.ceil(self.percentile / 100 * len(samples)) - 1))
+            delay = samples[index]
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def run(self, fn: Callable[[Deadline], Optional[Any]], deadline: Optional[Deadline] = None,
+            min_attempt_time: float = 0.0) -> Optional[Any]:
+        """
+        Call fn, hedging with a second call if the first is slow.
+
+        Each leg gets its own deadline (bounded by the caller's); the losing
+        leg's deadline is cancelled, so it stops before its next attempt or
+        retry and its result is discarded.
+
+        Args:
+            fn: Makes the call; takes the leg's deadline and returns a result or None
+            deadline: The caller's deadline, if any
+            min_attempt_time: Least time left for a hedge to be worth sending
+
+        Returns:
+            The first non-empty result, or None if every leg failed
+
+        Raises:
+            The primary leg's exception if every leg raised
+        """
+        self._count("calls")
+        results: "queue.Queue" = queue.Queue()
+        legs: Dict[str, Deadline] = {}
+
+        def launch(leg: str) -> None:
+            leg_deadline = deadline.child() if deadline is not None else Deadline(math.inf)
+            legs[leg] = leg_deadline
+
+            def target() -> None:
+                started = time.monotonic()
+                try:
+                    result = fn(leg_deadline)
+                except Exception as e:
+                    results.put((leg, None, e))
+                    return
+                if result:
+                    self.record_latency(time.monotonic() - started)
+                results.put((leg, result, None))
+
+            threading.Thread(target=target, name=f"{self.name}-{leg}", daemon=True).start()
+
+        launch(PRIMARY)
+        pending = 1
+        hedge_delay = self.delay()
+        try:
+            outcome = results.get(timeout=hedge_delay)
+        except queue.Empty:
+            outcome = None
+            if deadline is None or deadline.remaining() >= min_attempt_time:
+                logger.info(f"[{self.name}] No answer after {hedge_delay:.2f}s; sending hedge request")
+                self._count("hedged")
+                launch(HEDGE)
+                pending += 1
+
+        errors: Dict[str, Exception] = {}
+        while True:
+            if outcome is None:
+                outcome = results.get()
+            leg, result, error = outcome
+            outcome = None
+            pending -= 1
+            if result:
+                self._count("primary_wins" if leg == PRIMARY else "hedge_wins")
+                for other, other_deadline in legs.items():
+                    if other != leg:
+                        other_deadline.cancel()
+                        self._count("cancelled")
+                if leg == HEDGE:
+                    logger.info(f"[{self.name}] Hedge request won")
+                return result
+            if error is not None:
+                errors[leg] = error
+            if pending == 0:
+                break
+
+        self._count("failed")
+        if len(errors) == len(legs):
+            raise errors.get(PRIMARY) or errors[HEDGE]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hedge counters and the current delay.
+
+        Returns:
+            Calls, hedges sent, wins per leg, hedge rate and hedge win rate
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["samples"] = len(self._latencies)
+        stats["hedge_delay"] = round(self.delay(), 3)
+        stats["hedge_rate"] = stats["hedged"] / stats["calls"] if stats["calls"] else 0.0
+        stats["hedge_win_rate"] = stats["hedge_wins"] / stats["hedged"] if stats["hedged"] else 0.0
+        return stats
+
+
+_default_hedger: Optional[RequestHedger] = None
+_default_hedger_lock = threading.Lock()
+
+
+def get_default_hedger() -> Optional[RequestHedger]:
+    """
+    Get the process-wide hedger, so all clients share one latency window.
+
+    Returns:
+        The shared hedger, or None if hedging is disabled
+    """
+    global _default_hedger
+    if not HEDGE_REQUESTS:
+        return None
+
+    with _default_hedger_lock:
+        if _default_hedger is None:
+            _default_hedger = RequestHedger("Gemini")
+        return _default_hedger
@@ -0,0 +1,162 @@
+"""
+HTTP Pool module for ParadoxGPT.
+
+This module keeps a process-wide registry of pooled, keep-alive HTTP sessions
+keyed by origin, so repeated REST calls to the Gemini API reuse established
+TCP/TLS connections instead of paying a new handshake on every request.
+"""
+
+import socket
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from config import HTTP_POOL_SIZE, HTTP_KEEPALIVE, HTTP_PREWARM_CONNECTIONS, REQUEST_TIMEOUT
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTP adapter that enables TCP keep-alive probes on pooled sockets."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        socket_options = list(HTTPConnection.default_socket_options)
+        if HTTP_KEEPALIVE:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            # Linux-only tuning; other platforms fall back to system defaults
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+            if hasattr(socket, "TCP_KEEPINTVL"):
+                socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 15))
+        kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _origin(url: str) -> str:
+    """Return the scheme://host[:port] part of a URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def create_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Create a new session with a tuned connection pool.
+
+    Args:
+        pool_size: Maximum number of connections kept open per host
+
+    Returns:
+        A configured requests session
+    """
+    session = requests.Session()
+    adapter = KeepAliveAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if HTTP_KEEPALIVE:
+        session.headers["Connection"] = "keep-alive"
+    else:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def _get_or_create(base_url: str):
+    """Return the session for a URL's origin and whether it was just created."""
+    origin = _origin(base_url)
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is not None:
+            return session, False
+
+        session = create_session()
+        _sessions[origin] = session
+        logger.info(f"Created pooled HTTP session for {origin} (pool size {HTTP_POOL_SIZE})")
+        return session, True
+
+
+def get_session(base_url: str) -> requests.Session:
+    """
+    Get the shared session for the origin of a URL, creating it on first use.
+
+    Args:
+        base_url: Any URL on the target host
+
+    Returns:
+        The pooled session for that origin
+    """
+    session, created = _get_or_create(base_url)
+
+    if created and HTTP_PREWARM_CONNECTIONS > 0:
+        threading.Thread(
+            target=prewarm,
+            args=(base_url, HTTP_PREWARM_CONNECTIONS),
+            daemon=True
+        ).start()
+
+    return session
+
+
+def prewarm(base_url: str, connections: int = HTTP_PREWARM_CONNECTIONS,
+            timeout: Optional[float] = None) -> int:
+    """
+    Open connections to the origin ahead of time so the first calls skip the handshake.
+
+    Each connection is established with a lightweight HEAD request issued
+    concurrently, so the pool ends up holding that many idle, warm sockets.
+
+    Args:
+        base_url: Any URL on the target host
+        connections: Number of connections to open
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        The number of connections that were warmed successfully
+    """
+    session, _ = _get_or_create(base_url)
+    origin = _origin(base_url)
+    connections = min(connections, HTTP_POOL_SIZE)
+    if connections <= 0:
+        return 0
+
+    warmed = []
+    barrier = threading.Barrier(connections) if connections > 1 else None
+
+    def warm_one():
+        try:
+            if barrier is not None:
+                # Start together so each request needs its own connection
+                barrier.wait(timeout=5)
+            response = session.head(origin, timeout=timeout or REQUEST_TIMEOUT)
+            response.close()
+            warmed.append(True)
+        except (requests.RequestException, threading.BrokenBarrierError) as e:
+            logger.debug(f"Pre-warm request to {origin} failed: {str(e)}")
+
+    threads = [threading.Thread(target=warm_one, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logger.info(f"Pre-warmed {len(warmed)}/{connections} connections to {origin}")
+    return len(warmed)
+
+
+def close_all() -> None:
+    """Close every pooled session and forget them."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
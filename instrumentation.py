@@ -0,0 +1,309 @@
+"""
+Instrumentation module for ParadoxGPT.
+
+This module defines the structured event GeminiAPIClient emits for every
+attempt it makes (agent, hashed key, transport, attempt number, queue wait,
+network latency, time to first byte, sizes, reported token usage, outcome)
+and the built-in sinks that consume it: in-memory histograms, one JSON log
+line per attempt, and a Prometheus text exporter over the histograms.
+A hook is any callable taking an AttemptEvent.
+"""
+
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import INSTRUMENTATION_SINKS, INSTRUMENTATION_LOG_NAME
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds), spanning fast cache-like answers to slow generations
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Buckets for prompt sizes in tokens
+TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class AttemptEvent:
+    """One attempt made by a GeminiAPIClient, successful or not."""
+
+    __slots__ = (
+        "timestamp", "agent", "key_id", "transport", "attempt", "streaming", "queue_wait", "latency", "ttfb",
+        "prompt_chars", "response_chars", "prompt_tokens", "output_tokens", "cached_tokens", "status",
+        "outcome", "error"
+    )
+
+    def __init__(self, agent: str, key_id: str, transport: str, attempt: int, streaming: bool = False,
+                 queue_wait: float = 0.0, latency: float = 0.0, ttfb: Optional[float] = None,
+                 prompt_chars: int = 0, response_chars: int = 0, prompt_tokens: Optional[int] = None,
+                 output_tokens: Optional[int] = None, cached_tokens: Optional[int] = None,
+                 status: Optional[int] = None, outcome: str = "", error: Optional[str] = None):
+        """
+        Initialize an event.
+
+        Args:
+            agent: Name of the agent that made the call
+            key_id: Hash of the API key used
+            transport: Transport the attempt went through ("sdk", "rest", ...)
+            attempt: One-based attempt number within the call
+            streaming: Whether the attempt was a streaming request
+            queue_wait: Seconds spent waiting for a key and rate-limit budget
+            latency: Seconds spent on the network request itself
+            ttfb: Seconds until the first byte (headers or first chunk), if known
+            prompt_chars: Characters sent (system instruction plus prompt)
+            response_chars: Characters of generated text received
+            prompt_tokens: promptTokenCount from usageMetadata, if reported
+            output_tokens: candidatesTokenCount from usageMetadata, if reported
+            cached_tokens: cachedContentTokenCount from usageMetadata, if reported
+            status: HTTP status of the response, if any
+            outcome: Key pool outcome ("success", "failure", "exhausted", "skipped")
+            error: Error message for failed attempts
+        """
+        self.timestamp = time.time()
+        self.agent = agent
+        self.key_id = key_id
+        self.transport = transport
+        self.attempt = attempt
+        self.streaming = streaming
+        self.queue_wait = queue_wait
+        self.latency = latency
+        self.ttfb = ttfb
+        self.prompt_chars = prompt_chars
+        self.response_chars = response_chars
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+        self.status = status
+        self.outcome = outcome
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the event as a plain dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+Hook = Callable[[AttemptEvent], None]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None past the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf."""
+        pairs = []
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            pairs.append(("+Inf" if bound == float("inf") else f"{bound:g}", seen))
+        return pairs
+
+
+class HistogramSink:
+    """Aggregates attempt events into in-memory histograms and counters."""
+
+    # metric name -> (event field, buckets, help text)
+    HISTOGRAMS = {
+        "gemini_attempt_latency_seconds": ("latency", LATENCY_BUCKETS, "Network latency of Gemini attempts"),
+        "gemini_attempt_queue_wait_seconds": (
+            "queue_wait", LATENCY_BUCKETS, "Time attempts waited for a key and rate-limit budget"
+        ),
+        "gemini_attempt_ttfb_seconds": ("ttfb", LATENCY_BUCKETS, "Time to first byte of Gemini attempts"),
+        "gemini_attempt_prompt_tokens": ("prompt_tokens", TOKEN_BUCKETS, "Prompt tokens reported per attempt")
+    }
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: AttemptEvent) -> None:
+        transport_labels = (("transport", event.transport),)
+        with self._lock:
+            for metric, (field, buckets, _) in self.HISTOGRAMS.items():
+                value = getattr(event, field)
+                if value is None or (field == "latency" and event.outcome == "skipped"):
+                    continue
+                labels = transport_labels + (("outcome", event.outcome),) if field == "latency" else transport_labels
+                histogram = self._histograms.get((metric, labels))
+                if histogram is None:
+                    histogram = self._histograms[(metric, labels)] = Histogram(buckets)
+                histogram.observe(value)
+
+            self._add("gemini_attempts_total", (("agent", event.agent),) + transport_labels +
+                      (("outcome", event.outcome),), 1)
+            for kind, value in (("prompt", event.prompt_tokens), ("output", event.output_tokens),
+                                ("cached", event.cached_tokens)):
+                if value:
+                    self._add("gemini_tokens_total", (("agent", event.agent), ("kind", kind)), value)
+
+    def _add(self, metric: str, labels: Tuple[Tuple[str, str], ...], amount: float) -> None:
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a JSON-friendly summary of the collected metrics.
+
+        Returns:
+            Histogram counts, means and bucketed p50/p95/p99 plus counters,
+            keyed by metric name and labels
+        """
+        with self._lock:
+            histograms = {
+                f"{metric}{{{','.join(f'{k}={v}' for k, v in labels)}}}": {
+                    "count": histogram.count,
+                    "mean": round(histogram.sum / histogram.count, 4) if histogram.count else None,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99)
+                }
+                for (metric, labels), histogram in sorted(self._histograms.items())
+            }
+            counters = {
+                f"{metric}{{{','.join(f'{k}={v}' for k, v in labels)}}}": value
+                for (metric, labels), value in sorted(self._counters.items())
+            }
+        return {"histograms": histograms, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text, ready to serve from /metrics
+        """
+        lines: List[str] = []
+        with self._lock:
+            for metric, (_, _, help_text) in self.HISTOGRAMS.items():
+                series = [(labels, h) for (name, labels), h in sorted(self._histograms.items()) if name == metric]
+                if not series:
+                    continue
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in series:
+                    for le, count in histogram.cumulative():
+                        lines.append(f"{metric}_bucket{label_text(labels + (('le', le),))} {count}")
+                    lines.append(f"{metric}_sum{label_text(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{label_text(labels)} {histogram.count}")
+            for metric, help_text in (("gemini_attempts_total", "Gemini attempts by outcome"),
+                                      ("gemini_tokens_total", "Tokens reported by Gemini")):
+                series = [(labels, v) for (name, labels), v in sorted(self._counters.items()) if name == metric]
+                if not series:
+                    continue
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in series:
+                    lines.append(f"{metric}{label_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def label_text(labels: Sequence[Tuple[str, str]]) -> str:
+    """Format labels for the Prometheus text format, escaping their values."""
+    if not labels:
+        return ""
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class JSONLogSink:
+    """Writes every attempt event as one JSON log line."""
+
+    def __init__(self, logger_name: str = INSTRUMENTATION_LOG_NAME):
+        """
+        Initialize the sink.
+
+        Args:
+            logger_name: Logger the lines are written to, so they can be routed separately
+        """
+        self.logger = logging.getLogger(logger_name)
+
+    def __call__(self, event: AttemptEvent) -> None:
+        self.logger.info(json.dumps(event.to_dict(), separators=(",", ":")))
+
+
+def emit(hooks: Sequence[Hook], event: AttemptEvent) -> None:
+    """
+    Deliver an event to every hook; a failing hook never affects the call.
+
+    Args:
+        hooks: The hooks to call
+        event: The event to deliver
+    """
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as e:
+            logger.warning(f"Instrumentation hook {hook!r} failed: {str(e)}")
+
+
+_default_histogram: Optional[HistogramSink] = None
+_default_hooks: Optional[List[Hook]] = None
+_default_hooks_lock = threading.Lock()
+
+
+def get_default_hooks() -> List[Hook]:
+    """
+    Get the process-wide hooks built from INSTRUMENTATION_SINKS.
+
+    Returns:
+        The shared hooks ("histogram" and/or "json"); empty if none are configured
+    """
+    global _default_hooks, _default_histogram
+    with _default_hooks_lock:
+        if _default_hooks is None:
+            _default_hooks = []
+            for name in INSTRUMENTATION_SINKS:
+                if name in ("histogram", "prometheus"):
+                    if _default_histogram is None:
+                        _default_histogram = HistogramSink()
+                        _default_hooks.append(_default_histogram)
+                elif name == "json":
+                    _default_hooks.append(JSONLogSink())
+                else:
+                    logger.warning(f"Unknown instrumentation sink {name!r}; ignoring it")
+        return _default_hooks
+
+
+def get_default_histogram() -> Optional[HistogramSink]:
+    """
+    Get the process-wide histogram sink, which also backs the Prometheus exporter.
+
+    Returns:
+        The shared sink, or None if INSTRUMENTATION_SINKS does not include it
+    """
+    get_default_hooks()
+    return _default_histogram
@@ -0,0 +1,223 @@
+"""
+Key Pool module for ParadoxGPT.
+
+This module spreads Gemini calls across every configured API key, picking the
+least-loaded (or weighted round-robin) key for each attempt and skipping keys
+that are exhausted or failing until their cooldown expires.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+from config import (
+    ALL_API_KEYS, KEY_POOL_ENABLED, KEY_POOL_STRATEGY, KEY_POOL_FAILURE_THRESHOLD, KEY_POOL_COOLDOWN
+)
+from rate_limiter import get_rate_limiter
+from utils import hash_api_key
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Outcomes reported back to the pool when a key is released
+SUCCESS = "success"
+FAILURE = "failure"
+EXHAUSTED = "exhausted"
+SKIPPED = "skipped"
+
+
+class PooledKey:
+    """An API key plus the load and health bookkeeping the pool keeps for it."""
+
+    def __init__(self, api_key: str, weight: int = 1):
+        """
+        Initialize a pooled key.
+
+        Args:
+            api_key: The API key
+            weight: Relative share of traffic for weighted round-robin
+        """
+        self.api_key = api_key
+        self.key_id = hash_api_key(api_key)
+        self.weight = max(1, weight)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.current_weight = 0
+        self.calls = 0
+        self.failures = 0
+
+    def available(self, now: float) -> bool:
+        """Return True if the key is not cooling down."""
+        return self.cooldown_until <= now
+
+
+class APIKeyPool:
+    """Thread-safe pool that hands out API keys for individual calls."""
+
+    def __init__(self, api_keys: Sequence[str], strategy: str = KEY_POOL_STRATEGY,
+                 failure_threshold: int = KEY_POOL_FAILURE_THRESHOLD, cooldown: float = KEY_POOL_COOLDOWN,
+                 weights: Optional[Dict[str, int]] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            api_keys: The keys to spread calls over (duplicates and blanks are dropped)
+            strategy: "least_loaded" or "round_robin" (weighted)
+            failure_threshold: Consecutive failures before a key is benched
+            cooldown: Seconds a benched or exhausted key is skipped
+            weights: Optional weight per API key for round-robin
+        """
+        unique_keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not unique_keys:
+            raise ValueError("APIKeyPool needs at least one API key")
+
+        weights = weights or {}
+        self.keys: List[PooledKey] = [PooledKey(key, weights.get(key, 1)) for key in unique_keys]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _load(self, key: PooledKey) -> Tuple[float, float]:
+        """Score a key for least-loaded selection (lower is better)."""
+        load = key.in_flight / key.weight
+        limiter = get_rate_limiter(key.api_key)
+        if limiter is not None and limiter.requests is not None:
+            # Prefer keys with request budget left so callers do not queue
+            limiter_stats = limiter.stats()
+            load += max(0.0, 1.0 - limiter_stats.get("requests_available", 1.0))
+        # Ties go to the key that has served the fewest calls
+        return load, key.calls / key.weight
+
+    def acquire(self, exclude: Sequence[str] = ()) -> PooledKey:
+        """
+        Check out a key for one call.
+
+        Args:
+            exclude: Key ids to avoid (e.g. the key a previous attempt failed on)
+
+        Returns:
+            The chosen key; release() must be called when the call ends
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [key for key in self.keys if key.available(now) and key.key_id not in exclude]
+            if not candidates:
+                candidates = [key for key in self.keys if key.available(now)]
+            if not candidates:
+                # Everything is benched: use the key that recovers first rather than failing outright
+                candidates = [min(self.keys, key=lambda key: key.cooldown_until)]
+
+            if self.strategy == "round_robin":
+                # Smooth weighted round-robin
+                total = sum(key.weight for key in candidates)
+                for key in candidates:
+                    key.current_weight += key.weight
+                chosen = max(candidates, key=lambda key: key.current_weight)
+                chosen.current_weight -= total
+            else:
+                chosen = min(candidates, key=self._load)
+
+            chosen.in_flight += 1
+            chosen.calls += 1
+            return chosen
+
+    def release(self, key: PooledKey, outcome: str = SUCCESS) -> None:
+        """
+        Return a key and report how the call went.
+
+        Args:
+            key: The key from acquire()
+            outcome: SUCCESS, FAILURE, EXHAUSTED (quota/429), or SKIPPED (not used)
+        """
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            if outcome == SKIPPED:
+                return
+            if outcome == SUCCESS:
+                key.consecutive_failures = 0
+                return
+
+            key.failures += 1
+            key.consecutive_failures += 1
+            if outcome == EXHAUSTED or key.consecutive_failures >= self.failure_threshold:
+                key.cooldown_until = time.monotonic() + self.cooldown
+                logger.warning(f"Benching API key {key.key_id} for {self.cooldown:.0f}s ({outcome})")
+
+    @contextmanager
+    def lease(self, exclude: Sequence[str] = ()) -> Iterator[PooledKey]:
+        """
+        Context manager form of acquire/release; exceptions count as failures.
+
+        Args:
+            exclude: Key ids to avoid
+
+        Yields:
+            The chosen key
+        """
+        key = self.acquire(exclude)
+        try:
+            yield key
+        except Exception:
+            self.release(key, FAILURE)
+            raise
+        else:
+            self.release(key, SUCCESS)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per-key load and health.
+
+        Returns:
+            One dictionary per key (identified by hashed id only)
+        """
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "key_id": key.key_id,
+                    "in_flight": key.in_flight,
+                    "calls": key.calls,
+                    "failures": key.failures,
+                    "available": key.available(now),
+                    "cooldown_remaining": round(max(0.0, key.cooldown_until - now), 1)
+                }
+                for key in self.keys
+            ]
+
+    @classmethod
+    def from_config(cls) -> "APIKeyPool":
+        """Build a pool over every API key configured in the environment."""
+        return cls(ALL_API_KEYS)
+
+
+_default_pool: Optional[APIKeyPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_key_pool() -> Optional[APIKeyPool]:
+    """
+    Get the process-wide pool over all configured keys.
+
+    Returns:
+        The shared pool, or None if pooling is disabled or no keys are configured
+    """
+    global _default_pool
+    if not KEY_POOL_ENABLED:
+        return None
+
+    with _default_pool_lock:
+        if _default_pool is None and ALL_API_KEYS:
+            _default_pool = APIKeyPool.from_config()
+            logger.info(f"API key pool ready with {len(_default_pool)} keys ({_default_pool.strategy})")
+        return _default_pool
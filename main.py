@@ -11,9 +11,9 @@ import sys
 import threading
 from typing import Optional
 
-from orchestrator import ParadoxGPTOrchestrator
+from orchestrator import ParadoxGPTOrchestrator, MODES
 from utils import save_result_to_file
-from config import validate_api_keys
+from config import validate_api_keys, ORCHESTRATION_MODE
 
 # Configure logging
 logging.basicConfig(
@@ -61,6 +61,14 @@ def parse_arguments():
         help="Save the generated response to a file (default: False)"
     )
     
+    parser.add_argument(
+        "--mode", "-m",
+        choices=MODES,
+        default=ORCHESTRATION_MODE,
+        help=f"single: one conversational call; multi_agent: divide, think in parallel, combine; "
+             f"auto: pick per task (default: '{ORCHESTRATION_MODE}')"
+    )
+    
     return parser.parse_args()
 
 def get_task_from_file(file_path: str) -> Optional[str]:
@@ -94,7 +102,7 @@ def get_user_task():
     
     return user_input
 
-def process_task(task, orchestrator, output_dir, save_to_file=True):
+def process_task(task, orchestrator, output_dir, save_to_file=True, mode=None):
     """Process a single task and return the result."""
     try:
         # Process the task
@@ -125,7 +133,7 @@ def process_task(task, orchestrator, output_dir, save_to_file=True):
         
         try:
             # Process the task
-            result = orchestrator.process_task(task)
+            result = orchestrator.process_task(task, mode=mode)
         finally:
             # Stop the progress indicator thread
             stop_progress.set()
@@ -195,7 +203,7 @@ def main():
     
     # If a task was provided via command line, process it once and exit
     if initial_task:
-        result = process_task(initial_task, orchestrator, args.output, save_to_file=args.save)
+        result = process_task(initial_task, orchestrator, args.output, save_to_file=args.save, mode=args.mode)
         return 0 if result.get("success", False) else 1
     
     # Interactive mode with continuous loop
@@ -213,7 +221,7 @@ def main():
             return 0
         
         # Process the task
-        process_task(task, orchestrator, args.output, save_to_file=args.save)
+        process_task(task, orchestrator, args.output, save_to_file=args.save, mode=args.mode)
         
         # Simple prompt for the next task
         print("ParadoxGPT: Is there anything else I can help you with? (Type 'exit' to quit)")
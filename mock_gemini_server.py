@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Mock Gemini server for ParadoxGPT.
+
+A local stand-in for the Gemini REST API so the client, /api/chat and the
+agent pipeline can be load-tested without live keys. It speaks the
+generateContent, streamGenerateContent (SSE and JSON-array) and countTokens
+shapes plus the cachedContents (context cache) resource, and its latency distribution, error rate, 429 bursts and response
+sizes are configurable and reproducible with a seed.
+
+Usage:
+    python mock_gemini_server.py --port 8787 --latency-median 0.8 --error-rate 0.02
+
+Then point the app at it:
+    GEMINI_API_BASE_URL=http://127.0.0.1:8787/v1beta/models/gemini-2.0-flash:generateContent
+    GEMINI_SDK_ENDPOINT=http://127.0.0.1:8787
+    GEMINI_SDK_TRANSPORT=rest
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FILLER_WORDS = (
+    "the model streams a considered answer with code examples notes and clear structure "
+    "for every part of the request so the combined response reads naturally"
+).split()
+
+_PATH_PATTERN = re.compile(r"/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent|countTokens)$")
+_CACHE_PATH_PATTERN = re.compile(r"/(?P<name>cachedContents(?:/[^/:]+)?)$")
+_SUBTASK_COUNT_PATTERN = re.compile(
+    r"(?:into (?:exactly )?(\d+) (?:independent|logical|manageable)?\s*subtasks|NUMBER OF SUBTASKS:\s*(\d+))", re.I
+)
+
+
+class MockSettings:
+    """Behaviour knobs for the mock server."""
+
+    def __init__(self, latency_median: float = 0.5, latency_sigma: float = 0.4, latency_max: float = 30.0,
+                 ttfb_fraction: float = 0.3, chunks: int = 8, error_rate: float = 0.0, error_status: int = 503,
+                 burst_every: int = 0, burst_length: int = 0, retry_after: float = 1.0,
+                 response_chars: int = 1200, response_jitter: float = 0.3, seed: Optional[int] = None):
+        """
+        Initialize the settings.
+
+        Args:
+            latency_median: Median full-response latency in seconds (log-normal)
+            latency_sigma: Log-normal shape; 0 makes every call take the median
+            latency_max: Upper bound on a single call's latency
+            ttfb_fraction: Share of the latency spent before the first streamed chunk
+            chunks: Number of chunks a streamed response is split into
+            error_rate: Probability of answering with error_status
+            error_status: Status code used for random errors
+            burst_every: Start a 429 burst every N requests (0 disables)
+            burst_length: Number of consecutive requests rejected in each burst
+            retry_after: Retry-After / RetryInfo delay sent with 429s, in seconds
+            response_chars: Mean length of generated text
+            response_jitter: Relative spread of the generated text length
+            seed: Random seed for reproducible runs
+        """
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_max = latency_max
+        self.ttfb_fraction = ttfb_fraction
+        self.chunks = max(1, chunks)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.response_chars = response_chars
+        self.response_jitter = response_jitter
+        self.seed = seed
+
+
+class MockState:
+    """Shared random source and counters for one server."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.statuses: Counter = Counter()
+        self.methods: Counter = Counter()
+        self.keys: Counter = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        # cachedContents name -> (system instruction text, expiry in wall-clock seconds)
+        self.cached_contents: Dict[str, Tuple[str, float]] = {}
+
+    def plan(self) -> Tuple[int, float, int]:
+        """
+        Decide the fate of the next request.
+
+        Returns:
+            (status, latency seconds, response length in characters)
+        """
+        settings = self.settings
+        with self.lock:
+            self.requests += 1
+            index = self.requests
+            in_burst = (settings.burst_every and index > settings.burst_every
+                        and (index - 1) % settings.burst_every < settings.burst_length)
+            if in_burst:
+                status = 429
+            elif self.random.random() < settings.error_rate:
+                status = settings.error_status
+            else:
+                status = 200
+            latency = settings.latency_median * math.exp(self.random.gauss(0, settings.latency_sigma)) \
+                if settings.latency_sigma > 0 else settings.latency_median
+            spread = settings.response_chars * settings.response_jitter
+            length = max(1, int(self.random.uniform(settings.response_chars - spread, settings.response_chars + spread)))
+        return status, min(latency, settings.latency_max), length
+
+    def record(self, method: str, key: Optional[str], status: int, bytes_in: int, bytes_out: int,
+               prompt_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0) -> None:
+        with self.lock:
+            self.cached_tokens += cached_tokens
+            self.methods[method] += 1
+            self.statuses[status] += 1
+            self.keys[hashlib.sha256((key or "").encode("utf-8")).hexdigest()[:12]] += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "methods": dict(self.methods),
+                "statuses": {str(status): count for status, count in self.statuses.items()},
+                "keys": dict(self.keys),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_contents": len(self.cached_contents)
+            }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.statuses.clear()
+            self.methods.clear()
+            self.keys.clear()
+            self.bytes_in = self.bytes_out = 0
+            self.prompt_tokens = self.output_tokens = self.cached_tokens = 0
+
+
+def count_tokens(text: str) -> int:
+    """Token count the mock reports (about four characters per token)."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def request_text(body: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Pull the prompt text out of a generateContent request body.
+
+    Returns:
+        (system instruction text, contents text)
+    """
+    def parts_text(content: Any) -> str:
+        if not isinstance(content, dict):
+            return ""
+        return "".join(part.get("text", "") for part in content.get("parts", []) if isinstance(part, dict))
+
+    system = parts_text(body.get("systemInstruction") or body.get("system_instruction"))
+    contents = "\n".join(parts_text(content) for content in body.get("contents", []))
+    return system, contents
+
+
+def generate_text(prompt: str, length: int, json_output: bool = False) -> str:
+    """
+    Build a deterministic response for a prompt.
+
+    Divider-style prompts get a numbered subtask list (or, when JSON output
+    was requested, a {"subtasks": [...]} object) so the agent pipeline can run
+    end to end; everything else gets filler text of the planned size.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    if "Subtask 1:" in prompt:
+        match = _SUBTASK_COUNT_PATTERN.search(prompt)
+        count = int(match.group(1) or match.group(2)) if match else 10
+        if json_output:
+            return json.dumps({"subtasks": [
+                {"number": i, "title": f"Mock subtask {i}", "description": f"Mock subtask {i} for request {digest}"}
+                for i in range(1, count + 1)
+            ]})
+        return "\n".join(f"Subtask {i}: Mock subtask {i} for request {digest}" for i in range(1, count + 1))
+
+    words = [f"Mock response {digest}:"]
+    size = len(words[0])
+    index = 0
+    while size < length:
+        word = FILLER_WORDS[index % len(FILLER_WORDS)]
+        words.append(word)
+        size += len(word) + 1
+        index += 1
+    return " ".join(words)
+
+
+def response_json(text: str, prompt_tokens: int, finished: bool = True, cached_tokens: int = 0) -> Dict[str, Any]:
+    """Build a generateContent response (or one streamed chunk of it)."""
+    candidate: Dict[str, Any] = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": count_tokens(text),
+        "totalTokenCount": prompt_tokens + count_tokens(text)
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return {"candidates": [candidate], "usageMetadata": usage, "modelVersion": "mock"}
+
+
+def parse_ttl(value: Any, default: float = 3600.0) -> float:
+    """Parse a protobuf Duration string such as "300s"."""
+    if isinstance(value, str) and value.endswith("s"):
+        try:
+            return float(value[:-1])
+        except ValueError:
+            pass
+    return default
+
+
+def cached_content_json(name: str, system: str, expires_at: float) -> Dict[str, Any]:
+    """Build a cachedContents resource."""
+    return {
+        "name": name,
+        "model": "models/mock",
+        "expireTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expires_at)),
+        "usageMetadata": {"totalTokenCount": count_tokens(system)}
+    }
+
+
+def error_json(status: int, retry_after: float) -> Dict[str, Any]:
+    """Build a Google-style error body."""
+    error: Dict[str, Any] = {"code": status, "message": f"Mock error {status}", "status": "UNAVAILABLE"}
+    if status == 429:
+        error["status"] = "RESOURCE_EXHAUSTED"
+        error["details"] = [{
+            "@type": "type.googleapis.com/google.rpc.RetryInfo",
+            "retryDelay": f"{retry_after:g}s"
+        }]
+    return {"error": error}
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    """Request handler; the owning server carries the shared MockState."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> int:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            self._send_json(200, self.state.snapshot())
+        elif _CACHE_PATH_PATTERN.search(path):
+            self._cached_contents("GET", _CACHE_PATH_PATTERN.search(path).group("name"), {})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_DELETE(self):
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            self.state.reset()
+            self._send_json(200, {})
+        elif _CACHE_PATH_PATTERN.search(path):
+            self._cached_contents("DELETE", _CACHE_PATH_PATTERN.search(path).group("name"), {})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_PATCH(self):
+        path = urlsplit(self.path).path
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        match = _CACHE_PATH_PATTERN.search(path)
+        if match is None:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            body = {}
+        self._cached_contents("PATCH", match.group("name"), body)
+
+    def _cached_contents(self, verb: str, name: str, body: Dict[str, Any]) -> int:
+        """Create, read, extend or delete a context cache entry."""
+        state = self.state
+        now = time.time()
+        with state.lock:
+            if verb == "POST":
+                system, contents = request_text(body)
+                name = f"cachedContents/mock-{len(state.cached_contents) + 1}-" \
+                       f"{hashlib.sha256((system + contents).encode('utf-8')).hexdigest()[:8]}"
+                state.cached_contents[name] = (system + contents, now + parse_ttl(body.get("ttl")))
+            entry = state.cached_contents.get(name)
+            if entry is None or entry[1] <= now:
+                state.cached_contents.pop(name, None)
+                entry = None
+            elif verb == "PATCH":
+                entry = state.cached_contents[name] = (entry[0], now + parse_ttl(body.get("ttl")))
+            elif verb == "DELETE":
+                del state.cached_contents[name]
+        if entry is not None and verb == "DELETE":
+            return self._send_json(200, {})
+        if entry is None:
+            return self._send_json(404, {"error": {"code": 404, "message": f"{name} not found", "status": "NOT_FOUND"}})
+        return self._send_json(200, cached_content_json(name, entry[0], entry[1]))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        key = self.headers.get("x-goog-api-key") or (query.get("key") or [None])[0]
+        if url.path.endswith("/cachedContents"):
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                body = {}
+            sent = self._cached_contents("POST", "cachedContents", body)
+            self.state.record("createCachedContent", key, 200, len(raw), sent)
+            return
+        match = _PATH_PATTERN.search(url.path)
+        if match is None:
+            sent = self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {url.path}"}})
+            self.state.record("unknown", key, 404, len(raw), sent)
+            return
+        method = match.group("method")
+
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            sent = self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON"}})
+            self.state.record(method, key, 400, len(raw), sent)
+            return
+        if not key:
+            sent = self._send_json(403, {"error": {"code": 403, "message": "Missing API key"}})
+            self.state.record(method, key, 403, len(raw), sent)
+            return
+
+        system, contents = request_text(body)
+        cached_tokens = 0
+        cached_name = body.get("cachedContent") or body.get("cached_content")
+        if cached_name:
+            with self.state.lock:
+                entry = self.state.cached_contents.get(cached_name)
+            if entry is None or entry[1] <= time.time():
+                sent = self._send_json(404, {"error": {"code": 404, "message": f"{cached_name} not found",
+                                                       "status": "NOT_FOUND"}})
+                self.state.record(method, key, 404, len(raw), sent)
+                return
+            system = entry[0]
+            cached_tokens = count_tokens(system)
+        prompt_tokens = count_tokens(system) + count_tokens(contents)
+
+        if method == "countTokens":
+            sent = self._send_json(200, {"totalTokens": prompt_tokens})
+            self.state.record(method, key, 200, len(raw), sent)
+            return
+
+        status, latency, length = self.state.plan()
+        settings = self.state.settings
+        if status != 200:
+            # Errors come back quickly, like real quota and overload rejections
+            time.sleep(min(latency, 0.05))
+            headers = {"Retry-After": f"{settings.retry_after:g}"} if status in (429, 503) else None
+            sent = self._send_json(status, error_json(status, settings.retry_after), headers)
+            self.state.record(method, key, status, len(raw), sent)
+            return
+
+        json_output = (body.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+        text = generate_text(system + "\n" + contents, length, json_output)
+        if method == "generateContent":
+            time.sleep(latency)
+            sent = self._send_json(200, response_json(text, prompt_tokens, cached_tokens=cached_tokens))
+            self.state.record(method, key, 200, len(raw), sent, prompt_tokens, count_tokens(text), cached_tokens)
+            return
+
+        sent = self._stream(text, prompt_tokens, latency, sse=query.get("alt") == ["sse"], cached_tokens=cached_tokens)
+        self.state.record(method, key, 200, len(raw), sent, prompt_tokens, count_tokens(text), cached_tokens)
+
+    def _stream(self, text: str, prompt_tokens: int, latency: float, sse: bool, cached_tokens: int = 0) -> int:
+        """Send text in chunks, as SSE events or as a streamed JSON array."""
+        settings = self.state.settings
+        size = max(1, math.ceil(len(text) / settings.chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        ttfb = latency * settings.ttfb_fraction
+        interval = (latency - ttfb) / max(1, len(pieces) - 1)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json; charset=UTF-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        sent = 0
+        time.sleep(ttfb)
+        for index, piece in enumerate(pieces):
+            payload = json.dumps(response_json(piece, prompt_tokens, finished=index == len(pieces) - 1,
+                                               cached_tokens=cached_tokens))
+            if sse:
+                data = f"data: {payload}\r\n\r\n".encode("utf-8")
+            else:
+                data = (("[" if index == 0 else ",\r\n") + payload + ("]" if index == len(pieces) - 1 else "")).encode("utf-8")
+            try:
+                self._write_chunk(data)
+            except (BrokenPipeError, ConnectionResetError):
+                return sent
+            sent += len(data)
+            if index < len(pieces) - 1:
+                time.sleep(interval)
+        self.wfile.write(b"0\r\n\r\n")
+        return sent
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the mock's shared state."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], settings: MockSettings):
+        super().__init__(address, MockGeminiHandler)
+        self.state = MockState(settings)
+
+    @property
+    def origin(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, model: str = "gemini-2.0-flash") -> str:
+        """The generateContent URL to use as GEMINI_API_BASE_URL."""
+        return f"{self.origin}/v1beta/models/{model}:generateContent"
+
+
+def start_mock_server(settings: Optional[MockSettings] = None, host: str = "127.0.0.1",
+                      port: int = 0) -> MockGeminiServer:
+    """
+    Start a mock server on a background thread (for benchmarks and scripts).
+
+    Args:
+        settings: Behaviour knobs (defaults to MockSettings())
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = MockGeminiServer((host, port), settings or MockSettings())
+    threading.Thread(target=server.serve_forever, name="mock-gemini", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    defaults = MockSettings()
+    parser = argparse.ArgumentParser(description="Mock Gemini API server for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8787, help="Port to listen on (default: 8787)")
+    parser.add_argument("--latency-median", type=float, default=defaults.latency_median,
+                        help="Median response latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma,
+                        help="Log-normal spread of the latency (0 = fixed)")
+    parser.add_argument("--latency-max", type=float, default=defaults.latency_max,
+                        help="Cap on a single response's latency in seconds")
+    parser.add_argument("--ttfb-fraction", type=float, default=defaults.ttfb_fraction,
+                        help="Share of a streamed response's latency before the first chunk")
+    parser.add_argument("--chunks", type=int, default=defaults.chunks, help="Chunks per streamed response")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Probability of a random error response")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status,
+                        help="Status code for random errors")
+    parser.add_argument("--burst-every", type=int, default=defaults.burst_every,
+                        help="Start a 429 burst every N requests (0 disables)")
+    parser.add_argument("--burst-length", type=int, default=defaults.burst_length,
+                        help="Requests rejected with 429 in each burst")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after,
+                        help="Retry-After seconds sent with 429/503 responses")
+    parser.add_argument("--response-chars", type=int, default=defaults.response_chars,
+                        help="Mean length of generated text")
+    parser.add_argument("--response-jitter", type=float, default=defaults.response_jitter,
+                        help="Relative spread of the generated text length")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma, latency_max=args.latency_max,
+        ttfb_fraction=args.ttfb_fraction, chunks=args.chunks, error_rate=args.error_rate,
+        error_status=args.error_status, burst_every=args.burst_every, burst_length=args.burst_length,
+        retry_after=args.retry_after, response_chars=args.response_chars,
+        response_jitter=args.response_jitter, seed=args.seed
+    )
+    server = MockGeminiServer((args.host, args.port), settings)
+    logger.info(f"Mock Gemini server listening on {server.origin}")
+    logger.info(f"GEMINI_API_BASE_URL={server.base_url()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
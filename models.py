@@ -5,11 +5,17 @@ This module defines the agent classes and their behaviors for the
 ParadoxGPT distributed multi-agent code generation system.
 """
 
+import re
+import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Iterator, Optional
 from abc import ABC, abstractmethod
 
-from api_client import GeminiAPIClient
+from api_client import GeminiAPIClient, StreamFailedError, StreamInterruptedError
+from config import MAX_PROMPT_TOKENS, NUM_THINKERS, DIVIDER_JSON_OUTPUT
+from key_pool import APIKeyPool
+from retry_policy import Deadline
+from token_estimator import get_default_estimator
 import prompts
 
 # Configure logging
@@ -19,21 +25,291 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# "Subtask 3:", "**Task 3:**", "Step 3.", "Part 3)" or "Component 3 -" at the start of a line
+SUBTASK_MARKER_PATTERN = re.compile(
+    r"^[ \t>*_#]*(?:sub)?(?:task|step|part|component)[ \t]+(\d{1,4})[ \t]*[:.)\-][ \t*_]*(.*)$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "3.", "3)" or "#3" numbered lines, for lists without subtask markers
+NUMBERED_LINE_PATTERN = re.compile(r"^[ \t*_]*#?(\d{1,4})[.)]?[ \t]+(.*)$", re.MULTILINE)
+
+# Fenced code blocks, whose contents are never subtask headers
+CODE_FENCE_PATTERN = re.compile(r"^[ \t]*```.*?^[ \t]*```[^\n]*$", re.MULTILINE | re.DOTALL)
+
+# A ```json fence around structured output
+JSON_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+PARAGRAPH_SPLIT_PATTERN = re.compile(r"\n[ \t]*\n")
+
+# A line opening or closing a fenced code block
+FENCE_LINE_PATTERN = re.compile(r"^[ \t]*```")
+
+# The characters that change nesting while scanning streamed JSON
+JSON_STRUCTURE_PATTERN = re.compile(r'[{}\[\]"\\]')
+
+
+def _item_subtask(item: Any, number: int) -> Optional[Dict[str, str]]:
+    """Build a subtask from one JSON item (an object or a bare string); None if it has no title."""
+    if isinstance(item, str):
+        title = description = item.strip()
+    elif isinstance(item, dict):
+        title = str(item.get("title") or item.get("description") or "").strip()
+        description = str(item.get("description") or title).strip()
+    else:
+        return None
+    if not title:
+        return None
+    full_text = f"Subtask {number}: {title}" if description == title else f"Subtask {number}: {title}\n{description}"
+    return {"number": number, "title": title, "description": description, "full_text": full_text}
+
+
+def _block_subtask(number: int, title: str, lines: List[str], full_text: str) -> Dict[str, str]:
+    """Build a subtask from a free-text block: its header's title and the lines below it."""
+    title = title.strip(" *_")
+    # Bullet points stay in full_text only; other detail lines extend the description
+    details = [
+        line for line in (raw.strip() for raw in lines)
+        if line and not line.startswith(("-", "*", "\u2022"))
+    ]
+    return {"number": number, "title": title, "description": " ".join([title] + details), "full_text": full_text}
+
+
+def missing_subtasks_note(missing: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Build the prompt section telling a combiner which subtasks have no solution.
+
+    Args:
+        missing: {number, title, reason} entries, in subtask order
+
+    Returns:
+        The section to append to the user prompt, or "" if nothing is missing
+    """
+    if not missing:
+        return ""
+    return prompts.MISSING_SUBTASKS_PROMPT.format(missing_subtasks="\n".join(
+        f"Subtask {entry['number']}: {entry['title']} ({entry['reason']})" for entry in missing
+    ))
+
+
+class SubtaskStreamParser:
+    """
+    Incremental parser for a divider response that arrives in chunks.
+
+    feed() returns the subtasks completed by each chunk: a JSON item as soon
+    as its closing brace arrives, a free-text block as soon as the next header
+    line starts (so the last block only at close()). The same header rules as
+    DividerAgent._scan_subtasks apply: no headers inside code fences, numbers
+    in sequence, nothing indented deeper than the first header.
+    """
+
+    def __init__(self, num_subtasks: int = NUM_THINKERS):
+        """
+        Initialize the parser.
+
+        Args:
+            num_subtasks: The most subtasks to emit; later ones are ignored
+        """
+        self.num_subtasks = num_subtasks
+        self.emitted = 0
+        self._chunks: List[str] = []
+        self._mode: Optional[str] = None
+        # JSON scanning state
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        # Free-text scanning state
+        self._partial = ""
+        self._pattern: Optional["re.Pattern[str]"] = None
+        self._in_fence = False
+        self._header: Optional["re.Match[str]"] = None
+        self._indent = 0
+        self._lines: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        """
+        Add a chunk of the response.
+
+        Args:
+            chunk: The next piece of streamed text
+
+        Returns:
+            The subtasks completed by this chunk, numbered in order
+        """
+        self._chunks.append(chunk)
+        if self._mode is None:
+            self._buffer += chunk
+            stripped = self._buffer.lstrip()
+            if stripped.startswith("```"):
+                # Decide once the fence line and the first character after it arrived
+                first_line, newline, rest = stripped.partition("\n")
+                if not newline or not rest.strip():
+                    return []
+                stripped = rest.lstrip()
+            elif "```".startswith(stripped):
+                # Nothing yet, or possibly the start of a fence
+                return []
+            self._mode = "json" if stripped.startswith(("{", "[")) else "text"
+            chunk, self._buffer = self._buffer, ""
+        if self._mode == "json":
+            self._buffer += chunk
+            return self._scan_json()
+        return self._scan_lines(chunk)
+
+    def close(self) -> List[Dict[str, str]]:
+        """
+        Finish the response.
+
+        Returns:
+            The subtasks completed by the end of the text (the last free-text block)
+        """
+        if self._mode != "text":
+            return []
+        subtasks = self._scan_lines("", final=True)
+        subtasks += self._end_block()
+        return subtasks
+
+    def _emit(self, subtask: Optional[Dict[str, str]]) -> List[Dict[str, str]]:
+        if subtask is None or self.emitted >= self.num_subtasks:
+            return []
+        self.emitted += 1
+        return [subtask]
+
+    def _scan_json(self) -> List[Dict[str, str]]:
+        """Advance through the new JSON text, emitting every item of the subtasks array that closed."""
+        subtasks: List[Dict[str, str]] = []
+        buffer = self._buffer
+        while True:
+            match = JSON_STRUCTURE_PATTERN.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                break
+            char, index = match.group(), match.start()
+            if self._in_string:
+                if char == "\\":
+                    if index + 1 >= len(buffer):
+                        # The escaped character has not arrived yet
+                        self._pos = index
+                        break
+                    self._pos = index + 2
+                    continue
+                if char == '"':
+                    self._in_string = False
+                self._pos = index + 1
+                continue
+
+            self._pos = index + 1
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = index
+            elif char in "}]":
+                if char == "}" and self._item_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        item = json.loads(buffer[self._item_start:index + 1])
+                    except ValueError:
+                        logger.warning("Skipping a streamed subtask that is not valid JSON")
+                        item = None
+                    subtasks += self._emit(_item_subtask(item, self.emitted + 1))
+                    self._item_start = None
+                self._depth -= 1
+        return subtasks
+
+    def _scan_lines(self, chunk: str, final: bool = False) -> List[Dict[str, str]]:
+        """Split the new text into complete lines and run them through the header rules."""
+        lines = (self._partial + chunk).split("\n")
+        self._partial = "" if final else lines.pop()
+        subtasks: List[Dict[str, str]] = []
+        for line in lines:
+            if FENCE_LINE_PATTERN.match(line):
+                self._in_fence = not self._in_fence
+            elif not self._in_fence:
+                match = self._match_header(line)
+                if match is not None:
+                    subtasks += self._end_block()
+                    self._header = match
+                    continue
+            if self._header is not None:
+                self._lines.append(line)
+        return subtasks
+
+    def _match_header(self, line: str) -> Optional["re.Match[str]"]:
+        if self._pattern is None:
+            for pattern in (SUBTASK_MARKER_PATTERN, NUMBERED_LINE_PATTERN):
+                match = pattern.match(line)
+                if match is not None:
+                    self._pattern = pattern
+                    self._indent = match.start(1)
+                    return match
+            return None
+        match = self._pattern.match(line)
+        if match is None or match.start(1) > self._indent:
+            return None
+        if self._header is not None and int(match.group(1)) != int(self._header.group(1)) + 1:
+            return None
+        return match
+
+    def _end_block(self) -> List[Dict[str, str]]:
+        """Emit the block under the current header, if any."""
+        if self._header is None:
+            return []
+        header, lines = self._header, self._lines
+        self._header, self._lines = None, []
+        full_text = "\n".join([header.group(0)] + lines).strip()
+        return self._emit(_block_subtask(self.emitted + 1, header.group(2), lines, full_text))
+
+
 class Agent(ABC):
     """Base abstract class for all agents in the system."""
 
-    def __init__(self, api_key: str, name: str):
+    def __init__(self, api_key: str, name: str, key_pool: Optional[APIKeyPool] = None,
+                 generation_config: Optional[Dict[str, Any]] = None):
         """
         Initialize an agent.
 
         Args:
             api_key: The API key for this agent
             name: The name of this agent
+            key_pool: Optional pool to draw keys from instead of using api_key alone
+            generation_config: Extra generationConfig fields for every call (e.g. a response schema)
         """
         self.name = name
-        self.api_client = GeminiAPIClient(api_key, name)
+        self.api_client = GeminiAPIClient(api_key, name, key_pool=key_pool, generation_config=generation_config)
         logger.info(f"Initialized agent: {name}")
 
+    def fit_to_prompt(self, render: Callable[[List[str]], str], parts: List[str],
+                      system_instruction: str = "") -> List[str]:
+        """
+        Trim texts that will be pasted into a prompt so the request fits MAX_PROMPT_TOKENS.
+
+        Args:
+            render: Builds the complete user prompt (headers, notes and all) from the parts
+            parts: The texts sharing what is left of the budget
+            system_instruction: The system instruction sent alongside, which counts too
+
+        Returns:
+            The parts, with the largest trimmed first if they do not fit
+        """
+        estimator = get_default_estimator()
+        # Render with every part left empty to learn the fixed overhead, per-part headers included
+        overhead = estimator.estimate(render([""] * len(parts))) + estimator.estimate(system_instruction)
+        fitted = estimator.fit(parts, MAX_PROMPT_TOKENS - overhead)
+        if fitted != parts:
+            logger.warning(f"[{self.name}] Trimmed inputs to keep the prompt within {MAX_PROMPT_TOKENS} tokens")
+        return fitted
+
     @abstractmethod
     def process(self, input_data: Any) -> Any:
         """
@@ -53,243 +329,219 @@ class DividerAgent(Agent):
     Task Divider Agent that splits a user request into subtasks.
     """
 
-    def __init__(self, api_key: str):
-        """Initialize the Divider Agent."""
-        super().__init__(api_key, "Task Divider")
+    def __init__(self, api_key: str, key_pool: Optional[APIKeyPool] = None):
+        """Initialize the Divider Agent, asking for schema-constrained JSON when DIVIDER_JSON_OUTPUT is set."""
+        generation_config = {
+            "responseMimeType": "application/json",
+            "responseSchema": prompts.DIVIDER_RESPONSE_SCHEMA
+        } if DIVIDER_JSON_OUTPUT else None
+        super().__init__(api_key, "Task Divider", key_pool, generation_config)
 
-    def process(self, user_task: str) -> List[Dict[str, str]]:
+    def process(self, user_task: str, deadline: Optional[Deadline] = None,
+                num_subtasks: int = NUM_THINKERS) -> List[Dict[str, str]]:
         """
-        Divide the user task into 10 subtasks.
+        Divide the user task into subtasks.
 
         Args:
             user_task: The full user request
+            deadline: When the pipeline needs an answer by
+            num_subtasks: How many subtasks to ask for (at most this many are returned)
 
         Returns:
-            A list of subtask dictionaries
+            A list of subtask dictionaries; shorter than num_subtasks if the
+            divider found fewer, never padded
         """
-        logger.info(f"[{self.name}] Dividing task into subtasks")
+        logger.info(f"[{self.name}] Dividing task into {num_subtasks} subtasks")
 
         # Format the prompt with the user task
-        prompt = prompts.DIVIDER_PROMPT.format(user_task=user_task)
+        prompt = prompts.DIVIDER_USER_PROMPT.format(user_task=user_task, num_subtasks=num_subtasks)
 
         # Generate the subtasks
-        response = self.api_client.generate_content(prompt)
+        response = self.api_client.generate_content(prompt, deadline=deadline,
+                                                    system_instruction=prompts.DIVIDER_SYSTEM_PROMPT)
 
         if not response:
             logger.error(f"[{self.name}] Failed to generate subtasks")
             return []
 
         # Parse the response into subtasks
-        subtasks = self._parse_subtasks(response)
+        subtasks = self._parse_subtasks(response, num_subtasks)
 
         logger.info(f"[{self.name}] Successfully divided task into {len(subtasks)} subtasks")
         return subtasks
 
-    def _parse_subtasks(self, response: str) -> List[Dict[str, str]]:
+    def process_stream(self, user_task: str, deadline: Optional[Deadline] = None,
+                       num_subtasks: int = NUM_THINKERS) -> Iterator[Dict[str, str]]:
+        """
+        Divide the user task into subtasks, yielding each one as soon as its block is complete.
+
+        The response is streamed over the client's configured transports and
+        parsed incrementally, so callers can start work on the first subtasks
+        while the divider is still writing the rest. If the stream yields no
+        recognisable blocks, the full text is parsed as process() would, and
+        only a stream that completed empty falls back to the non-streaming
+        call. A stream that failed has already used up its retries, so it
+        yields nothing rather than starting a second retry cycle.
+
+        Args:
+            user_task: The full user request
+            deadline: When the pipeline needs an answer by
+            num_subtasks: How many subtasks to ask for (at most this many are yielded)
+
+        Yields:
+            Subtask dictionaries, numbered in order
+        """
+        logger.info(f"[{self.name}] Streaming division of task into {num_subtasks} subtasks")
+        prompt = prompts.DIVIDER_USER_PROMPT.format(user_task=user_task, num_subtasks=num_subtasks)
+        parser = SubtaskStreamParser(num_subtasks)
+
+        try:
+            for chunk in self.api_client.stream_content(prompt, deadline=deadline,
+                                                        system_instruction=prompts.DIVIDER_SYSTEM_PROMPT):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        except StreamFailedError as e:
+            logger.error(f"[{self.name}] Failed to stream subtasks: {str(e)}")
+            return
+        except StreamInterruptedError as e:
+            # Subtasks already handed out stand; the rest are lost with the stream
+            logger.error(f"[{self.name}] Stream broke after {parser.emitted} subtasks: {str(e)}")
+            return
+
+        if parser.emitted:
+            if parser.emitted != num_subtasks:
+                logger.warning(f"[{self.name}] Expected {num_subtasks} subtasks, but got {parser.emitted}")
+            logger.info(f"[{self.name}] Successfully streamed {parser.emitted} subtasks")
+            return
+        if not parser.text:
+            logger.warning(f"[{self.name}] Stream returned nothing; retrying without streaming")
+            yield from self.process(user_task, deadline=deadline, num_subtasks=num_subtasks)
+            return
+        yield from self._parse_subtasks(parser.text, num_subtasks)
+
+    def _parse_subtasks(self, response: str, num_subtasks: int = NUM_THINKERS) -> List[Dict[str, str]]:
         """
         Parse the response text into structured subtasks.
 
+        JSON output (requested through the response schema) is decoded in one
+        pass; free text is scanned once with a compiled pattern for
+        "Subtask N:" markers, then for numbered lines, and finally split into
+        paragraphs if it has no markers at all.
+
         Args:
             response: The raw text response from the API
+            num_subtasks: The number of subtasks asked for; extras are dropped
 
         Returns:
             A list of subtask dictionaries
         """
-        subtasks = []
-        current_subtask = None
-
         # Log the raw response for debugging
         logger.debug(f"[{self.name}] Raw response from API: {response}")
 
-        # Try to detect if the response is in a different format
-        if "Subtask 1:" in response or "SUBTASK 1:" in response:
-            # Alternative parsing for "Subtask N:" format
-            return self._parse_subtasks_alternative(response)
+        subtasks = self._parse_json_subtasks(response)
+        if subtasks is None:
+            subtasks = (self._scan_subtasks(response, SUBTASK_MARKER_PATTERN)
+                        or self._scan_subtasks(response, NUMBERED_LINE_PATTERN)
+                        or self._split_paragraphs(response, num_subtasks))
 
-        # Simple parsing logic - can be improved for more robust parsing
-        lines = response.strip().split('\n')
+        # Fewer subtasks than asked for means fewer thinker calls, never filler
+        if len(subtasks) != num_subtasks:
+            logger.warning(f"[{self.name}] Expected {num_subtasks} subtasks, but got {len(subtasks)}")
+        return subtasks[:num_subtasks]
 
-        for line in lines:
-            line = line.strip()
-
-            # More flexible pattern matching for numbered items
-            # Match patterns like "1.", "1)", "Subtask 1:", etc.
-            subtask_match = False
-            subtask_number = None
-
-            # Check for numbered patterns
-            for i in range(1, 11):
-                patterns = [
-                    f"{i}.", f"{i})", f"Subtask {i}:", f"SUBTASK {i}:",
-                    f"Task {i}:", f"TASK {i}:", f"#{i}", f"Step {i}:"
-                ]
-                for pattern in patterns:
-                    if line.startswith(pattern):
-                        subtask_match = True
-                        subtask_number = i
-                        subtask_title = line[len(pattern):].strip()
-                        break
-                if subtask_match:
-                    break
-
-            if subtask_match and subtask_number:
-                # If we were building a previous subtask, add it to our list
-                if current_subtask:
-                    subtasks.append(current_subtask)
-
-                # Start a new subtask
-                current_subtask = {
-                    "number": subtask_number,
-                    "title": subtask_title,
-                    "description": subtask_title,  # Initialize with title, will be updated
-                    "full_text": line
-                }
-            elif current_subtask:
-                # Add this line to the current subtask's full text
-                current_subtask["full_text"] += "\n" + line
-
-                # Update the description to include more details
-                if not line.startswith(('-', '*', '•')):
-                    current_subtask["description"] += " " + line
-
-        # Add the last subtask if there is one
-        if current_subtask:
-            subtasks.append(current_subtask)
-
-        # If we couldn't parse any subtasks with the standard method, try the alternative method
-        if not subtasks:
-            logger.warning(f"[{self.name}] Could not parse subtasks with standard method, trying alternative method")
-            return self._parse_subtasks_alternative(response)
-
-        # Ensure we have exactly 10 subtasks
-        if len(subtasks) != 10:
-            logger.warning(f"[{self.name}] Expected 10 subtasks, but got {len(subtasks)}")
-
-            # If we have fewer than 10, pad with empty subtasks
-            while len(subtasks) < 10:
-                subtask_number = len(subtasks) + 1
-                subtasks.append({
-                    "number": subtask_number,
-                    "title": f"Subtask {subtask_number}",
-                    "description": f"Generated subtask {subtask_number}",
-                    "full_text": f"{subtask_number}. Generated subtask {subtask_number}"
-                })
-
-            # If we have more than 10, truncate
-            if len(subtasks) > 10:
-                subtasks = subtasks[:10]
+    def _parse_json_subtasks(self, response: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Decode a {"subtasks": [...]} response (or a bare list).
+
+        Args:
+            response: The raw text response from the API
 
+        Returns:
+            The subtasks, or None if the response is not JSON of that shape
+        """
+        text = JSON_FENCE_PATTERN.sub("", response).strip()
+        if not text.startswith(("{", "[")):
+            return None
+        try:
+            data = json.loads(text)
+        except ValueError:
+            logger.warning(f"[{self.name}] Response looked like JSON but did not parse; scanning it as text")
+            return None
+        items = data.get("subtasks") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return None
+
+        subtasks = []
+        for item in items:
+            subtask = _item_subtask(item, len(subtasks) + 1)
+            if subtask is not None:
+                subtasks.append(subtask)
         return subtasks
 
-    def _parse_subtasks_alternative(self, response: str) -> List[Dict[str, str]]:
+    def _scan_subtasks(self, response: str, pattern: "re.Pattern[str]") -> List[Dict[str, str]]:
         """
-        Alternative parsing method for different response formats.
+        Split free text at the header lines a pattern finds, in a single pass.
+
+        Headers inside fenced code blocks are ignored, numbers must run in
+        sequence and headers indented deeper than the first one are skipped, so
+        a nested "1." list does not start a new subtask.
 
         Args:
             response: The raw text response from the API
+            pattern: SUBTASK_MARKER_PATTERN or NUMBERED_LINE_PATTERN
 
         Returns:
-            A list of subtask dictionaries
+            The subtasks, empty if the pattern found no headers
         """
+        fences = [match.span() for match in CODE_FENCE_PATTERN.finditer(response)]
+        headers = []
+        fence = 0
+        indent = 0
+        for match in pattern.finditer(response):
+            while fence < len(fences) and fences[fence][1] <= match.start():
+                fence += 1
+            if fence < len(fences) and fences[fence][0] <= match.start():
+                continue
+            if headers and (int(match.group(1)) != int(headers[-1].group(1)) + 1
+                            or match.start(1) - match.start() > indent):
+                continue
+            if not headers:
+                indent = match.start(1) - match.start()
+            headers.append(match)
+
         subtasks = []
+        for index, match in enumerate(headers):
+            end = headers[index + 1].start() if index + 1 < len(headers) else len(response)
+            subtasks.append(_block_subtask(
+                len(subtasks) + 1, match.group(2), response[match.end():end].splitlines(),
+                response[match.start():end].strip()
+            ))
+        return subtasks
 
-        # Try to split the response into 10 equal parts if all else fails
-        if "```" in response:
-            # Handle code blocks by removing them temporarily
-            code_blocks = []
-            response_without_code = ""
-            in_code_block = False
-            code_block = ""
-
-            for line in response.split('\n'):
-                if line.strip().startswith("```"):
-                    if in_code_block:
-                        code_blocks.append(code_block)
-                        code_block = ""
-                        in_code_block = False
-                    else:
-                        in_code_block = True
-                elif in_code_block:
-                    code_block += line + "\n"
-                else:
-                    response_without_code += line + "\n"
-
-            response = response_without_code
-
-        # Try to find subtask markers
-        markers = [
-            "Subtask", "SUBTASK", "Task", "TASK", "Step", "STEP",
-            "Part", "PART", "Component", "COMPONENT"
-        ]
-
-        for marker in markers:
-            # Try to find sections like "Subtask 1:", "Task 2:", etc.
-            sections = []
-            for i in range(1, 11):
-                pattern = f"{marker} {i}:"
-                if pattern in response:
-                    start_idx = response.find(pattern)
-                    # Find the start of the next section or the end of the text
-                    next_pattern = f"{marker} {i+1}:"
-                    end_idx = response.find(next_pattern) if next_pattern in response else len(response)
-
-                    section_text = response[start_idx:end_idx].strip()
-                    sections.append((i, section_text))
-
-            if len(sections) >= 5:  # If we found at least half of the expected sections
-                for number, text in sections:
-                    title = text.split('\n')[0].replace(f"{marker} {number}:", "").strip()
-                    subtasks.append({
-                        "number": number,
-                        "title": title,
-                        "description": title,
-                        "full_text": text
-                    })
-                break
+    def _split_paragraphs(self, response: str, num_subtasks: int) -> List[Dict[str, str]]:
+        """
+        Use the response's paragraphs as subtasks when it has no markers at all.
 
-        # If we still don't have enough subtasks, create artificial ones
-        if len(subtasks) < 10:
-            # Split the response into chunks
-            chunks = response.split('\n\n')
-            chunk_index = 0
-
-            while len(subtasks) < 10 and chunk_index < len(chunks):
-                chunk = chunks[chunk_index].strip()
-                if chunk and len(chunk) > 10:  # Only use non-empty, substantial chunks
-                    subtask_number = len(subtasks) + 1
-                    title = chunk.split('\n')[0][:50]  # Use first line as title, truncate if needed
-
-                    # Check if this chunk is already part of an existing subtask
-                    already_included = False
-                    for subtask in subtasks:
-                        if chunk in subtask["full_text"]:
-                            already_included = True
-                            break
-
-                    if not already_included:
-                        subtasks.append({
-                            "number": subtask_number,
-                            "title": title,
-                            "description": title,
-                            "full_text": chunk
-                        })
-
-                chunk_index += 1
-
-        # If we still don't have 10 subtasks, create generic ones
-        while len(subtasks) < 10:
-            subtask_number = len(subtasks) + 1
-            subtasks.append({
-                "number": subtask_number,
-                "title": f"Subtask {subtask_number}",
-                "description": f"Generated subtask {subtask_number}",
-                "full_text": f"Subtask {subtask_number}: Generated subtask {subtask_number}"
-            })
-
-        # If we have more than 10, truncate
-        if len(subtasks) > 10:
-            subtasks = subtasks[:10]
+        Args:
+            response: The raw text response from the API
+            num_subtasks: The most paragraphs to take
 
+        Returns:
+            Up to num_subtasks subtasks, one per distinct substantial paragraph
+        """
+        logger.warning(f"[{self.name}] No subtask markers found; splitting the response into paragraphs")
+        text = CODE_FENCE_PATTERN.sub("", response)
+        subtasks = []
+        seen = set()
+        for chunk in PARAGRAPH_SPLIT_PATTERN.split(text):
+            chunk = chunk.strip()
+            if len(chunk) <= 10 or chunk in seen:
+                continue
+            seen.add(chunk)
+            title = chunk.split("\n", 1)[0][:50]
+            subtasks.append({"number": len(subtasks) + 1, "title": title, "description": title, "full_text": chunk})
+            if len(subtasks) == num_subtasks:
+                break
         return subtasks
 
 
@@ -298,24 +550,27 @@ class ThinkerAgent(Agent):
     Thinker Agent that solves a specific subtask.
     """
 
-    def __init__(self, api_key: str, thinker_id: int):
+    def __init__(self, api_key: str, thinker_id: int, key_pool: Optional[APIKeyPool] = None):
         """
         Initialize a Thinker Agent.
 
         Args:
             api_key: The API key for this agent
             thinker_id: The ID of this thinker (1-10)
+            key_pool: Optional pool to draw keys from
         """
-        super().__init__(api_key, f"Thinker_{thinker_id}")
+        super().__init__(api_key, f"Thinker_{thinker_id}", key_pool)
         self.thinker_id = thinker_id
 
-    def process(self, subtask: Dict[str, str], temperature: float = 0.7) -> Dict[str, Any]:
+    def process(self, subtask: Dict[str, str], temperature: float = 0.7,
+                deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Solve the assigned subtask.
 
         Args:
             subtask: The subtask to solve
             temperature: Controls creativity level (0.1-1.0)
+            deadline: When the pipeline needs an answer by
 
         Returns:
             A dictionary containing the solution and metadata
@@ -323,20 +578,24 @@ class ThinkerAgent(Agent):
         logger.info(f"[{self.name}] Processing subtask {subtask['number']}: {subtask['title']}")
 
         # Format the prompt with the subtask
-        prompt = prompts.THINKER_PROMPT.format(
+        prompt = prompts.THINKER_USER_PROMPT.format(
             subtask=subtask['full_text'],
             subtask_number=subtask['number']
         )
 
         # Generate the solution with the specified temperature
-        solution = self.api_client.generate_content(prompt, temperature=temperature)
+        solution = self.api_client.generate_content(
+            prompt, temperature=temperature, deadline=deadline, system_instruction=prompts.THINKER_SYSTEM_PROMPT
+        )
 
         if not solution:
+            # No placeholder text: combiners are told about the missing subtask instead
             logger.error(f"[{self.name}] Failed to generate solution for subtask {subtask['number']}")
             return {
                 "subtask": subtask,
-                "solution": "# Error: Failed to generate solution",
-                "success": False
+                "solution": "",
+                "success": False,
+                "error": "failed"
             }
 
         logger.info(f"[{self.name}] Successfully generated solution for subtask {subtask['number']}")
@@ -350,27 +609,32 @@ class ThinkerAgent(Agent):
 
 class MidCombinerAgent(Agent):
     """
-    Mid-Level Combiner Agent that merges 5 thinker outputs.
+    Mid-Level Combiner Agent that merges a group of thinker outputs.
     """
 
-    def __init__(self, api_key: str, combiner_id: int):
+    def __init__(self, api_key: str, combiner_id: int, key_pool: Optional[APIKeyPool] = None):
         """
         Initialize a Mid-Level Combiner Agent.
 
         Args:
             api_key: The API key for this agent
             combiner_id: The ID of this combiner (1-2)
+            key_pool: Optional pool to draw keys from
         """
-        super().__init__(api_key, f"Mid_Combiner_{combiner_id}")
+        super().__init__(api_key, f"Mid_Combiner_{combiner_id}", key_pool)
         self.combiner_id = combiner_id
 
-    def process(self, thinker_results: List[Dict[str, Any]], temperature: float = 0.7) -> Dict[str, Any]:
+    def process(self, thinker_results: List[Dict[str, Any]], temperature: float = 0.7,
+                deadline: Optional[Deadline] = None,
+                missing: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
-        Merge 5 thinker outputs into a coherent code block.
+        Merge a group of thinker outputs into a coherent code block.
 
         Args:
-            thinker_results: List of results from 5 thinkers
+            thinker_results: Results from the thinkers of this group
             temperature: Controls creativity level (0.1-1.0)
+            deadline: When the pipeline needs an answer by
+            missing: Subtasks of this group without a solution ({number, title, reason})
 
         Returns:
             A dictionary containing the merged code and metadata
@@ -383,19 +647,27 @@ class MidCombinerAgent(Agent):
             for result in thinker_results
         ])
 
-        code_implementations = "\n\n".join([
-            f"--- SUBTASK {result['subtask']['number']}: {result['subtask']['title']} ---\n\n{result['solution']}"
-            for result in thinker_results
-        ])
-
-        # Format the prompt
-        prompt = prompts.MID_COMBINER_PROMPT.format(
-            subtask_descriptions=subtask_descriptions,
-            code_implementations=code_implementations
+        def render(solutions: List[str]) -> str:
+            code_implementations = "\n\n".join([
+                f"--- SUBTASK {result['subtask']['number']}: {result['subtask']['title']} ---\n\n{solution}"
+                for result, solution in zip(thinker_results, solutions)
+            ])
+            return prompts.MID_COMBINER_USER_PROMPT.format(
+                subtask_descriptions=subtask_descriptions,
+                code_implementations=code_implementations
+            ) + missing_subtasks_note(missing)
+
+        # Keep the pasted solutions within the prompt size limit, then format the prompt
+        solutions = self.fit_to_prompt(
+            render, [result['solution'] for result in thinker_results], prompts.MID_COMBINER_SYSTEM_PROMPT
         )
+        prompt = render(solutions)
 
         # Generate the merged code with the specified temperature
-        merged_code = self.api_client.generate_content(prompt, temperature=temperature)
+        merged_code = self.api_client.generate_content(
+            prompt, temperature=temperature, deadline=deadline,
+            system_instruction=prompts.MID_COMBINER_SYSTEM_PROMPT
+        )
 
         if not merged_code:
             logger.error(f"[{self.name}] Failed to merge thinker outputs")
@@ -419,11 +691,13 @@ class FinalCombinerAgent(Agent):
     Final Combiner Agent that merges the outputs from the mid-level combiners.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, key_pool: Optional[APIKeyPool] = None):
         """Initialize the Final Combiner Agent."""
-        super().__init__(api_key, "Final_Combiner")
+        super().__init__(api_key, "Final_Combiner", key_pool)
 
-    def process(self, mid_combiner_results: List[Dict[str, Any]], original_task: str, temperature: float = 0.7) -> Dict[str, Any]:
+    def process(self, mid_combiner_results: List[Dict[str, Any]], original_task: str, temperature: float = 0.7,
+                deadline: Optional[Deadline] = None,
+                missing: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Merge the outputs from the mid-level combiners into the final solution.
 
@@ -431,25 +705,39 @@ class FinalCombinerAgent(Agent):
             mid_combiner_results: Results from the mid-level combiners
             original_task: The original user task
             temperature: Controls creativity level (0.1-1.0)
+            deadline: When the pipeline needs an answer by
+            missing: Subtasks of the request without a solution ({number, title, reason})
 
         Returns:
             A dictionary containing the final solution and metadata
         """
         logger.info(f"[{self.name}] Merging outputs from {len(mid_combiner_results)} mid-level combiners")
 
-        # Extract the merged code from each mid-level combiner
-        first_code_block = mid_combiner_results[0]["merged_code"]
-        second_code_block = mid_combiner_results[1]["merged_code"]
-
-        # Format the prompt
-        prompt = prompts.FINAL_COMBINER_PROMPT.format(
-            first_code_block=first_code_block,
-            second_code_block=second_code_block,
-            original_task=original_task
+        def render(blocks: List[str]) -> str:
+            # A small fan-out may leave a single block, which goes in as is
+            if len(blocks) == 1:
+                content_sections = blocks[0]
+            else:
+                content_sections = "\n\n".join(
+                    f"--- SECTION {index} ---\n\n{block}" for index, block in enumerate(blocks, 1)
+                )
+            return prompts.FINAL_COMBINER_USER_PROMPT.format(
+                content_sections=content_sections,
+                original_task=original_task
+            ) + missing_subtasks_note(missing)
+
+        # Keep every block within the prompt size limit, then format the prompt
+        blocks = self.fit_to_prompt(
+            render, [result["merged_code"] for result in mid_combiner_results],
+            prompts.FINAL_COMBINER_SYSTEM_PROMPT
         )
+        prompt = render(blocks)
 
         # Generate the final solution with the specified temperature
-        final_solution = self.api_client.generate_content(prompt, temperature=temperature)
+        final_solution = self.api_client.generate_content(
+            prompt, temperature=temperature, deadline=deadline,
+            system_instruction=prompts.FINAL_COMBINER_SYSTEM_PROMPT
+        )
 
         if not final_solution:
             logger.error(f"[{self.name}] Failed to generate final solution")
@@ -1,16 +1,32 @@
 """
 Orchestrator module for ParadoxGPT.
 
-This module provides a simple ParadoxGPT interface using a single AI agent.
+This module provides a simple ParadoxGPT interface using a single AI agent,
+and a multi-agent mode that divides a task, solves the subtasks concurrently
+and combines the results.
 """
 
 import logging
+import threading
 import time
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 
-from config import DIVIDER_API_KEY, validate_api_keys
+from config import (
+    DIVIDER_API_KEY, THINKER_API_KEYS, MID_COMBINER_API_KEYS, FINAL_COMBINER_API_KEY, COALESCE_REQUESTS,
+    NUM_THINKERS, THINKERS_PER_MID_COMBINER, ADAPTIVE_FAN_OUT, MIN_THINKERS, MAX_THINKERS, ORCHESTRATION_MODE,
+    AGENT_CONCURRENCY, STREAM_DIVIDER, validate_api_keys
+)
 from api_client import GeminiAPIClient
-from prompts import PARADOXGPT_PROMPT
+from dag_scheduler import DAGRun, DAGScheduler, Node
+from stage_quorum import StageQuorum
+from models import DividerAgent, ThinkerAgent, MidCombinerAgent, FinalCombinerAgent
+from prompts import PARADOXGPT_SYSTEM_PROMPT, PARADOXGPT_USER_PROMPT
+from single_flight import SingleFlight, fingerprint
+from task_analyzer import estimate_complexity
+from task_router import ROUTE_SINGLE, TaskRouter, get_default_router
+from key_pool import APIKeyPool, get_default_key_pool
+from retry_policy import Deadline
 
 # Configure logging
 logging.basicConfig(
@@ -19,30 +35,138 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# One conversational call
+MODE_SINGLE = "single"
+# Divider -> thinkers -> mid-combiners -> final combiner
+MODE_MULTI_AGENT = "multi_agent"
+# Single call, reduced tree or full pipeline, picked per request by the TaskRouter
+MODE_AUTO = "auto"
+
+MODES = (MODE_SINGLE, MODE_MULTI_AGENT, MODE_AUTO)
+
+# How the combiners are told why a subtask has no solution
+MISSING_REASONS = {
+    "failed": "the thinker failed",
+    "quorum": "cancelled once enough other subtasks were solved",
+    "deadline": "not finished within the thinker stage's time limit"
+}
+
+
 class ParadoxGPTOrchestrator:
     """
     Simple ParadoxGPT orchestrator using a single AI agent.
     """
 
-    def __init__(self):
-        """Initialize the ParadoxGPT orchestrator."""
+    def __init__(self, router: Optional[TaskRouter] = None):
+        """
+        Initialize the ParadoxGPT orchestrator.
+
+        Args:
+            router: Routes "auto" requests (defaults to the process-wide router)
+        """
         logger.info("Initializing ParadoxGPT orchestrator")
 
         # Validate API keys
         if not validate_api_keys():
             raise ValueError("Missing required API keys. Please check your .env file.")
+        if ORCHESTRATION_MODE not in MODES:
+            raise ValueError(f"Unknown ORCHESTRATION_MODE {ORCHESTRATION_MODE!r}; expected one of {MODES}")
+
+        # Initialize single AI client, drawing on every configured key
+        self.key_pool = get_default_key_pool()
+        self.api_client = GeminiAPIClient(DIVIDER_API_KEY, "ParadoxGPT", key_pool=self.key_pool)
+
+        # Concurrent identical messages (e.g. a double-clicked send) share one run
+        self.flights = SingleFlight("ParadoxGPT")
+
+        self.router = router if router is not None else get_default_router()
 
-        # Initialize single AI client
-        self.api_client = GeminiAPIClient(DIVIDER_API_KEY, "ParadoxGPT")
+        # The multi-agent pipeline is built on first use
+        self._multi_agent: Optional[MultiAgentOrchestrator] = None
+        self._multi_agent_lock = threading.Lock()
 
         logger.info("ParadoxGPT orchestrator initialized successfully")
 
-    def process_task(self, user_message: str) -> Dict[str, Any]:
+    @property
+    def multi_agent(self) -> "MultiAgentOrchestrator":
+        """The multi-agent pipeline, sharing this orchestrator's key pool."""
+        with self._multi_agent_lock:
+            if self._multi_agent is None:
+                self._multi_agent = MultiAgentOrchestrator(key_pool=self.key_pool)
+            return self._multi_agent
+
+    def process_task(self, user_message: str, deadline: Optional[Deadline] = None,
+                     mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user message like ParadoxGPT would.
 
+        Concurrent calls with the same message are merged into a single
+        generation; every caller receives its own copy of the result.
+
+        Args:
+            user_message: The user's message/question
+            deadline: When the caller needs an answer by (e.g. the HTTP
+                      request's time limit); None waits as long as retries take
+            mode: "single", "multi_agent" or "auto" (defaults to ORCHESTRATION_MODE)
+
+        Returns:
+            A dictionary containing the response and metadata
+        """
+        mode = mode or ORCHESTRATION_MODE
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+        if mode == MODE_AUTO:
+            return self._process_routed(user_message, deadline)
+        if mode == MODE_MULTI_AGENT:
+            return self.multi_agent.process_task(user_message, deadline)
+        return self._process_single(user_message, deadline)
+
+    def _process_routed(self, user_message: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Route a message to a single call, a reduced tree or the full pipeline.
+
+        Args:
+            user_message: The user's message/question
+            deadline: When the caller needs an answer by
+
+        Returns:
+            The chosen path's result, with the routing decision in its metadata
+        """
+        start_time = time.time()
+        decision = self.router.route(user_message)
+        if decision.route == ROUTE_SINGLE:
+            result = self._process_single(user_message, deadline)
+        else:
+            result = self.multi_agent.process_task(user_message, deadline, fan_out=decision.fan_out)
+        self.router.record(decision.route, time.time() - start_time, bool(result.get("success")))
+
+        result["metadata"] = dict(result.get("metadata", {}), routing=decision.to_dict())
+        return result
+
+    def _process_single(self, user_message: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Answer a message with one conversational call, merging identical concurrent messages.
+
         Args:
             user_message: The user's message/question
+            deadline: When the caller needs an answer by
+
+        Returns:
+            A dictionary containing the response and metadata
+        """
+        if not COALESCE_REQUESTS:
+            return self._process_task(user_message, deadline)
+        result = self.flights.do(fingerprint(user_message), self._process_task, user_message, deadline,
+                                 deadline=deadline)
+        return dict(result)
+
+    def _process_task(self, user_message: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Run the model for a user message.
+
+        Args:
+            user_message: The user's message/question
+            deadline: When the caller needs an answer by
 
         Returns:
             A dictionary containing the response and metadata
@@ -51,11 +175,12 @@ class ParadoxGPTOrchestrator:
         logger.info(f"Processing message: {user_message[:100]}...")
 
         try:
-            # Create the full prompt with system instructions and user message
-            full_prompt = f"{PARADOXGPT_PROMPT}\n\nUser: {user_message}\n\nAssistant:"
+            # The static instructions go in the system instruction; only the message varies
+            prompt = PARADOXGPT_USER_PROMPT.format(user_message=user_message)
 
             # Generate response using the API client
-            response = self.api_client.generate_response(full_prompt, temperature=0.7)
+            response = self.api_client.generate_response(prompt, temperature=0.7, deadline=deadline,
+                                                         system_instruction=PARADOXGPT_SYSTEM_PROMPT)
 
             if response and response.get("success", False):
                 final_solution = response.get("content", "")
@@ -80,6 +205,7 @@ class ParadoxGPTOrchestrator:
             "processing_time": total_time,
             "metadata": {
                 "model": "ParadoxGPT",
+                "mode": MODE_SINGLE,
                 "temperature": 0.7,
                 "response_type": "conversational"
             }
@@ -88,3 +214,366 @@ class ParadoxGPTOrchestrator:
         return result
 
 
+class MultiAgentOrchestrator:
+    """
+    Runs the divide -> think -> combine pipeline over the agents in models.py.
+
+    The pipeline is a dependency graph run on a bounded thread pool: the
+    thinkers run concurrently, and each mid-level combiner starts as soon as
+    its own thinkers finish instead of waiting for all of them. With a
+    streaming divider, each thinker starts as soon as its own subtask has
+    been written, while the divider is still producing the rest. The thinker
+    stage closes at a quorum or a time limit; combiners are told which
+    subtasks were left without a solution.
+    """
+
+    def __init__(self, key_pool: Optional[APIKeyPool] = None, max_workers: int = AGENT_CONCURRENCY,
+                 stream_divider: bool = STREAM_DIVIDER):
+        """
+        Initialize the agents.
+
+        Args:
+            key_pool: Pool every agent draws keys from (defaults to the process-wide pool)
+            max_workers: Most agent calls in flight at once, across all concurrent requests
+            stream_divider: Dispatch subtasks to thinkers while the divider is still streaming
+        """
+        logger.info("Initializing multi-agent orchestrator")
+        self.key_pool = key_pool if key_pool is not None else get_default_key_pool()
+        self.stream_divider = stream_divider
+
+        self.divider = DividerAgent(DIVIDER_API_KEY, self.key_pool)
+        self.thinkers = [
+            ThinkerAgent(api_key, thinker_id, self.key_pool)
+            for thinker_id, api_key in enumerate(THINKER_API_KEYS, 1)
+        ]
+        self.mid_combiners = [
+            MidCombinerAgent(api_key, combiner_id, self.key_pool)
+            for combiner_id, api_key in enumerate(MID_COMBINER_API_KEYS, 1)
+        ]
+        self.final_combiner = FinalCombinerAgent(FINAL_COMBINER_API_KEY, self.key_pool)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Agent")
+        self.scheduler = DAGScheduler(self.executor)
+        self.flights = SingleFlight("MultiAgent")
+
+        logger.info(f"Multi-agent orchestrator initialized with {len(self.thinkers)} thinkers "
+                    f"and up to {max_workers} concurrent agent calls")
+
+    def process_task(self, user_task: str, deadline: Optional[Deadline] = None,
+                     fan_out: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Answer a task with the full multi-agent pipeline.
+
+        Args:
+            user_task: The user's task
+            deadline: When the caller needs an answer by
+            fan_out: Number of thinkers to use (defaults to the complexity
+                     estimate, or NUM_THINKERS with ADAPTIVE_FAN_OUT off)
+
+        Returns:
+            A dictionary in the same format as ParadoxGPTOrchestrator.process_task,
+            with per-node timings and the critical path in the metadata
+        """
+        if not COALESCE_REQUESTS:
+            return self._process_task(user_task, deadline, fan_out)
+        result = self.flights.do(fingerprint(user_task, fan_out), self._process_task, user_task, deadline, fan_out,
+                                 deadline=deadline)
+        return dict(result)
+
+    def _process_task(self, user_task: str, deadline: Optional[Deadline] = None,
+                      fan_out: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run the divider, thinkers and combiners for a task as a dependency graph.
+
+        Args:
+            user_task: The user's task
+            deadline: When the caller needs an answer by
+            fan_out: Number of thinkers to use (None estimates it)
+
+        Returns:
+            A dictionary containing the final solution and metadata, including
+            the fan-out, per-node timings, the critical path, how the thinker
+            stage ended, the subtasks left without a solution and, with a
+            streaming divider, the time streaming saved
+        """
+        start_time = time.time()
+        complexity = None
+        if fan_out is None and ADAPTIVE_FAN_OUT:
+            complexity = estimate_complexity(user_task, MIN_THINKERS, MAX_THINKERS)
+            fan_out = complexity["recommended_subtasks"]
+        elif fan_out is None:
+            fan_out = min(NUM_THINKERS, MAX_THINKERS)
+        logger.info(f"Processing task with multi-agent pipeline ({fan_out} subtasks): {user_task[:100]}...")
+
+        final_solution = "I apologize, but I'm having trouble processing your request right now. Please try again."
+        success = False
+        subtasks: List[Dict[str, str]] = []
+        failed_subtasks: List[int] = []
+        missing_subtasks: List[Dict[str, Any]] = []
+        timeline: Optional[Dict[str, Any]] = None
+        streaming: Optional[Dict[str, Any]] = None
+        quorum: Optional[StageQuorum] = None
+
+        try:
+            nodes, quorum = self._build_graph(user_task, deadline, fan_out)
+            run = self.scheduler.run(nodes, listener=quorum)
+            timeline = run.report()
+            logger.info(f"Critical path: {run.describe_critical_path()}")
+            if self.stream_divider:
+                streaming = self._streaming_report(run, fan_out)
+
+            subtasks = run.results.get("divider") or []
+            # Thinkers cut off by the stage quorum did not fail; they are reported in missing_subtasks
+            failed_subtasks = sorted(
+                result["subtask"]["number"] for name, result in run.results.items()
+                if name.startswith("thinker_") and name not in quorum.abandoned
+                and result is not None and not result["success"] and result["subtask"] is not None
+            )
+            final = run.results.get("final_combiner")
+            if final is not None:
+                missing_subtasks = final["missing_subtasks"]
+            if final is not None and final["success"]:
+                final_solution = final["final_solution"]
+                success = True
+
+        except Exception as e:
+            logger.error(f"Error in multi-agent pipeline: {str(e)}")
+            final_solution = "I apologize, but I encountered an error while processing your request. Please try again."
+            success = False
+
+        total_time = time.time() - start_time
+        logger.info(f"Multi-agent processing completed in {total_time:.2f} seconds")
+
+        return {
+            "final_solution": final_solution,
+            "success": success,
+            "processing_time": total_time,
+            "metadata": {
+                "model": "ParadoxGPT",
+                "mode": MODE_MULTI_AGENT,
+                "response_type": "multi_agent",
+                "fan_out": fan_out,
+                "complexity": complexity,
+                "subtasks": len(subtasks),
+                "failed_subtasks": failed_subtasks,
+                "missing_subtasks": missing_subtasks,
+                "thinker_stage": quorum.report() if quorum is not None else None,
+                "timeline": timeline,
+                "streaming": streaming
+            }
+        }
+
+    @staticmethod
+    def _streaming_report(run: DAGRun, fan_out: int) -> Optional[Dict[str, Any]]:
+        """
+        Measure what dispatching subtasks during the divider's stream gained.
+
+        The saving is the difference between two replays of the run with the
+        measured node durations: one as it happened, and one where no subtask
+        was released before the divider finished.
+
+        Args:
+            run: The finished run of a streaming graph
+            fan_out: Number of subtask slots in the graph
+
+        Returns:
+            The divider's duration, when each subtask was released relative to
+            the divider's start, and the estimated seconds saved; None if the
+            divider did not finish
+        """
+        divider = run.timings["divider"]
+        if divider.started is None or divider.finished is None:
+            return None
+        names = [f"subtask_{i}" for i in range(1, fan_out + 1)]
+        released = {
+            name: round(run.timings[name].started - divider.started, 3)
+            for name in names if run.results.get(name) is not None
+        }
+        saved = run.estimate_total({name: divider.finished for name in names}) - run.estimate_total({})
+        report = {
+            "divider_duration": round(divider.finished - divider.started, 3),
+            "released": released,
+            "time_saved": round(max(0.0, saved), 3)
+        }
+        logger.info(f"Streaming divider released {len(released)} subtasks over "
+                    f"{report['divider_duration']:.2f}s, saving about {report['time_saved']:.2f}s")
+        return report
+
+    def _build_graph(self, user_task: str, deadline: Optional[Deadline],
+                     fan_out: int) -> Tuple[List[Node], StageQuorum]:
+        """
+        Express the pipeline as a DAG for the scheduler, sized to the fan-out.
+
+        divider -> thinker_1..N, then a combiner tree: while more than two
+        results remain, mid-combiners merge groups of up to
+        THINKERS_PER_MID_COMBINER (a group of one passes through without a
+        call); final_combiner merges the last one or two. Each combiner
+        needs only its own inputs, so it starts as soon as they are ready.
+        A mid-combiner whose merge fails passes its group's results on
+        unmerged, so the next level merges them instead.
+        With a streaming divider, thinker_i depends on the divider's
+        published subtask_i instead of its final result.
+
+        The thinkers form a StageQuorum: once THINKER_QUORUM of them succeed
+        or THINKER_STAGE_TIMEOUT passes, the rest are cancelled and resolved
+        as failures, and the combiners are told which subtasks are missing.
+
+        Args:
+            user_task: The user's task
+            deadline: When the caller needs an answer by
+            fan_out: Number of subtasks (and thinkers)
+
+        Returns:
+            The graph's nodes, and the quorum to pass to the scheduler as its listener
+        """
+        # Per request: the subtask each thinker took, and why a subtask has no solution
+        assigned: Dict[str, Dict[str, str]] = {}
+        errors: Dict[int, str] = {}
+
+        def placeholder(name: str, reason: str) -> Optional[Dict[str, Any]]:
+            subtask = assigned.get(name)
+            if subtask is None:
+                # Cut off before its subtask arrived
+                return None
+            errors.setdefault(subtask["number"], reason)
+            return {"subtask": subtask, "solution": "", "success": False, "error": reason}
+
+        thinker_names = [f"thinker_{i}" for i in range(1, fan_out + 1)]
+        quorum = StageQuorum(thinker_names, placeholder, lambda result: result["success"])
+
+        def missing_entries(subtasks: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+            default = MISSING_REASONS.get(quorum.closed_by or "", "not solved")
+            return [
+                {"number": subtask["number"], "title": subtask["title"],
+                 "reason": MISSING_REASONS.get(errors.get(subtask["number"], ""), default)}
+                for subtask in subtasks
+            ]
+
+        def divide(_: Dict[str, Any]) -> List[Dict[str, str]]:
+            subtasks = self.divider.process(user_task, deadline=deadline, num_subtasks=fan_out)
+            if not subtasks:
+                raise RuntimeError("Divider produced no subtasks")
+            return subtasks
+
+        def divide_stream(_: Dict[str, Any], publish: Callable[[str, Any], None]) -> List[Dict[str, str]]:
+            subtasks = []
+            try:
+                for subtask in self.divider.process_stream(user_task, deadline=deadline, num_subtasks=fan_out):
+                    subtasks.append(subtask)
+                    publish(f"subtask_{len(subtasks)}", subtask)
+            except Exception as e:
+                if not subtasks:
+                    raise
+                # Thinkers are already working on what was published; go on with those
+                logger.error(f"Divider stream failed after {len(subtasks)} subtasks: {str(e)}")
+            if not subtasks:
+                raise RuntimeError("Divider produced no subtasks")
+            return subtasks
+
+        def think(index: int) -> Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]:
+            def run(inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                if self.stream_divider:
+                    subtask = inputs[f"subtask_{index + 1}"]
+                else:
+                    subtasks = inputs["divider"]
+                    subtask = subtasks[index] if index < len(subtasks) else None
+                if subtask is None:
+                    # The divider found fewer parts; no call for a missing subtask
+                    return None
+                name = thinker_names[index]
+                assigned[name] = subtask
+                thinker = self.thinkers[index % len(self.thinkers)]
+                result = thinker.process(subtask, deadline=quorum.member_deadline(name, deadline))
+                if not result["success"]:
+                    errors.setdefault(subtask["number"], result.get("error", "failed"))
+                return result
+            return run
+
+        def expand(results: Iterable[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+            # A failed merge stands for the results it was given
+            return [part for result in results
+                    for part in (result["unmerged"] if result is not None and "unmerged" in result else [result])]
+
+        def combine(combiner: MidCombinerAgent) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+            def run(inputs: Dict[str, Any]) -> Dict[str, Any]:
+                # Failed thinkers are left out and named as missing; one survivor needs no merge
+                results = expand(inputs.values())
+                solved = [result for result in results if result is not None and result["success"]]
+                if len(solved) <= 1:
+                    if not solved:
+                        logger.warning(f"[{combiner.name}] No successful results to merge")
+                    return solved[0] if solved else None
+                missing = missing_entries([
+                    result["subtask"] for result in results
+                    if result is not None and not result["success"] and "covered" not in result
+                    and result["subtask"] is not None
+                ])
+                merged = combiner.process(solved, deadline=deadline, missing=missing)
+                if not merged["success"]:
+                    logger.warning(f"[{combiner.name}] Merge failed; passing {len(solved)} results on unmerged")
+                    return {"unmerged": solved}
+                # Shaped like a thinker result so the next level can merge it again
+                return {
+                    "subtask": {
+                        "number": solved[0]["subtask"]["number"],
+                        "title": "; ".join(result["subtask"]["title"] for result in solved)
+                    },
+                    "solution": merged["merged_code"],
+                    "success": True,
+                    "covered": [number for result in solved for number in covered(result)]
+                }
+            return run
+
+        def covered(result: Dict[str, Any]) -> List[int]:
+            return result.get("covered") or [result["subtask"]["number"]]
+
+        def finalize(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            blocks = [
+                result for result in expand(value for name, value in inputs.items() if name != "divider")
+                if result is not None and result["success"]
+            ]
+            if not blocks:
+                raise RuntimeError("No successful results to combine")
+            solved = {number for block in blocks for number in covered(block)}
+            missing = missing_entries([
+                subtask for subtask in inputs["divider"] if subtask["number"] not in solved
+            ])
+            if missing:
+                logger.warning(f"Combining without {len(missing)} subtasks: "
+                               f"{', '.join(str(entry['number']) for entry in missing)}")
+            final = self.final_combiner.process(
+                [{"merged_code": block["solution"]} for block in blocks], user_task, deadline=deadline,
+                missing=missing
+            )
+            final["missing_subtasks"] = missing
+            return final
+
+        level = list(thinker_names)
+        if self.stream_divider:
+            nodes = [Node("divider", divide_stream, publishes=[f"subtask_{i}" for i in range(1, fan_out + 1)])]
+            nodes += [Node(name, think(index), [f"subtask_{index + 1}"]) for index, name in enumerate(level)]
+        else:
+            nodes = [Node("divider", divide)]
+            nodes += [Node(name, think(index), ["divider"]) for index, name in enumerate(level)]
+
+        combiners = 0
+        while len(level) > 2:
+            groups = max(2, -(-len(level) // THINKERS_PER_MID_COMBINER))
+            size, extra = divmod(len(level), groups)
+            next_level, first = [], 0
+            for group in range(groups):
+                last = first + size + (1 if group < extra else 0)
+                members = level[first:last]
+                first = last
+                if len(members) == 1:
+                    next_level.append(members[0])
+                    continue
+                combiner = self.mid_combiners[combiners % len(self.mid_combiners)]
+                combiners += 1
+                nodes.append(Node(f"mid_combiner_{combiners}", combine(combiner), members))
+                next_level.append(f"mid_combiner_{combiners}")
+            level = next_level
+
+        # The divider's list is what the final combiner checks for missing subtasks
+        nodes.append(Node("final_combiner", finalize, level + ["divider"]))
+        return nodes, quorum
@@ -0,0 +1,245 @@
+"""
+Rate Limiter module for ParadoxGPT.
+
+This module provides client-side token buckets that track requests per minute
+and estimated tokens per minute for each Gemini API key, so callers queue for
+capacity instead of firing requests that are bound to be rejected with a 429.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from config import GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT, RATE_LIMIT_MAX_WAIT
+from retry_policy import Deadline
+from token_estimator import get_default_estimator
+from utils import hash_api_key
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when capacity would not be available within the allowed wait."""
+
+    def __init__(self, key_id: str, wait_time: float):
+        super().__init__(f"Rate limit for key {key_id} needs {wait_time:.1f}s of wait")
+        self.key_id = key_id
+        self.wait_time = wait_time
+
+
+class RateLimitWaitCancelled(Exception):
+    """Raised when the caller's deadline is cancelled while it queues for capacity."""
+
+    def __init__(self, key_id: str):
+        super().__init__(f"Wait for rate limit of key {key_id} was cancelled")
+        self.key_id = key_id
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity per minute.
+
+    Reservations may drive the balance negative; the deficit is the time the
+    reserving caller must wait, which keeps waiting callers in FIFO order.
+    Not thread-safe on its own; KeyRateLimiter guards it with a lock.
+    """
+
+    def __init__(self, capacity: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            capacity: Maximum tokens, also the refill amount per minute
+        """
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Get how long a reservation of amount would have to wait.
+
+        Args:
+            amount: Tokens to reserve
+            now: Current monotonic time
+
+        Returns:
+            Seconds until the reservation is covered (0 if available now)
+        """
+        self._refill(now)
+        # Requests bigger than the bucket are admitted once it is full
+        amount = min(amount, self.capacity)
+        deficit = amount - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        """Debit amount, possibly leaving the bucket in deficit."""
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        """Credit a reservation that was not used, up to capacity."""
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class KeyRateLimiter:
+    """Thread-safe request and token budget for a single API key."""
+
+    def __init__(self, key_id: str, rpm: int = GEMINI_RPM_LIMIT, tpm: int = GEMINI_TPM_LIMIT):
+        """
+        Initialize the limiter.
+
+        Args:
+            key_id: Hashed identifier of the API key (for logging)
+            rpm: Requests allowed per minute (0 disables)
+            tpm: Tokens allowed per minute (0 disables)
+        """
+        self.key_id = key_id
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+        self._counters = {"acquired": 0, "queued": 0, "rejected": 0, "cancelled": 0, "wait_seconds": 0.0}
+
+    def acquire(self, estimated_tokens: int = 0, max_wait: Optional[float] = None,
+                deadline: Optional[Deadline] = None) -> float:
+        """
+        Reserve capacity for one request, sleeping until it is available.
+
+        Args:
+            estimated_tokens: Estimated tokens the request will consume
+            max_wait: Longest acceptable wait in seconds (defaults to RATE_LIMIT_MAX_WAIT)
+            deadline: The request's deadline; cancelling it ends the wait and
+                      gives the reserved capacity back
+
+        Returns:
+            The number of seconds waited
+
+        Raises:
+            RateLimitExceeded: If the wait would be longer than max_wait
+            RateLimitWaitCancelled: If the deadline was cancelled while waiting
+        """
+        if max_wait is None:
+            max_wait = RATE_LIMIT_MAX_WAIT
+
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests is not None:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens is not None and estimated_tokens > 0:
+                wait = max(wait, self.tokens.wait_time(estimated_tokens, now))
+
+            if wait > max_wait:
+                self._counters["rejected"] += 1
+                raise RateLimitExceeded(self.key_id, wait)
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None and estimated_tokens > 0:
+                self.tokens.take(estimated_tokens)
+            self._counters["acquired"] += 1
+            if wait > 0:
+                self._counters["queued"] += 1
+                self._counters["wait_seconds"] += wait
+
+        if wait > 0:
+            logger.info(f"Rate limit for key {self.key_id}: queued for {wait:.2f}s")
+            if deadline is None:
+                time.sleep(wait)
+            elif not deadline.sleep(wait):
+                self._release(estimated_tokens)
+                raise RateLimitWaitCancelled(self.key_id)
+        return wait
+
+    def _release(self, estimated_tokens: int) -> None:
+        """Give back a reservation whose request was never sent."""
+        with self._lock:
+            now = time.monotonic()
+            if self.requests is not None:
+                self.requests.wait_time(0, now)
+                self.requests.give_back(1)
+            if self.tokens is not None and estimated_tokens > 0:
+                self.tokens.wait_time(0, now)
+                self.tokens.give_back(estimated_tokens)
+            self._counters["acquired"] -= 1
+            self._counters["cancelled"] += 1
+
+    def record_tokens(self, tokens: int) -> None:
+        """
+        Debit tokens used after the fact (e.g. generated output).
+
+        Args:
+            tokens: Number of tokens to debit
+        """
+        if self.tokens is None or tokens <= 0:
+            return
+        with self._lock:
+            self.tokens.wait_time(0, time.monotonic())
+            self.tokens.take(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters and the current balances.
+
+        Returns:
+            A dictionary of counters and remaining capacity
+        """
+        with self._lock:
+            now = time.monotonic()
+            stats = dict(self._counters)
+            if self.requests is not None:
+                self.requests.wait_time(0, now)
+                stats["requests_available"] = round(self.requests.tokens, 2)
+            if self.tokens is not None:
+                self.tokens.wait_time(0, now)
+                stats["tokens_available"] = round(self.tokens.tokens)
+        return stats
+
+
+_limiters: Dict[str, KeyRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str) -> Optional[KeyRateLimiter]:
+    """
+    Get the process-wide limiter for an API key, so all clients share its budget.
+
+    Args:
+        api_key: The API key
+
+    Returns:
+        The shared limiter, or None if both limits are disabled
+    """
+    if GEMINI_RPM_LIMIT <= 0 and GEMINI_TPM_LIMIT <= 0:
+        return None
+
+    key_id = hash_api_key(api_key)
+    with _limiters_lock:
+        limiter = _limiters.get(key_id)
+        if limiter is None:
+            limiter = KeyRateLimiter(key_id)
+            _limiters[key_id] = limiter
+        return limiter
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        The estimated token count from the shared, calibrated estimator
+    """
+    return get_default_estimator().estimate(text)
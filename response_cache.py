@@ -0,0 +1,438 @@
+"""
+Response Cache module for ParadoxGPT.
+
+This module provides caches for generated responses, keyed on a hash of the
+model, the full prompt and the temperature, so identical prompts (mobile quick
+actions, retried submissions) can be answered without another API call.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_BYTES
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_name: str, prompt: str, temperature: float, system_instruction: str = "",
+                   generation_config: str = "") -> str:
+    """
+    Build the cache key for a generation request.
+
+    Args:
+        model_name: The Gemini model used
+        prompt: The full prompt text
+        temperature: The temperature used
+        system_instruction: The system instruction sent with the prompt, if any
+        generation_config: Extra generation settings (e.g. a response schema) as canonical JSON, if any
+
+    Returns:
+        A hex SHA-256 digest identifying the request
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(f"{temperature:.4f}".encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    if system_instruction:
+        # Only mixed in when present, so keys of plain prompts stay unchanged
+        digest.update(b"\0")
+        digest.update(system_instruction.encode("utf-8"))
+    if generation_config:
+        # A schema changes the response format, so it must not share entries with plain text
+        digest.update(b"\0config\0")
+        digest.update(generation_config.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache(ABC):
+    """Base interface for response cache backends."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: The cache key from make_cache_key
+
+        Returns:
+            The cached text, or None on a miss or expired entry
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: The cache key from make_cache_key
+            value: The generated text
+            ttl: Lifetime in seconds (defaults to the cache's TTL)
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/eviction counters.
+
+        Returns:
+            A dictionary of counters and sizing information
+        """
+        pass
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        pass
+
+
+class MemoryResponseCache(ResponseCache):
+    """Thread-safe in-process cache with LRU eviction and per-entry TTL."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        """
+        Initialize the in-memory cache.
+
+        Args:
+            max_entries: Maximum number of responses kept
+            ttl: Default lifetime of an entry in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Persistent cache in a SQLite file, shared safely by processes on one host.
+
+    The database runs in WAL mode so readers never block the writer. A running
+    byte total is kept by triggers, and the least recently used entries are
+    evicted whenever a write pushes the file over its size budget.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+        CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+        CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        INSERT OR IGNORE INTO meta (name, value) VALUES ('total_bytes', 0);
+        CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+            UPDATE meta SET value = value + NEW.size WHERE name = 'total_bytes';
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+            UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'total_bytes';
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+            UPDATE meta SET value = value - OLD.size WHERE name = 'total_bytes';
+        END;
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 ttl: float = RESPONSE_CACHE_TTL):
+        """
+        Initialize the SQLite cache, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite file
+            max_bytes: Size budget for cached values in bytes
+            ttl: Default lifetime of an entry in seconds
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._counters_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the database."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; write transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[name] += amount
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self._get(key)
+        except sqlite3.Error as e:
+            # A busy or damaged cache must never fail a generation request
+            logger.warning(f"Response cache read failed: {str(e)}")
+            self._count("misses")
+            return None
+
+    def _get(self, key: str) -> Optional[str]:
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        value, expires_at = row
+        if expires_at <= now:
+            connection.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            self._count("expirations")
+            self._count("misses")
+            return None
+
+        connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        try:
+            self._set(key, value, ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {str(e)}")
+
+    def _set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        connection = self._connection()
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                """
+                INSERT INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value, size = excluded.size,
+                    expires_at = excluded.expires_at, last_access = excluded.last_access
+                """,
+                (key, value, size, expires_at, now)
+            )
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """Delete the least recently used rows needed to get back under the size budget."""
+        overage = self._total_bytes(connection) - self.max_bytes
+        if overage <= 0:
+            return 0
+
+        # Remove the shortest prefix (by last access) whose sizes cover the overage
+        cursor = connection.execute(
+            """
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, size, SUM(size) OVER (ORDER BY last_access, key) AS running
+                    FROM entries
+                ) WHERE running - size < ?
+            )
+            """,
+            (overage,)
+        )
+        return max(cursor.rowcount, 0)
+
+    @staticmethod
+    def _total_bytes(connection: sqlite3.Connection) -> int:
+        row = connection.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> Dict[str, Any]:
+        connection = self._connection()
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats["size"] = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        stats["bytes"] = self._total_bytes(connection)
+        stats["max_bytes"] = self.max_bytes
+        stats["path"] = self.path
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM entries")
+
+    def _file_bytes(self) -> int:
+        """Return the on-disk size of the database including its WAL file."""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, self.path + "-wal")
+            if os.path.exists(path)
+        )
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Remove expired entries, enforce the size budget and shrink the file.
+
+        Intended to run offline or from a maintenance job; VACUUM briefly
+        takes an exclusive lock on the database.
+
+        Returns:
+            Counts of expired and evicted rows and the file size before and after
+        """
+        connection = self._connection()
+        size_before = self._file_bytes()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            expired = connection.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+
+        result = {
+            "expired": expired,
+            "evicted": evicted,
+            "bytes_before": size_before,
+            "bytes_after": self._file_bytes()
+        }
+        logger.info(f"Compacted response cache {self.path}: {result}")
+        return result
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache, if caching is enabled.
+
+    Returns:
+        The shared cache, or None when RESPONSE_CACHE_ENABLED is off
+    """
+    global _default_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            if RESPONSE_CACHE_BACKEND == "sqlite":
+                _default_cache = SQLiteResponseCache()
+                logger.info(f"Response cache enabled (SQLite at {RESPONSE_CACHE_PATH}, "
+                            f"max {RESPONSE_CACHE_MAX_BYTES} bytes, TTL {RESPONSE_CACHE_TTL}s)")
+            else:
+                _default_cache = MemoryResponseCache()
+                logger.info(f"Response cache enabled (max {RESPONSE_CACHE_MAX_ENTRIES} entries, TTL {RESPONSE_CACHE_TTL}s)")
+        return _default_cache
+
+
+def main() -> int:
+    """Command line entry point for maintaining the SQLite response cache."""
+    parser = argparse.ArgumentParser(description="Maintain the ParadoxGPT SQLite response cache")
+    parser.add_argument("command", choices=["compact", "stats", "clear"], help="Maintenance action to run")
+    parser.add_argument("--path", default=RESPONSE_CACHE_PATH, help="Path to the cache database")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No cache database at {args.path}")
+        return 1
+
+    cache = SQLiteResponseCache(args.path)
+    if args.command == "compact":
+        result = cache.compact()
+        print(f"Removed {result['expired']} expired and {result['evicted']} evicted entries; "
+              f"{result['bytes_before']} -> {result['bytes_after']} bytes")
+    elif args.command == "stats":
+        for name, value in cache.stats().items():
+            print(f"{name}: {value}")
+    else:
+        cache.clear()
+        print(f"Cleared {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
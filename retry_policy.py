@@ -0,0 +1,320 @@
+"""
+Retry Policy module for ParadoxGPT.
+
+This module decides whether and when a failed Gemini call is retried: full
+jitter exponential backoff, server hints (Retry-After / RetryInfo), a set of
+retryable status codes, and an overall deadline handed down from the HTTP
+request so that no attempt starts when it cannot finish in time.
+"""
+
+import re
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, List, Optional
+
+from config import MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_MIN_ATTEMPT_TIME
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Transient failures worth another attempt
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Failures tied to the key itself, worth retrying only on a different key
+KEY_ERROR_STATUSES = frozenset({401, 403})
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+
+
+class Deadline:
+    """A point in time by which a request has to be answered."""
+
+    def __init__(self, seconds: float):
+        """
+        Initialize a deadline.
+
+        Args:
+            seconds: Time budget from now
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+        self._children: List["Deadline"] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was called on this deadline or one of its parents."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Expire the deadline and every child now, so the work bound to them stops retrying."""
+        with self._lock:
+            self.expires_at = time.monotonic()
+            self._cancelled.set()
+            children, self._children = self._children, []
+        for child in children:
+            child.cancel()
+
+    def child(self) -> "Deadline":
+        """
+        Get a deadline for one branch of the work (a race or hedge leg).
+
+        The child ends with this deadline and is cancelled with it, but can
+        also be cancelled on its own without affecting this one.
+
+        Returns:
+            The linked deadline
+        """
+        child = Deadline(self.remaining())
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._children.append(child)
+                return child
+        child.cancel()
+        return child
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleep, waking early if the deadline is cancelled.
+
+        Args:
+            seconds: Time to sleep
+
+        Returns:
+            True if the whole time passed, False if the deadline was cancelled
+        """
+        return not self._cancelled.wait(max(0.0, seconds))
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Return True once the deadline has passed."""
+        return self.remaining() <= 0
+
+    def cap(self, timeout: float) -> float:
+        """
+        Shorten a timeout so it ends no later than the deadline.
+
+        Args:
+            timeout: The timeout that would otherwise be used
+
+        Returns:
+            The smaller of timeout and the remaining time
+        """
+        return min(timeout, self.remaining())
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional["Deadline"]:
+        """
+        Build a deadline from a configured budget.
+
+        Args:
+            seconds: Time budget, or None / 0 for no deadline
+
+        Returns:
+            The deadline, or None when there is none
+        """
+        return cls(seconds) if seconds else None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or an HTTP date).
+
+    Args:
+        value: The header value
+
+    Returns:
+        Seconds to wait, or None if absent or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def retry_after_from_body(body: Any) -> Optional[float]:
+    """
+    Read the RetryInfo delay Gemini puts in 429 error bodies.
+
+    Args:
+        body: The decoded JSON error response
+
+    Returns:
+        Seconds to wait, or None if the body carries no hint
+    """
+    if not isinstance(body, dict):
+        return None
+    details = body.get("error", {}).get("details", [])
+    for detail in details if isinstance(details, list) else []:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return max(0.0, float(delay[:-1]))
+            except ValueError:
+                return None
+    return None
+
+
+def retry_after_from_response(response: Any) -> Optional[float]:
+    """
+    Get the server's retry hint from an HTTP response.
+
+    Args:
+        response: A requests response
+
+    Returns:
+        Seconds to wait, or None if the server gave no hint
+    """
+    hint = parse_retry_after(response.headers.get("Retry-After"))
+    if hint is None and response.status_code in (429, 503):
+        try:
+            hint = retry_after_from_body(response.json())
+        except ValueError:
+            hint = None
+    return hint
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    """
+    Get the retry hint embedded in an SDK error message.
+
+    Args:
+        error: The exception raised by the SDK
+
+    Returns:
+        Seconds to wait, or None if the error carries no hint
+    """
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """Return the HTTP status of an SDK (google.api_core) error, if it has one."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return int(code)
+    return None
+
+
+class RetryPolicy:
+    """Backoff, retryability and deadline rules for one kind of call."""
+
+    def __init__(self, max_attempts: int = MAX_RETRIES, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, min_attempt_time: float = RETRY_MIN_ATTEMPT_TIME,
+                 retryable_statuses=RETRYABLE_STATUSES):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff ceiling for the first retry in seconds
+            max_delay: Largest backoff ceiling in seconds
+            min_attempt_time: Least time an attempt needs; none starts with less left
+            retryable_statuses: HTTP statuses that are retried
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_attempt_time = min_attempt_time
+        self.retryable_statuses = frozenset(retryable_statuses)
+
+    def is_retryable_status(self, status: int, can_switch_key: bool = False) -> bool:
+        """
+        Decide whether an HTTP status is worth another attempt.
+
+        Args:
+            status: The response status code
+            can_switch_key: Whether the next attempt may use a different API key
+
+        Returns:
+            True if the call should be retried
+        """
+        if status in self.retryable_statuses:
+            return True
+        return can_switch_key and status in KEY_ERROR_STATUSES
+
+    def is_retryable_error(self, error: Exception, can_switch_key: bool = False) -> bool:
+        """
+        Decide whether an exception is worth another attempt.
+
+        Args:
+            error: The exception raised by the attempt
+            can_switch_key: Whether the next attempt may use a different API key
+
+        Returns:
+            True if the call should be retried
+        """
+        status = error_status(error)
+        if status is not None:
+            return self.is_retryable_status(status, can_switch_key)
+        # Network errors and unclassified SDK errors are assumed transient
+        return True
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before the retry that follows a failed attempt.
+
+        Args:
+            attempt: Zero-based index of the attempt that failed
+            retry_after: Delay the server asked for, if any
+
+        Returns:
+            A full-jitter delay, raised to the server's hint when it is longer
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def can_start_attempt(self, deadline: Optional[Deadline]) -> bool:
+        """
+        Check that enough of the deadline is left to make an attempt.
+
+        Args:
+            deadline: The request's deadline, if any
+
+        Returns:
+            True if an attempt may start
+        """
+        return deadline is None or deadline.remaining() >= self.min_attempt_time
+
+    def next_delay(self, attempt: int, deadline: Optional[Deadline] = None,
+                   retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Plan the retry after a failed attempt.
+
+        Args:
+            attempt: Zero-based index of the attempt that failed
+            deadline: The request's deadline, if any
+            retry_after: Delay the server asked for, if any
+
+        Returns:
+            Seconds to sleep before retrying, or None to give up
+        """
+        if attempt >= self.max_attempts - 1:
+            return None
+        delay = self.backoff(attempt, retry_after)
+        if deadline is not None and deadline.remaining() - delay < self.min_attempt_time:
+            logger.info(f"Not retrying: {delay:.1f}s backoff would leave less than "
+                        f"{self.min_attempt_time:.1f}s of the {deadline.remaining():.1f}s remaining")
+            return None
+        return delay
@@ -0,0 +1,162 @@
+"""
+Single Flight module for ParadoxGPT.
+
+This module coalesces concurrent identical requests: while one call for a
+given key is in flight, other callers with the same key wait for it and
+share its result (or its exception) instead of starting their own. A
+follower waits no longer than its own deadline, and an outcome the leader
+produced after its deadline ran out or was cancelled is not shared.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from retry_policy import Deadline
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Build a stable key from the parts that identify a request.
+
+    Args:
+        parts: Values such as model name, prompt and temperature
+
+    Returns:
+        A hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class _Call:
+    """An in-flight call that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.followers = 0
+        # False if the leader was cut short, so its outcome says nothing about the request
+        self.shareable = True
+
+    def wait(self, deadline: Optional[Deadline]) -> bool:
+        """Wait for the call to finish, at most until deadline; True if it finished."""
+        if deadline is None:
+            self.done.wait()
+            return True
+        # Polled, so a cancelled deadline (which expires at once) also ends the wait
+        while not self.done.is_set():
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                return False
+            self.done.wait(min(remaining, SingleFlight.POLL_INTERVAL))
+        return True
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    # How often a waiting follower checks whether its deadline was cancelled
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name: str = "default"):
+        """
+        Initialize a coalescing group.
+
+        Args:
+            name: Name of this group (for logging)
+        """
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "executions": 0, "merged": 0, "errors": 0, "reruns": 0}
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, deadline: Optional[Deadline] = None,
+           **kwargs: Any) -> Any:
+        """
+        Run fn, or wait for an identical in-flight call to finish.
+
+        A follower waits at most until its own deadline, then runs fn
+        itself; so does a follower whose leader finished with its deadline
+        expired or cancelled, since that outcome may be a cut-off failure.
+
+        Args:
+            key: Fingerprint identifying identical requests
+            fn: The function to run
+            args: Positional arguments for fn
+            deadline: This caller's deadline, which fn is bound by too (not passed to fn)
+            kwargs: Keyword arguments for fn
+
+        Returns:
+            The result of fn (shared with any merged callers)
+
+        Raises:
+            Whatever fn raised, re-raised in every merged caller
+        """
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._counters["merged"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["executions"] += 1
+                leader = True
+
+        if not leader:
+            logger.info(f"[{self.name}] Merged request into in-flight call {key[:12]}")
+            if call.wait(deadline) and call.shareable:
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            reason = "was cut short" if call.done.is_set() else "outlived this caller's deadline"
+            logger.info(f"[{self.name}] In-flight call {key[:12]} {reason}; running it again")
+            with self._lock:
+                self._counters["executions"] += 1
+                self._counters["reruns"] += 1
+            return fn(*args, **kwargs)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            call.shareable = deadline is None or not (deadline.cancelled or deadline.expired())
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.followers:
+                logger.info(f"[{self.name}] Shared result of {key[:12]} with {call.followers} merged caller(s)")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters for this group.
+
+        Returns:
+            Calls seen, calls actually executed, calls merged, errors, and
+            merged calls that ran again because their leader was cut short
+            or outlived their deadline
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls)
+        return stats
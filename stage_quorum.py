@@ -0,0 +1,175 @@
+"""
+Stage Quorum module for ParadoxGPT.
+
+This module closes a fan-out stage of the multi-agent graph (the thinkers)
+early: once enough members have succeeded, or once the stage has run out of
+time, the members still running are cancelled through their deadlines and
+resolved in the graph with a placeholder, so the combiners go ahead with
+what is there instead of waiting on one slow or failing upstream call.
+"""
+
+import math
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import THINKER_QUORUM, THINKER_STAGE_TIMEOUT
+from dag_scheduler import DAGRun
+from retry_policy import Deadline
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Why a stage was closed before every member finished
+CLOSED_BY_QUORUM = "quorum"
+CLOSED_BY_DEADLINE = "deadline"
+
+
+class StageQuorum:
+    """
+    Completion policy for one stage of a DAGRun: K of N successes or a time limit.
+
+    Use it as the run's listener and bound every member's work with
+    member_deadline(). N counts only members that got work: a member whose
+    result is None (no subtask for it) lowers N instead of counting as a
+    failure.
+    """
+
+    def __init__(self, members: Sequence[str], placeholder: Callable[[str, str], Any],
+                 succeeded: Callable[[Any], bool], ratio: float = THINKER_QUORUM,
+                 timeout: Optional[float] = THINKER_STAGE_TIMEOUT):
+        """
+        Initialize the policy.
+
+        Args:
+            members: Names of the stage's nodes
+            placeholder: Called with a member's name and why it was cut off
+                         ("quorum" or "deadline"); its return value becomes
+                         the member's result in the graph
+            succeeded: Tells whether a member's result counts towards the quorum
+            ratio: Share of the members with work that must succeed (1.0 waits for all)
+            timeout: Seconds from the first member starting until the stage is
+                     closed regardless (None or 0 for no limit)
+        """
+        self.members = list(members)
+        self.placeholder = placeholder
+        self.succeeded = succeeded
+        self.ratio = min(1.0, max(0.0, ratio))
+        self.timeout = timeout or None
+        self.closed_by: Optional[str] = None
+        self.abandoned: List[str] = []
+        self._member_set = set(self.members)
+        self._settled: Dict[str, str] = {}
+        self._legs: Dict[str, Deadline] = {}
+        self._run: Optional[DAGRun] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def needed(self) -> int:
+        """Successes needed to close the stage, given the members known to have work."""
+        with_work = len(self.members) - sum(1 for state in self._settled.values() if state == "empty")
+        return max(1, math.ceil(self.ratio * with_work))
+
+    def member_deadline(self, name: str, deadline: Optional[Deadline]) -> Deadline:
+        """
+        Get the deadline a member's work must run under.
+
+        The first call starts the stage clock. The member's deadline is a
+        child of the request's and is cancelled when the stage closes; the
+        cancel reaches the member's race and hedge legs and wakes its retry
+        backoff, so the member stops once nothing waits for it.
+
+        Args:
+            name: The member starting work
+            deadline: The request's deadline, if any
+
+        Returns:
+            A deadline owned by this member
+        """
+        with self._lock:
+            if self._timer is None and self.timeout:
+                self._timer = threading.Timer(self.timeout, self.close, (CLOSED_BY_DEADLINE,))
+                self._timer.daemon = True
+                self._timer.start()
+            leg = deadline.child() if deadline is not None else Deadline(math.inf)
+            if self.closed_by is not None:
+                leg.cancel()
+            self._legs[name] = leg
+            return leg
+
+    def __call__(self, run: DAGRun, name: str) -> None:
+        """Listener for DAGScheduler.run: count finished members and close the stage at the quorum."""
+        with self._lock:
+            self._run = run
+            if name not in self._member_set or name in self._settled or name in run.abandoned:
+                return
+            result = run.results.get(name)
+            if name in run.errors or name in run.skipped:
+                self._settled[name] = "failed"
+            elif result is None:
+                self._settled[name] = "empty"
+            else:
+                self._settled[name] = "succeeded" if self.succeeded(result) else "failed"
+
+            if len(self._settled) == len(self.members):
+                if self._timer is not None:
+                    self._timer.cancel()
+                return
+            successes = sum(1 for state in self._settled.values() if state == "succeeded")
+            reached = self.closed_by is None and successes >= self.needed()
+        if reached:
+            self.close(CLOSED_BY_QUORUM)
+
+    def close(self, reason: str) -> None:
+        """
+        Close the stage: cancel the members still running and resolve the rest with placeholders.
+
+        Args:
+            reason: CLOSED_BY_QUORUM or CLOSED_BY_DEADLINE
+        """
+        with self._lock:
+            if self.closed_by is not None or self._run is None:
+                return
+            self.closed_by = reason
+            if self._timer is not None:
+                self._timer.cancel()
+            run = self._run
+            stragglers = [name for name in self.members if name not in self._settled]
+
+        # Resolve before cancelling, so a member failing on the cancellation is not counted as a failure
+        for name in stragglers:
+            if run.resolve(name, self.placeholder(name, reason)):
+                self.abandoned.append(name)
+        with self._lock:
+            for name in stragglers:
+                leg = self._legs.get(name)
+                if leg is not None:
+                    leg.cancel()
+        if self.abandoned:
+            logger.warning(f"Closed stage by {reason} with {len(self.abandoned)} of {len(self.members)} "
+                           f"members unfinished: {', '.join(self.abandoned)}")
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get how the stage ended.
+
+        Returns:
+            The policy (ratio, timeout), successes needed and reached, what
+            closed the stage early (None if every member finished) and the
+            members cut off
+        """
+        with self._lock:
+            states = list(self._settled.values())
+            return {
+                "ratio": self.ratio,
+                "timeout": self.timeout,
+                "needed": self.needed(),
+                "succeeded": states.count("succeeded"),
+                "failed": states.count("failed"),
+                "closed_by": self.closed_by,
+                "abandoned": list(self.abandoned)
+            }
@@ -5,6 +5,7 @@ This module analyzes user tasks to determine the appropriate level of creativity
 and the type of task (frontend, backend, etc.) to guide the generation process.
 """
 
+import re
 from typing import Dict, Any, Tuple
 
 # Keywords that indicate frontend/UI work
@@ -155,6 +156,64 @@ def analyze_task(task: str) -> Dict[str, Any]:
         "recommended_temperature": temperature
     }
 
+# Lines that look like list items ("- x", "* x", "1. x", "2) x") each state a requirement
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s+", re.MULTILINE)
+
+# Commas, semicolons and "and"/"with"/"plus" between clauses
+CLAUSE_SEPARATOR_PATTERN = re.compile(r"[,;]|\b(?:and|with|plus|also|including)\b", re.IGNORECASE)
+
+# A clause adds a requirement only if it opens with an instruction ("..., then add tests");
+# the items of a list ("a header, a footer and a form") or a follow-up question do not
+INSTRUCTION_CLAUSE_PATTERN = re.compile(
+    r"^\s*(?:then\s+|please\s+)?(?:add|build|create|write|make|implement|include|explain|describe|compare|"
+    r"list|show|use|support|handle|design|generate|fix|test|deploy|convert|translate|summari[sz]e|"
+    r"analy[sz]e|plot|give|provide|return|store|save|validate|refactor|optimi[sz]e|document|integrate|"
+    r"set up|connect|display|allow|let|send|fetch|parse|calculate|sort|filter|export|import)\b",
+    re.IGNORECASE
+)
+
+# Words of plain request text that make up one subtask's worth of detail
+WORDS_PER_SUBTASK = 50
+
+def estimate_complexity(task: str, min_subtasks: int = 2, max_subtasks: int = 10) -> Dict[str, Any]:
+    """
+    Estimate how much independent work a task holds, to size the thinker fan-out.
+
+    A cheap local heuristic: the number of stated requirements (list items,
+    or further clauses that open with an instruction verb), how many task
+    categories the request touches, and its length.
+
+    Args:
+        task: The user task string
+        min_subtasks: Fewest subtasks to recommend
+        max_subtasks: Most subtasks to recommend
+
+    Returns:
+        A dictionary with the score's components, the score and the
+        recommended number of subtasks
+    """
+    analysis = analyze_task(task)
+    words = len(task.split())
+    list_items = len(LIST_ITEM_PATTERN.findall(task))
+    requirements = list_items if list_items else sum(
+        1 for clause in CLAUSE_SEPARATOR_PATTERN.split(task)[1:] if INSTRUCTION_CLAUSE_PATTERN.match(clause)
+    )
+    categories = sum(1 for key in ("frontend_score", "backend_score", "data_science_score", "writing_score",
+                                   "analysis_score") if analysis[key] > 0)
+
+    score = requirements + max(0, categories - 1) + words / WORDS_PER_SUBTASK
+    if analysis["is_web_task"]:
+        score += 1
+    subtasks = max(min_subtasks, min(max_subtasks, min_subtasks + round(score)))
+
+    return {
+        "words": words,
+        "requirements": requirements,
+        "categories": categories,
+        "score": round(score, 2),
+        "recommended_subtasks": subtasks
+    }
+
 def get_task_specific_instructions(task: str) -> Tuple[str, float]:
     """
     Get specific instructions and temperature based on task analysis.
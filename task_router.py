@@ -0,0 +1,195 @@
+"""
+Task Router module for ParadoxGPT.
+
+This module decides, from cheap local analysis of the message alone, how much
+of the multi-agent machinery a request deserves: a single conversational
+call for greetings, short questions and one-liners, a reduced tree of a few
+thinkers for moderate tasks, or the full pipeline for tasks with many
+independent parts. Every decision is logged, and per-route latency is kept
+so the thresholds can be tuned against real traffic.
+"""
+
+import re
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config import (
+    ROUTER_SINGLE_MAX_WORDS, ROUTER_FULL_MIN_SCORE, ROUTER_REDUCED_THINKERS, MIN_THINKERS, MAX_THINKERS,
+    NUM_THINKERS, ADAPTIVE_FAN_OUT
+)
+from task_analyzer import analyze_task, estimate_complexity
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# One conversational call
+ROUTE_SINGLE = "single"
+# The multi-agent pipeline with at most ROUTER_REDUCED_THINKERS thinkers
+ROUTE_REDUCED = "reduced"
+# The multi-agent pipeline with the fan-out the complexity estimate asks for
+ROUTE_FULL = "full"
+
+ROUTES = (ROUTE_SINGLE, ROUTE_REDUCED, ROUTE_FULL)
+
+# Small talk that never needs more than one call
+GREETING_PATTERN = re.compile(
+    r"^\s*(?:hi|hello|hey|yo|hiya|howdy|thanks|thank you|thx|ok|okay|bye|goodbye|"
+    r"good (?:morning|afternoon|evening|night))\b",
+    re.IGNORECASE
+)
+
+# Task types that are answered in prose and rarely split into independent parts
+CONVERSATIONAL_TYPES = ("general", "question")
+
+# Latency samples kept per route
+LATENCY_WINDOW = 200
+
+
+class RouteDecision:
+    """Where a request goes and why."""
+
+    __slots__ = ("route", "fan_out", "reason", "complexity")
+
+    def __init__(self, route: str, fan_out: int, reason: str, complexity: Dict[str, Any]):
+        """
+        Initialize a decision.
+
+        Args:
+            route: "single", "reduced" or "full"
+            fan_out: Thinkers to use (0 for a single call)
+            reason: Short explanation for the logs
+            complexity: The estimate the decision was based on
+        """
+        self.route = route
+        self.fan_out = fan_out
+        self.reason = reason
+        self.complexity = complexity
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the decision as a plain dictionary."""
+        return {"route": self.route, "fan_out": self.fan_out, "reason": self.reason, "complexity": self.complexity}
+
+
+class TaskRouter:
+    """Routes requests to a single call, a reduced tree or the full pipeline."""
+
+    def __init__(self, single_max_words: int = ROUTER_SINGLE_MAX_WORDS,
+                 full_min_score: float = ROUTER_FULL_MIN_SCORE,
+                 reduced_thinkers: int = ROUTER_REDUCED_THINKERS):
+        """
+        Initialize the router.
+
+        Args:
+            single_max_words: Messages up to this many words without stated
+                              requirements take a single call
+            full_min_score: Complexity score from which the full pipeline is used
+            reduced_thinkers: Most thinkers in the reduced tree
+        """
+        self.single_max_words = single_max_words
+        self.full_min_score = full_min_score
+        self.reduced_thinkers = reduced_thinkers
+        self._latencies: Dict[str, deque] = {route: deque(maxlen=LATENCY_WINDOW) for route in ROUTES}
+        self._counters: Dict[str, Dict[str, int]] = {
+            route: {"requests": 0, "successes": 0} for route in ROUTES
+        }
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> RouteDecision:
+        """
+        Decide how to answer a message.
+
+        Args:
+            task: The user's message
+
+        Returns:
+            The decision, also logged at INFO
+        """
+        complexity = estimate_complexity(task, MIN_THINKERS, MAX_THINKERS)
+        primary_type = analyze_task(task)["primary_type"]
+        complexity["primary_type"] = primary_type
+        words = complexity["words"]
+
+        if GREETING_PATTERN.match(task) and words <= self.single_max_words:
+            decision = RouteDecision(ROUTE_SINGLE, 0, "greeting", complexity)
+        elif words <= self.single_max_words and complexity["requirements"] == 0:
+            decision = RouteDecision(ROUTE_SINGLE, 0, "short message", complexity)
+        elif primary_type in CONVERSATIONAL_TYPES and complexity["requirements"] <= 1 \
+                and complexity["score"] < self.full_min_score:
+            decision = RouteDecision(ROUTE_SINGLE, 0, f"{primary_type} with a single point", complexity)
+        elif complexity["score"] < self.full_min_score:
+            fan_out = max(MIN_THINKERS, min(self.reduced_thinkers, complexity["recommended_subtasks"]))
+            decision = RouteDecision(ROUTE_REDUCED, fan_out,
+                                     f"score {complexity['score']} below {self.full_min_score}", complexity)
+        else:
+            fan_out = complexity["recommended_subtasks"] if ADAPTIVE_FAN_OUT else min(NUM_THINKERS, MAX_THINKERS)
+            decision = RouteDecision(ROUTE_FULL, fan_out,
+                                     f"score {complexity['score']} at or above {self.full_min_score}", complexity)
+
+        logger.info(f"Routed to {decision.route} (fan-out {decision.fan_out}): {decision.reason}; "
+                    f"{words} words, {complexity['requirements']} requirements, type {primary_type}")
+        return decision
+
+    def record(self, route: str, latency: float, success: bool) -> None:
+        """
+        Record how long a routed request took.
+
+        Args:
+            route: The route it took
+            latency: Seconds from routing to answer
+            success: Whether it produced an answer
+        """
+        with self._lock:
+            self._latencies[route].append(latency)
+            self._counters[route]["requests"] += 1
+            if success:
+                self._counters[route]["successes"] += 1
+        logger.info(f"Route {route} completed in {latency:.2f}s ({'ok' if success else 'failed'})")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-route request counts and latency percentiles.
+
+        Returns:
+            A dictionary with the thresholds and per-route stats
+        """
+        routes: Dict[str, Any] = {}
+        with self._lock:
+            for route in ROUTES:
+                latencies = sorted(self._latencies[route])
+                stats: Dict[str, Any] = dict(self._counters[route])
+                for name, pct in (("p50", 0.5), ("p95", 0.95)):
+                    stats[f"{name}_latency"] = (
+                        round(latencies[min(len(latencies) - 1, int(pct * len(latencies)))], 3)
+                        if latencies else None
+                    )
+                routes[route] = stats
+        return {
+            "single_max_words": self.single_max_words,
+            "full_min_score": self.full_min_score,
+            "reduced_thinkers": self.reduced_thinkers,
+            "routes": routes
+        }
+
+
+_default_router: Optional[TaskRouter] = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_router() -> TaskRouter:
+    """
+    Get the process-wide router, so route stats cover every request.
+
+    Returns:
+        The shared router
+    """
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = TaskRouter()
+        return _default_router
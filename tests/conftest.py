@@ -0,0 +1,38 @@
+"""
+Shared setup for ParadoxGPT's tests.
+
+config.py reads the environment when it is imported, so the settings the
+tests rely on are fixed here, before any module under test is imported:
+every agent gets a dummy key, and caching, hedging, rate limiting and
+metric sinks are off so each test sees only the behaviour it sets up.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_ENV = {
+    "DIVIDER_API_KEY": "test-divider-key",
+    "MID_COMBINER_1_API_KEY": "test-mid-combiner-1-key",
+    "MID_COMBINER_2_API_KEY": "test-mid-combiner-2-key",
+    "FINAL_COMBINER_API_KEY": "test-final-combiner-key",
+    **{f"THINKER_{i}_API_KEY": f"test-thinker-{i}-key" for i in range(1, 11)},
+    "TRANSPORTS": "rest",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "CONTEXT_CACHE_ENABLED": "false",
+    "HEDGE_REQUESTS": "false",
+    "GEMINI_RPM_LIMIT": "0",
+    "GEMINI_TPM_LIMIT": "0",
+    "INSTRUMENTATION_SINKS": "",
+}
+os.environ.update(TEST_ENV)
+
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breakers(monkeypatch):
+    """Give every test its own circuit breakers; they are process-wide and keyed by key and transport."""
+    import circuit_breaker
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
@@ -0,0 +1,107 @@
+"""Tests for GeminiAPIClient's key fallback on local rate-limit refusals and for what counts against a key."""
+
+import pytest
+
+import api_client
+from api_client import EXHAUSTED, FAILURE, SUCCESS, AttemptResult, GeminiAPIClient, MockTransport, Transport
+from circuit_breaker import get_breaker
+from key_pool import APIKeyPool
+from mock_gemini_server import MockSettings
+from rate_limiter import RateLimitExceeded
+from retry_policy import Deadline
+from utils import hash_api_key
+
+
+class RefusingLimiter:
+    """Stands in for a key's KeyRateLimiter whose budget is spent."""
+
+    def __init__(self, api_key: str):
+        self.key_id = hash_api_key(api_key)
+        self.refusals = 0
+
+    def acquire(self, estimated_tokens: int = 0, max_wait: float = None, deadline: Deadline = None) -> float:
+        self.refusals += 1
+        raise RateLimitExceeded(self.key_id, 60.0)
+
+
+@pytest.fixture
+def busy_key_limiter(monkeypatch):
+    """Make the local rate limiter refuse every request on "busy-key" and admit the rest."""
+    limiter = RefusingLimiter("busy-key")
+    monkeypatch.setattr(api_client, "get_rate_limiter",
+                        lambda api_key: limiter if api_key == "busy-key" else None)
+    return limiter
+
+
+def fast_client(key_pool=None) -> GeminiAPIClient:
+    settings = MockSettings(latency_median=0.01, latency_sigma=0.0, seed=1)
+    return GeminiAPIClient("busy-key", agent_name="Test Agent", key_pool=key_pool,
+                           transports=[MockTransport(settings)], hooks=[])
+
+
+def test_refused_key_falls_back_to_another_pooled_key(busy_key_limiter):
+    pool = APIKeyPool(["busy-key", "idle-key"], strategy="least_loaded")
+    client = fast_client(pool)
+
+    text = client.generate_content("Write a haiku", use_cache=False, deadline=Deadline(10))
+
+    assert text
+    assert busy_key_limiter.refusals == 1
+    busy, idle = pool.keys
+    # A local refusal is not an upstream 429: the key is neither benched nor counted as failing
+    assert busy.failures == 0
+    assert busy.cooldown_until == 0.0
+    assert idle.calls == 1
+
+
+def test_refusal_without_another_key_gives_up(busy_key_limiter):
+    client = fast_client()
+
+    assert client.generate_content("Write a haiku", use_cache=False, deadline=Deadline(10)) is None
+    assert busy_key_limiter.refusals == 1
+
+
+class InvalidArgument(Exception):
+    """Stands in for google.api_core's InvalidArgument, which carries its HTTP status as code."""
+
+    code = 400
+
+
+class RejectingTransport(Transport):
+    """Fails every request the way the SDK does for a malformed request."""
+
+    name = "rejecting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        self.calls += 1
+        error = InvalidArgument("400 Request contains an invalid argument")
+        return AttemptResult(error=error, status=400, retryable=False)
+
+
+def test_sdk_errors_are_classified_by_status_like_rest():
+    assert AttemptResult(error=InvalidArgument("bad request"), status=400).outcome == SUCCESS
+    assert AttemptResult(error=Exception("503 Service unavailable"), status=503).outcome == FAILURE
+    assert AttemptResult(error=Exception("429 Resource exhausted"), status=429).outcome == EXHAUSTED
+    assert AttemptResult(error=ConnectionError("connection reset")).outcome == FAILURE
+
+
+def test_client_side_sdk_error_is_not_charged_to_the_key():
+    transport = RejectingTransport()
+    client = GeminiAPIClient("test-key", agent_name="Test Agent", transports=[transport], hooks=[])
+
+    assert client.generate_content("Write a haiku", use_cache=False, deadline=Deadline(10)) is None
+    assert transport.calls == 1
+    breaker = get_breaker(f"{hash_api_key('test-key')}:rejecting").snapshot()
+    assert breaker["failures"] == 0
+
+
+def test_timeout_from_a_deadline_capped_attempt_is_skipped():
+    settings = MockSettings(latency_median=10.0, latency_sigma=0.0, latency_max=10.0, seed=1)
+    client = GeminiAPIClient("test-key", agent_name="Test Agent", transports=[MockTransport(settings)], hooks=[])
+
+    assert client.generate_content("Write a haiku", use_cache=False, deadline=Deadline(0.2)) is None
+    breaker = get_breaker(f"{hash_api_key('test-key')}:mock").snapshot()
+    assert breaker["failures"] == 0
@@ -0,0 +1,77 @@
+"""Tests for AsyncGeminiAPIClient's handling of 200 responses without usable text."""
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+import async_api_client
+from async_api_client import AsyncGeminiAPIClient, close_async_sessions, get_async_session
+from retry_policy import RetryPolicy
+
+
+async def generate_against(handler) -> tuple:
+    """Run one generate_content call against a local server; return the text and the requests served."""
+    calls = []
+
+    async def counted(request):
+        calls.append(request.path)
+        return await handler(request)
+
+    app = web.Application()
+    app.router.add_post("/generate", counted)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        client = AsyncGeminiAPIClient("test-key", agent_name="Async Test")
+        client.base_url = f"http://127.0.0.1:{port}/generate"
+        client.max_retries = 2
+        client.retry_policy = RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01)
+        text = await client.generate_content("Write a haiku")
+    finally:
+        await close_async_sessions()
+        await runner.cleanup()
+    return text, len(calls)
+
+
+@pytest.mark.parametrize("body, content_type", [
+    ("<html>upstream proxy error</html>", "text/html"),
+    ('{"candidates": [', "application/json"),
+])
+def test_unparsable_body_is_retried_and_fails_cleanly(body, content_type):
+    async def garbled(request):
+        return web.Response(text=body, content_type=content_type)
+
+    text, calls = asyncio.run(generate_against(garbled))
+
+    assert text is None
+    assert calls == 2
+
+
+def test_empty_answer_is_not_retried():
+    async def empty(request):
+        return web.json_response({"candidates": []})
+
+    text, calls = asyncio.run(generate_against(empty))
+
+    assert text is None
+    assert calls == 1
+
+
+def test_sessions_of_closed_loops_are_dropped():
+    async def open_session():
+        return await get_async_session("http://127.0.0.1:9/generate")
+
+    # Each asyncio.run uses a fresh loop and closes it without closing the session
+    first = asyncio.run(open_session())
+    second = asyncio.run(open_session())
+
+    assert first is not second
+    assert len(async_api_client._sessions) == 1
+    asyncio.run(first.close())
+    asyncio.run(second.close())
@@ -0,0 +1,69 @@
+"""Tests for opening a circuit breaker and probing it while half-open."""
+
+import time
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def open_breaker(half_open_max_calls: int = 1) -> CircuitBreaker:
+    breaker = CircuitBreaker("key:rest", failure_threshold=2, recovery_timeout=0.05,
+                             half_open_max_calls=half_open_max_calls)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("key:rest", failure_threshold=2, recovery_timeout=60)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_half_open_breaker_admits_only_its_probes():
+    breaker = open_breaker(half_open_max_calls=2)
+    time.sleep(0.06)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.is_open()
+
+
+def test_cancelled_probe_gives_its_slot_back():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.cancel()
+
+    assert breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["opened"] == 2
@@ -0,0 +1,83 @@
+"""Tests for resolving DAG nodes that are still running or have not started yet."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dag_scheduler import DAGScheduler, Node
+
+
+def test_resolving_a_running_node_releases_its_dependents():
+    slow_started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def slow(_):
+        slow_started.set()
+        release.wait(5)
+        return "late result"
+
+    def trigger(_):
+        assert slow_started.wait(2)
+        return "go"
+
+    def resolve_slow(run, name):
+        if name == "trigger":
+            assert run.resolve("slow", "substitute")
+
+    def after(inputs):
+        seen.append(inputs["slow"])
+        return "done"
+
+    nodes = [Node("slow", slow), Node("trigger", trigger), Node("after", after, ["slow"])]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        run = DAGScheduler(executor).run(nodes, timeout=2, listener=resolve_slow)
+        release.set()
+
+    assert seen == ["substitute"]
+    assert run.results["slow"] == "substitute"
+    assert run.abandoned == ["slow"]
+    assert run.results["after"] == "done"
+
+
+def test_resolving_a_node_before_it_starts_means_it_never_runs():
+    resolved = threading.Event()
+    calls = []
+
+    def first(_):
+        assert resolved.wait(2)
+        return "first"
+
+    def second(_):
+        calls.append("second")
+        return "second"
+
+    def resolve_second(run, name):
+        if name == "trigger":
+            assert run.resolve("second", "substitute")
+            resolved.set()
+
+    nodes = [
+        Node("first", first), Node("trigger", lambda _: "go"),
+        Node("second", second, ["first"]), Node("last", lambda inputs: inputs["second"], ["second"])
+    ]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        run = DAGScheduler(executor).run(nodes, timeout=2, listener=resolve_second)
+
+    assert calls == []
+    assert run.results["last"] == "substitute"
+    assert run.abandoned == ["second"]
+
+
+def test_a_finished_node_cannot_be_resolved():
+    attempts = []
+
+    def resolve_again(run, name):
+        if name == "only":
+            attempts.append(run.resolve("only", "substitute"))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        run = DAGScheduler(executor).run([Node("only", lambda _: "result")], timeout=2, listener=resolve_again)
+
+    assert attempts == [False]
+    assert run.results["only"] == "result"
+    assert not run.resolve("only", "substitute")
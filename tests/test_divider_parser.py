@@ -0,0 +1,82 @@
+"""Tests for parsing a streamed divider response whatever way its chunks are split."""
+
+import json
+
+import pytest
+
+from models import DividerAgent, SUBTASK_MARKER_PATTERN, SubtaskStreamParser
+
+JSON_RESPONSE = json.dumps({"subtasks": [
+    {"title": "Build the layout", "description": "A grid with {braces} and a \"quoted\" name"},
+    {"title": "Style it", "description": "Colours, spacing and a back\\slash"},
+    {"title": "Wire up the form", "description": "Validate input; submit with fetch"},
+]}, indent=2)
+
+TEXT_RESPONSE = """Here is the plan.
+
+Subtask 1: Build the layout
+- header, main and footer
+Use a CSS grid.
+
+Subtask 2: Style it
+```css
+Subtask 3: not a header inside a fence
+```
+Pick a palette.
+
+Subtask 3: Wire up the form
+1. Validate input
+2. Submit with fetch
+"""
+
+
+def feed_in_chunks(text: str, size: int) -> list:
+    parser = SubtaskStreamParser(num_subtasks=10)
+    subtasks = []
+    for start in range(0, len(text), size):
+        subtasks += parser.feed(text[start:start + size])
+    return subtasks + parser.close()
+
+
+def feed_split_at(text: str, split: int) -> list:
+    parser = SubtaskStreamParser(num_subtasks=10)
+    subtasks = parser.feed(text[:split]) + parser.feed(text[split:])
+    return subtasks + parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_json_items_survive_any_chunk_size(size):
+    expected = DividerAgent("test-key")._parse_json_subtasks(JSON_RESPONSE)
+
+    assert len(expected) == 3
+    assert feed_in_chunks(JSON_RESPONSE, size) == expected
+
+
+def test_json_items_survive_a_split_at_every_position():
+    expected = DividerAgent("test-key")._parse_json_subtasks(JSON_RESPONSE)
+
+    for split in range(1, len(JSON_RESPONSE)):
+        assert feed_split_at(JSON_RESPONSE, split) == expected, f"split at {split}"
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 13, 64])
+def test_text_blocks_survive_any_chunk_size(size):
+    expected = DividerAgent("test-key")._scan_subtasks(TEXT_RESPONSE, SUBTASK_MARKER_PATTERN)
+
+    assert [subtask["title"] for subtask in expected] == ["Build the layout", "Style it", "Wire up the form"]
+    assert feed_in_chunks(TEXT_RESPONSE, size) == expected
+
+
+def test_text_blocks_survive_a_split_at_every_position():
+    expected = DividerAgent("test-key")._scan_subtasks(TEXT_RESPONSE, SUBTASK_MARKER_PATTERN)
+
+    for split in range(1, len(TEXT_RESPONSE)):
+        assert feed_split_at(TEXT_RESPONSE, split) == expected, f"split at {split}"
+
+
+def test_json_item_is_emitted_as_soon_as_it_closes():
+    parser = SubtaskStreamParser(num_subtasks=10)
+    first_item_end = JSON_RESPONSE.index("},") + 1
+
+    assert parser.feed(JSON_RESPONSE[:first_item_end - 1]) == []
+    assert [subtask["number"] for subtask in parser.feed(JSON_RESPONSE[first_item_end - 1:first_item_end])] == [1]
@@ -0,0 +1,60 @@
+"""Tests for hedged calls: when the hedge is sent and how the losing leg is cancelled."""
+
+import threading
+
+from hedging import RequestHedger
+from retry_policy import Deadline
+
+
+def quick_hedger() -> RequestHedger:
+    """A hedger that hedges after 50 ms, whatever latencies it has seen."""
+    return RequestHedger("test", initial_delay=0.05, min_delay=0.05, max_delay=0.05, min_samples=1000)
+
+
+def test_losing_primary_is_cancelled_when_the_hedge_wins():
+    hedger = quick_hedger()
+    primary_cancelled = threading.Event()
+    calls = []
+
+    def call(deadline):
+        calls.append(deadline)
+        if len(calls) == 1:
+            if not deadline.sleep(5):
+                primary_cancelled.set()
+            return None
+        return "hedge answer"
+
+    request_deadline = Deadline(30)
+    result = hedger.run(call, deadline=request_deadline)
+
+    assert result == "hedge answer"
+    assert primary_cancelled.wait(1)
+    assert not request_deadline.cancelled
+    stats = hedger.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["cancelled"] == 1
+
+
+def test_fast_primary_sends_no_hedge():
+    hedger = quick_hedger()
+    calls = []
+
+    def call(deadline):
+        calls.append(deadline)
+        return "primary answer"
+
+    assert hedger.run(call, deadline=Deadline(30)) == "primary answer"
+    assert len(calls) == 1
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_no_hedge_without_time_for_another_attempt():
+    hedger = quick_hedger()
+    calls = []
+
+    def call(deadline):
+        calls.append(deadline)
+        deadline.sleep(0.1)
+        return "slow answer"
+
+    assert hedger.run(call, deadline=Deadline(0.5), min_attempt_time=1.0) == "slow answer"
+    assert len(calls) == 1
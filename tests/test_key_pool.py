@@ -0,0 +1,79 @@
+"""Tests for how the API key pool spreads calls and benches failing keys."""
+
+import time
+
+from key_pool import EXHAUSTED, FAILURE, SKIPPED, SUCCESS, APIKeyPool
+
+
+def test_least_loaded_spreads_concurrent_calls():
+    pool = APIKeyPool(["key-a", "key-b", "key-c"], strategy="least_loaded")
+
+    leased = [pool.acquire() for _ in range(3)]
+
+    assert sorted(key.api_key for key in leased) == ["key-a", "key-b", "key-c"]
+
+
+def test_excluded_key_is_avoided_while_another_is_available():
+    pool = APIKeyPool(["key-a", "key-b"], strategy="least_loaded")
+    first = pool.acquire()
+    pool.release(first, FAILURE)
+
+    assert pool.acquire(exclude=[first.key_id]).api_key != first.api_key
+
+
+def test_exhausted_key_is_benched_at_once():
+    pool = APIKeyPool(["key-a", "key-b"], cooldown=60)
+    key = pool.acquire()
+    pool.release(key, EXHAUSTED)
+
+    assert all(pool.acquire().api_key != key.api_key for _ in range(4))
+
+
+def test_failing_key_is_benched_after_the_threshold():
+    pool = APIKeyPool(["key-a"], failure_threshold=2, cooldown=60)
+    key = pool.acquire()
+    pool.release(key, FAILURE)
+    assert pool.stats()[0]["available"]
+
+    pool.release(pool.acquire(), FAILURE)
+
+    assert not pool.stats()[0]["available"]
+
+
+def test_success_resets_the_failure_streak():
+    pool = APIKeyPool(["key-a"], failure_threshold=2, cooldown=60)
+    pool.release(pool.acquire(), FAILURE)
+    pool.release(pool.acquire(), SUCCESS)
+    pool.release(pool.acquire(), FAILURE)
+
+    assert pool.stats()[0]["available"]
+
+
+def test_skipped_call_is_not_held_against_the_key():
+    pool = APIKeyPool(["key-a"], failure_threshold=1, cooldown=60)
+    pool.release(pool.acquire(), SKIPPED)
+
+    stats = pool.stats()[0]
+    assert stats["available"] and stats["failures"] == 0 and stats["in_flight"] == 0
+
+
+def test_all_keys_benched_falls_back_to_the_first_to_recover():
+    pool = APIKeyPool(["key-a", "key-b"], cooldown=60)
+    first = pool.acquire()
+    pool.release(first, EXHAUSTED)
+    time.sleep(0.01)
+    second = pool.acquire()
+    pool.release(second, EXHAUSTED)
+
+    assert pool.acquire().api_key == first.api_key
+
+
+def test_weighted_round_robin_follows_the_weights():
+    pool = APIKeyPool(["key-a", "key-b"], strategy="round_robin", weights={"key-a": 3})
+    picks = []
+    for _ in range(8):
+        key = pool.acquire()
+        picks.append(key.api_key)
+        pool.release(key, SUCCESS)
+
+    assert picks.count("key-a") == 6 and picks.count("key-b") == 2
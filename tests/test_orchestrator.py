@@ -0,0 +1,87 @@
+"""Tests for how the multi-agent pipeline reports subtasks without a solution and survives failed merges."""
+
+import json
+import functools
+import threading
+
+import orchestrator
+from orchestrator import MultiAgentOrchestrator
+from stage_quorum import StageQuorum
+
+
+class StubClient:
+    """Stands in for an agent's GeminiAPIClient, answering every call with respond(prompt, deadline)."""
+
+    def __init__(self, respond):
+        self.respond = respond
+
+    def generate_content(self, prompt, temperature=0.7, deadline=None, system_instruction=None, **kwargs):
+        return self.respond(prompt, deadline)
+
+
+class RecordingQuorum(StageQuorum):
+    """A StageQuorum that signals once it has counted thinker_3's result."""
+
+    thinker_3_settled = None
+
+    def __call__(self, run, name):
+        super().__call__(run, name)
+        if name == "thinker_3":
+            self.thinker_3_settled.set()
+
+
+def test_subtasks_cut_off_by_the_quorum_are_missing_not_failed(monkeypatch):
+    failed = threading.Event()
+    monkeypatch.setattr(RecordingQuorum, "thinker_3_settled", failed)
+    monkeypatch.setattr(orchestrator, "StageQuorum", functools.partial(RecordingQuorum, ratio=0.5, timeout=None))
+    pipeline = MultiAgentOrchestrator(stream_divider=False)
+    subtasks = [{"number": n, "title": f"Part {n}", "description": f"Build part {n}"} for n in range(1, 5)]
+
+    def solve(prompt, deadline):
+        # Succeed only after thinker 3's failure was counted, so thinker 4 is the only one cut off
+        failed.wait(2)
+        return "A solution"
+
+    def fail(prompt, deadline):
+        return None
+
+    def hang(prompt, deadline):
+        deadline.sleep(10)
+        return None
+
+    pipeline.divider.api_client = StubClient(lambda prompt, deadline: json.dumps({"subtasks": subtasks}))
+    for thinker, respond in zip(pipeline.thinkers, [solve, solve, fail, hang]):
+        thinker.api_client = StubClient(respond)
+    for combiner in pipeline.mid_combiners + [pipeline.final_combiner]:
+        combiner.api_client = StubClient(lambda prompt, deadline: "Merged")
+
+    result = pipeline.process_task("Build a four part app", fan_out=4)
+    metadata = result["metadata"]
+
+    assert result["success"]
+    assert metadata["thinker_stage"]["abandoned"] == ["thinker_4"]
+    assert metadata["failed_subtasks"] == [3]
+    assert [entry["number"] for entry in metadata["missing_subtasks"]] == [3, 4]
+
+
+def test_failed_mid_combiner_passes_its_solutions_to_the_final_combiner():
+    pipeline = MultiAgentOrchestrator(stream_divider=False)
+    subtasks = [{"number": n, "title": f"Part {n}", "description": f"Build part {n}"} for n in range(1, 5)]
+    final_prompts = []
+
+    def final(prompt, deadline):
+        final_prompts.append(prompt)
+        return "Final answer"
+
+    pipeline.divider.api_client = StubClient(lambda prompt, deadline: json.dumps({"subtasks": subtasks}))
+    for number, thinker in enumerate(pipeline.thinkers[:4], start=1):
+        thinker.api_client = StubClient(lambda prompt, deadline, number=number: f"Solution {number}")
+    for combiner in pipeline.mid_combiners:
+        combiner.api_client = StubClient(lambda prompt, deadline: None)
+    pipeline.final_combiner.api_client = StubClient(final)
+
+    result = pipeline.process_task("Build a four part app", fan_out=4)
+
+    assert result["success"]
+    assert result["metadata"]["missing_subtasks"] == []
+    assert all(f"Solution {number}" in final_prompts[0] for number in range(1, 5))
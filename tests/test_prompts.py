@@ -0,0 +1,74 @@
+"""Tests for the prompt templates."""
+
+import prompts
+
+
+def test_divider_prompt_alias_formats():
+    text = prompts.DIVIDER_PROMPT.format(user_task="Build a todo app", num_subtasks=4)
+
+    assert text.startswith(prompts.DIVIDER_SYSTEM_PROMPT)
+    assert '{"subtasks": [{"number": 1' in text
+    assert text.endswith("USER REQUEST: Build a todo app\n\nNUMBER OF SUBTASKS: 4")
+
+
+def test_combined_templates_format_with_their_fields():
+    prompts.THINKER_PROMPT.format(subtask="Write the parser", subtask_number=1)
+    prompts.MID_COMBINER_PROMPT.format(subtask_descriptions="1. Parser", code_implementations="def parse(): ...")
+    prompts.FINAL_COMBINER_PROMPT.format(content_sections="A", original_task="Build it")
+
+
+class RecordingClient:
+    """Stands in for an agent's GeminiAPIClient and keeps the prompts it is sent."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return "Final answer"
+
+
+def final_combiner_prompt(blocks):
+    from models import FinalCombinerAgent
+
+    agent = FinalCombinerAgent("test-final-combiner-key")
+    agent.api_client = RecordingClient()
+    result = agent.process([{"merged_code": block} for block in blocks], "Build a todo app")
+    assert result["success"]
+    return agent.api_client.prompts[0]
+
+
+def test_final_combiner_passes_a_single_block_through():
+    prompt = final_combiner_prompt(["The only block"])
+
+    assert "The only block" in prompt
+    assert "SECTION" not in prompt
+
+
+def test_final_combiner_labels_every_block():
+    prompt = final_combiner_prompt(["Block A", "Block B", "Block C"])
+
+    assert prompt.index("--- SECTION 1 ---\n\nBlock A") < prompt.index("--- SECTION 3 ---\n\nBlock C")
+
+
+def test_mid_combiner_prompt_fits_with_headers_notes_and_system_instruction(monkeypatch):
+    import models
+    from token_estimator import get_default_estimator
+
+    estimator = get_default_estimator()
+    results = [
+        {"subtask": {"number": n, "title": f"Part {n} of a long plan"}, "solution": "x" * 4000}
+        for n in range(1, 9)
+    ]
+    missing = [{"number": 9, "title": "Part 9", "reason": "the thinker failed"}]
+    budget = estimator.estimate(prompts.MID_COMBINER_SYSTEM_PROMPT) + 1500
+    monkeypatch.setattr(models, "MAX_PROMPT_TOKENS", budget)
+
+    agent = models.MidCombinerAgent("test-mid-combiner-1-key", 1)
+    agent.api_client = RecordingClient()
+    agent.process(results, missing=missing)
+    prompt = agent.api_client.prompts[0]
+
+    assert prompt.count("--- SUBTASK") == 8
+    assert "Part 9" in prompt
+    assert estimator.estimate(prompt) + estimator.estimate(prompts.MID_COMBINER_SYSTEM_PROMPT) <= budget
@@ -0,0 +1,51 @@
+"""Tests for queueing on a key's rate limit and giving up when the caller's deadline is cancelled."""
+
+import threading
+import time
+
+import pytest
+
+from rate_limiter import KeyRateLimiter, RateLimitExceeded, RateLimitWaitCancelled
+from retry_policy import Deadline
+
+
+def test_wait_beyond_max_wait_is_refused():
+    limiter = KeyRateLimiter("key", rpm=60)
+    for _ in range(60):
+        limiter.acquire()
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(max_wait=0.1)
+
+
+def test_queued_caller_waits_for_capacity():
+    # 600 requests per minute: one more request every 0.1s
+    limiter = KeyRateLimiter("key", rpm=600)
+    for _ in range(600):
+        limiter.acquire()
+
+    waited = limiter.acquire(max_wait=1)
+
+    assert 0 < waited <= 0.11
+
+
+def test_cancelled_wait_gives_up_without_consuming_capacity():
+    # One request every 0.5s once the bucket is empty
+    limiter = KeyRateLimiter("key", rpm=120, tpm=6000)
+    for _ in range(120):
+        limiter.acquire()
+    before = limiter.stats()
+    deadline = Deadline(30)
+    threading.Timer(0.05, deadline.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(RateLimitWaitCancelled):
+        limiter.acquire(estimated_tokens=1000, max_wait=5, deadline=deadline)
+
+    assert time.monotonic() - start < 0.4
+    after = limiter.stats()
+    assert after["acquired"] == before["acquired"]
+    assert after["cancelled"] == 1
+    # Only the refill since then has been added back; the cancelled request's share is not spent
+    assert after["requests_available"] >= before["requests_available"]
+    assert after["tokens_available"] >= before["tokens_available"]
@@ -0,0 +1,46 @@
+"""Tests for sharing the SQLite response cache between processes."""
+
+import os
+import subprocess
+import sys
+
+from response_cache import SQLiteResponseCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def in_other_process(path: str, code: str) -> str:
+    """Run code against a SQLiteResponseCache on path in a fresh interpreter; returns its stdout."""
+    script = f"from response_cache import SQLiteResponseCache\ncache = SQLiteResponseCache({path!r})\n{code}"
+    completed = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True,
+                               text=True, timeout=30, check=True)
+    return completed.stdout.strip()
+
+
+def test_entry_written_by_another_process_is_a_hit(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = SQLiteResponseCache(path)
+
+    in_other_process(path, "cache.set('shared-key', 'written elsewhere')")
+
+    assert cache.get("shared-key") == "written elsewhere"
+
+
+def test_entry_written_here_is_a_hit_in_another_process(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = SQLiteResponseCache(path)
+    cache.set("shared-key", "written here")
+
+    assert in_other_process(path, "print(cache.get('shared-key'))") == "written here"
+
+
+def test_processes_share_the_size_budget(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = SQLiteResponseCache(path, max_bytes=100)
+    cache.set("old", "x" * 60)
+
+    # The other process's write pushes the shared file over budget and evicts ours
+    in_other_process(path, "cache.max_bytes = 100\ncache.set('new', 'y' * 60)")
+
+    assert cache.get("old") is None
+    assert cache.get("new") == "y" * 60
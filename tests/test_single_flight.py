@@ -0,0 +1,75 @@
+"""Tests for coalescing identical in-flight calls and bounding followers by their own deadline."""
+
+import threading
+import time
+
+from retry_policy import Deadline
+from single_flight import SingleFlight
+
+
+def start_leader(flights: SingleFlight, fn, deadline=None) -> threading.Thread:
+    """Run fn as the leader of key "k" on a thread and wait until it is in flight."""
+    thread = threading.Thread(target=flights.do, args=("k", fn), kwargs={"deadline": deadline})
+    thread.start()
+    while flights.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    return thread
+
+
+def test_follower_shares_the_leaders_result():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    leader = start_leader(flights, lambda: release.wait(5) and "answer")
+
+    follower_result = []
+    follower = threading.Thread(target=lambda: follower_result.append(flights.do("k", lambda: "own run")))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert follower_result == ["answer"]
+    assert flights.stats()["executions"] == 1
+    assert flights.stats()["merged"] == 1
+
+
+def test_follower_runs_itself_once_its_deadline_is_up():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    leader = start_leader(flights, lambda: release.wait(5) and "slow answer")
+
+    started = time.monotonic()
+    result = flights.do("k", lambda: "own run", deadline=Deadline(0.1))
+    waited = time.monotonic() - started
+    release.set()
+    leader.join()
+
+    assert result == "own run"
+    assert waited < 1.0
+    assert flights.stats()["reruns"] == 1
+
+
+def test_outcome_of_a_cancelled_leader_is_not_shared():
+    flights = SingleFlight("test")
+    leader_deadline = Deadline(30)
+    release = threading.Event()
+
+    def cut_short():
+        release.wait(5)
+        leader_deadline.cancel()
+        return None
+
+    leader = start_leader(flights, cut_short, deadline=leader_deadline)
+    follower_result = []
+    follower = threading.Thread(
+        target=lambda: follower_result.append(flights.do("k", lambda: "own run", deadline=Deadline(30)))
+    )
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert follower_result == ["own run"]
+    assert flights.stats()["reruns"] == 1
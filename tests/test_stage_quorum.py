@@ -0,0 +1,102 @@
+"""Tests for closing the thinker stage early and cancelling the work still in flight."""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import GeminiAPIClient, MockTransport
+from dag_scheduler import DAGScheduler, Node
+from mock_gemini_server import MockSettings
+from retry_policy import Deadline
+from stage_quorum import CLOSED_BY_QUORUM, StageQuorum
+
+
+def slow_client(latency: float) -> GeminiAPIClient:
+    """A client whose every call takes latency seconds on an in-process mock."""
+    settings = MockSettings(latency_median=latency, latency_sigma=0.0, latency_max=latency, seed=1)
+    return GeminiAPIClient("test-key", agent_name="Slow Thinker", transports=[MockTransport(settings)], hooks=[])
+
+
+def test_child_deadline_is_cancelled_with_its_parent():
+    parent = Deadline(30)
+    child = parent.child()
+    grandchild = child.child()
+
+    parent.cancel()
+
+    assert child.cancelled and grandchild.cancelled
+    assert child.expired() and grandchild.expired()
+
+
+def test_cancelling_a_child_leaves_the_parent_running():
+    parent = Deadline(30)
+    child = parent.child()
+
+    child.cancel()
+
+    assert child.cancelled
+    assert not parent.cancelled
+    assert parent.remaining() > 0
+
+
+def test_child_of_a_cancelled_deadline_starts_cancelled():
+    parent = Deadline(30)
+    parent.cancel()
+
+    assert parent.child().cancelled
+
+
+def test_sleep_wakes_on_cancel():
+    deadline = Deadline(30)
+    threading.Timer(0.05, deadline.cancel).start()
+
+    start = time.monotonic()
+    slept = deadline.sleep(5)
+
+    assert not slept
+    assert time.monotonic() - start < 1
+
+
+def test_quorum_closes_stage_and_stops_in_flight_thinker():
+    request_deadline = Deadline(30)
+    slow_started = threading.Event()
+    slow_finished = threading.Event()
+    slow_elapsed = []
+
+    quorum = StageQuorum(
+        ["fast", "slow"],
+        placeholder=lambda name, reason: {"success": False, "error": reason},
+        succeeded=lambda result: result["success"],
+        ratio=0.5,
+        timeout=None,
+    )
+
+    def fast(_):
+        quorum.member_deadline("fast", request_deadline)
+        # Reach the quorum only once the slow thinker's call is in flight
+        assert slow_started.wait(2)
+        time.sleep(0.1)
+        return {"success": True}
+
+    def slow(_):
+        deadline = quorum.member_deadline("slow", request_deadline)
+        start = time.monotonic()
+        slow_started.set()
+        text = slow_client(10.0).generate_content("Solve this subtask", deadline=deadline)
+        slow_elapsed.append(time.monotonic() - start)
+        slow_finished.set()
+        return {"success": text is not None}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        start = time.monotonic()
+        run = DAGScheduler(executor).run([Node("fast", fast), Node("slow", slow)], timeout=5, listener=quorum)
+        stage_time = time.monotonic() - start
+
+        assert slow_finished.wait(2), "the slow thinker kept running after the stage closed"
+
+    assert stage_time < 2
+    assert slow_elapsed[0] < 2
+    assert quorum.closed_by == CLOSED_BY_QUORUM
+    assert quorum.abandoned == ["slow"]
+    assert run.results["slow"] == {"success": False, "error": CLOSED_BY_QUORUM}
+    assert not request_deadline.cancelled
@@ -0,0 +1,88 @@
+"""Tests for streaming over the client's transports and the divider's stream fallback."""
+
+import json
+
+import pytest
+
+from api_client import AttemptResult, GeminiAPIClient, MockTransport, StreamFailedError, Transport
+from mock_gemini_server import MockSettings
+from models import DividerAgent
+from retry_policy import RetryPolicy
+
+
+def client_for(*transports) -> GeminiAPIClient:
+    client = GeminiAPIClient("test-key", agent_name="Stream Test", transports=list(transports), hooks=[])
+    client.retry_policy = RetryPolicy(max_attempts=client.max_retries, base_delay=0.01, max_delay=0.01)
+    return client
+
+
+class SendOnlyTransport(Transport):
+    """A transport without a streaming endpoint, answering every send with text."""
+
+    name = "send_only"
+
+    def __init__(self, text):
+        self.text = text
+        self.sends = 0
+
+    def send(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        self.sends += 1
+        return AttemptResult(text=self.text, status=200)
+
+
+class EmptyStreamTransport(SendOnlyTransport):
+    """Streams complete with no text; plain sends answer normally."""
+
+    name = "empty_stream"
+
+    def stream(self, client, api_key, prompt, temperature, system_instruction, cached_content, deadline):
+        return AttemptResult(status=200)
+        yield
+
+
+def test_stream_uses_the_configured_transport_in_chunks():
+    mock = MockTransport(MockSettings(latency_median=0.02, latency_sigma=0.0, chunks=4, seed=1))
+
+    chunks = list(client_for(mock).stream_content("Write a haiku"))
+
+    assert len(chunks) == 4
+    assert mock.state.methods["streamGenerateContent"] == 1
+
+
+def test_transport_without_streaming_delivers_one_chunk():
+    transport = SendOnlyTransport("The whole answer")
+
+    assert list(client_for(transport).stream_content("Write a haiku")) == ["The whole answer"]
+    assert transport.sends == 1
+
+
+def test_failed_stream_raises_after_its_retries():
+    mock = MockTransport(MockSettings(latency_median=0.01, latency_sigma=0.0, error_rate=1.0,
+                                      error_status=503, retry_after=0.0, seed=1))
+    client = client_for(mock)
+
+    with pytest.raises(StreamFailedError):
+        list(client.stream_content("Write a haiku"))
+    assert mock.state.requests == client.max_retries
+
+
+def test_divider_does_not_retry_a_failed_stream_without_streaming():
+    mock = MockTransport(MockSettings(latency_median=0.01, latency_sigma=0.0, error_rate=1.0,
+                                      error_status=503, retry_after=0.0, seed=1))
+    divider = DividerAgent("test-divider-key")
+    divider.api_client = client_for(mock)
+
+    assert list(divider.process_stream("Build a todo app", num_subtasks=3)) == []
+    assert mock.state.requests == divider.api_client.max_retries
+
+
+def test_divider_falls_back_when_the_stream_completes_empty():
+    subtasks = [{"number": n, "title": f"Part {n}", "description": f"Build part {n}"} for n in (1, 2)]
+    transport = EmptyStreamTransport(json.dumps({"subtasks": subtasks}))
+    divider = DividerAgent("test-divider-key")
+    divider.api_client = client_for(transport)
+
+    streamed = list(divider.process_stream("Build a todo app", num_subtasks=2))
+
+    assert [subtask["title"] for subtask in streamed] == ["Part 1", "Part 2"]
+    assert transport.sends == 1
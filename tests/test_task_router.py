@@ -0,0 +1,41 @@
+"""Tests for routing requests to a single call, a reduced tree or the full pipeline."""
+
+import pytest
+
+from task_analyzer import estimate_complexity
+from task_router import ROUTE_FULL, ROUTE_REDUCED, ROUTE_SINGLE, TaskRouter
+
+
+@pytest.mark.parametrize("task", [
+    "Hi there!",
+    "What is a closure in JavaScript, and how does it differ from a class?",
+    "What is the difference between TCP and UDP and when should I use each one?",
+])
+def test_greetings_and_two_part_questions_take_a_single_call(task):
+    assert TaskRouter().route(task).route == ROUTE_SINGLE
+
+
+@pytest.mark.parametrize("task", [
+    "Build a landing page with a hero section, a pricing table and a contact form",
+    "Build a responsive website with a navbar, a photo gallery and a contact form using HTML, CSS and JavaScript",
+])
+def test_list_of_parts_is_one_requirement_and_not_the_full_pipeline(task):
+    decision = TaskRouter().route(task)
+
+    assert decision.complexity["requirements"] == 0
+    assert decision.route == ROUTE_REDUCED
+
+
+def test_several_instructions_take_the_full_pipeline():
+    task = ("Build a todo app in React, add user authentication, store tasks in a Postgres database, "
+            "write unit tests and deploy it to Vercel")
+    decision = TaskRouter().route(task)
+
+    assert decision.complexity["requirements"] == 4
+    assert decision.route == ROUTE_FULL
+
+
+def test_list_items_count_as_requirements():
+    task = "Create a REST API in Flask:\n- user signup\n- login with JWT\n- CRUD for notes"
+
+    assert estimate_complexity(task)["requirements"] == 3
@@ -0,0 +1,257 @@
+"""
+Token Estimator module for ParadoxGPT.
+
+This module estimates prompt sizes locally, without a network round trip, so
+oversize prompts can be rejected or trimmed before they are sent. The
+characters-per-token ratio is calibrated against the token counts Gemini
+reports (usageMetadata on every response, or countTokens on demand), with a
+fixed heuristic used until calibration data is available.
+"""
+
+import sys
+import math
+import logging
+import argparse
+import threading
+from typing import Dict, Any, List, Optional
+
+from config import (
+    GEMINI_API_BASE_URL, DIVIDER_API_KEY, REQUEST_TIMEOUT, TOKEN_CHARS_PER_TOKEN
+)
+from http_pool import get_session
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TRIM_MARKER = "\n\n[... {count} characters trimmed to fit the prompt size limit ...]\n\n"
+
+# Bounds that keep a bad sample from wrecking the ratio
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 8.0
+
+
+class TokenEstimator:
+    """Thread-safe local token estimator with a calibrated characters-per-token ratio."""
+
+    def __init__(self, chars_per_token: float = TOKEN_CHARS_PER_TOKEN):
+        """
+        Initialize the estimator.
+
+        Args:
+            chars_per_token: Starting ratio for ASCII text (about 4 for English and code)
+        """
+        self.chars_per_token = chars_per_token
+        self._calibrated_chars = 0
+        self._calibrated_tokens = 0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the number of tokens in a piece of text.
+
+        ASCII characters are divided by the calibrated ratio; other
+        characters (CJK, emoji, ...) are counted as a token each.
+
+        Args:
+            text: The text to measure
+
+        Returns:
+            The estimated token count
+        """
+        if not text:
+            return 0
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        other_chars = len(text) - ascii_chars
+        return max(1, math.ceil(ascii_chars / self.chars_per_token) + other_chars)
+
+    def calibrate(self, text: str, actual_tokens: int) -> None:
+        """
+        Refine the ratio with a token count reported by Gemini.
+
+        Args:
+            text: The text that was counted
+            actual_tokens: The tokens Gemini reported for it
+        """
+        if not text or not actual_tokens or actual_tokens <= 0:
+            return
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        ascii_tokens = actual_tokens - (len(text) - ascii_chars)
+        if ascii_chars == 0 or ascii_tokens <= 0:
+            return
+        with self._lock:
+            self._calibrated_chars += ascii_chars
+            self._calibrated_tokens += ascii_tokens
+            self._samples += 1
+            ratio = self._calibrated_chars / self._calibrated_tokens
+            self.chars_per_token = min(MAX_CHARS_PER_TOKEN, max(MIN_CHARS_PER_TOKEN, ratio))
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """
+        Cut text down to about max_tokens, keeping its head and tail.
+
+        Instructions usually sit at the start of a prompt and the request at
+        the end, so the middle is what gets dropped.
+
+        Args:
+            text: The text to trim
+            max_tokens: Token budget for the result
+
+        Returns:
+            The text unchanged if it fits, otherwise a trimmed copy with a marker
+        """
+        if self.estimate(text) <= max_tokens:
+            return text
+        keep = int(max_tokens * self.chars_per_token)
+        while keep > 0:
+            head = keep * 2 // 3
+            tail = keep - head
+            trimmed = text[:head] + TRIM_MARKER.format(count=len(text) - keep) + (text[-tail:] if tail else "")
+            if self.estimate(trimmed) <= max_tokens:
+                return trimmed
+            keep = int(keep * 0.9)
+        return ""
+
+    def fit(self, parts: List[str], max_tokens: int) -> List[str]:
+        """
+        Trim a set of texts so that together they fit a token budget.
+
+        The largest parts are trimmed first, so short parts survive intact.
+
+        Args:
+            parts: The texts that share the budget
+            max_tokens: Token budget for all parts together
+
+        Returns:
+            The parts, trimmed where needed, in the same order
+        """
+        sizes = [self.estimate(part) for part in parts]
+        if sum(sizes) <= max_tokens:
+            return list(parts)
+
+        # Water-filling: find the per-part cap that uses up the budget
+        remaining = max(0, max_tokens)
+        cap = 0
+        for index, size in enumerate(sorted(sizes)):
+            share = remaining // (len(sizes) - index)
+            if size <= share:
+                remaining -= size
+                continue
+            cap = share
+            break
+        return [self.trim(part, cap) if size > cap else part for part, size in zip(parts, sizes)]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the current ratio and calibration state.
+
+        Returns:
+            A dictionary with the ratio and number of calibration samples
+        """
+        with self._lock:
+            return {
+                "chars_per_token": round(self.chars_per_token, 3),
+                "samples": self._samples,
+                "calibrated": self._samples > 0
+            }
+
+
+def count_tokens(text: str, api_key: str, base_url: str = GEMINI_API_BASE_URL) -> Optional[int]:
+    """
+    Ask Gemini's countTokens endpoint how many tokens a text uses.
+
+    Args:
+        text: The text to count
+        api_key: The API key for authentication
+        base_url: The model's generateContent URL
+
+    Returns:
+        The token count, or None if the call failed
+    """
+    url = base_url.replace(":generateContent", ":countTokens")
+    try:
+        response = get_session(url).post(
+            url,
+            headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+            json={"contents": [{"parts": [{"text": text}]}]},
+            timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code == 200:
+            return response.json().get("totalTokens")
+        logger.warning(f"countTokens returned status code {response.status_code}")
+    except Exception as e:
+        logger.warning(f"countTokens failed: {str(e)}")
+    return None
+
+
+_default_estimator: Optional[TokenEstimator] = None
+_default_estimator_lock = threading.Lock()
+
+
+def get_default_estimator() -> TokenEstimator:
+    """
+    Get the process-wide estimator, so calibration from every call is shared.
+
+    Returns:
+        The shared estimator
+    """
+    global _default_estimator
+    with _default_estimator_lock:
+        if _default_estimator is None:
+            _default_estimator = TokenEstimator()
+        return _default_estimator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: calibrate against countTokens or estimate a file."""
+    parser = argparse.ArgumentParser(description="ParadoxGPT token estimator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subparsers.add_parser(
+        "calibrate", help="Measure the characters-per-token ratio with countTokens"
+    )
+    calibrate_parser.add_argument("files", nargs="*", help="Sample texts (defaults to the built-in prompts)")
+    estimate_parser = subparsers.add_parser("estimate", help="Estimate the tokens in files")
+    estimate_parser.add_argument("files", nargs="+", help="Files to measure")
+    args = parser.parse_args(argv)
+
+    if args.command == "estimate":
+        estimator = TokenEstimator()
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                print(f"{path}: ~{estimator.estimate(f.read())} tokens")
+        return 0
+
+    if not DIVIDER_API_KEY:
+        print("DIVIDER_API_KEY is required to call countTokens", file=sys.stderr)
+        return 1
+
+    if args.files:
+        samples = []
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                samples.append(f.read())
+    else:
+        import prompts
+        samples = [value for name, value in vars(prompts).items() if name.isupper() and isinstance(value, str)]
+
+    estimator = TokenEstimator()
+    for text in samples:
+        actual = count_tokens(text, DIVIDER_API_KEY)
+        if actual is None:
+            continue
+        print(f"{len(text):>8} chars  ~{estimator.estimate(text):>6} estimated  {actual:>6} counted")
+        estimator.calibrate(text, actual)
+    stats = estimator.stats()
+    if not stats["calibrated"]:
+        print("No samples could be counted", file=sys.stderr)
+        return 1
+    print(f"TOKEN_CHARS_PER_TOKEN={stats['chars_per_token']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
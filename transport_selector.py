@@ -0,0 +1,182 @@
+"""
+Transport Selector module for ParadoxGPT.
+
+This module decides which transport (SDK, REST, async REST, mock) a Gemini
+call tries first. It keeps a window of recent outcomes and latencies per
+transport and, once every transport has enough samples, prefers the one with
+the lowest latency adjusted for its failure rate. A small exploration rate
+keeps the other transports measured so a recovered path can win back.
+"""
+
+import math
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import (
+    TRANSPORTS, TRANSPORT_STRATEGY, TRANSPORT_AUTO_PREFER, TRANSPORT_MIN_SAMPLES, TRANSPORT_WINDOW,
+    TRANSPORT_EXPLORE_RATE
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# All retries on the first transport, then the next as a last resort (the original behaviour)
+PREFERRED = "preferred"
+# One attempt per transport in turn, backing off only after every transport failed
+FALLBACK = "fallback"
+# The two best transports at once; the first answer wins
+RACE = "race"
+
+STRATEGIES = (PREFERRED, FALLBACK, RACE)
+
+# Floor on the success rate used in scoring, so one bad window cannot dominate the ranking
+MIN_SUCCESS_RATE = 0.05
+
+
+class TransportSelector:
+    """Orders transports for each call from their recent latency and failure rate."""
+
+    def __init__(self, order: Sequence[str] = TRANSPORTS, strategy: str = TRANSPORT_STRATEGY,
+                 auto_prefer: bool = TRANSPORT_AUTO_PREFER, min_samples: int = TRANSPORT_MIN_SAMPLES,
+                 window: int = TRANSPORT_WINDOW, explore_rate: float = TRANSPORT_EXPLORE_RATE):
+        """
+        Initialize the selector.
+
+        Args:
+            order: Transport names in configured order of preference
+            strategy: "preferred", "fallback" or "race"
+            auto_prefer: Reorder transports by measured performance
+            min_samples: Outcomes each transport needs before reordering
+            window: Number of recent outcomes kept per transport
+            explore_rate: Chance of trying the runner-up first to keep it measured
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown transport strategy {strategy!r}; expected one of {STRATEGIES}")
+        self.configured_order = list(order)
+        self.strategy = strategy
+        self.auto_prefer = auto_prefer
+        self.min_samples = min_samples
+        self.window = window
+        self.explore_rate = explore_rate
+        self._outcomes: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._preferred: Optional[str] = None
+
+    def record(self, name: str, latency: float, success: bool) -> None:
+        """
+        Record the outcome of one attempt on a transport.
+
+        Args:
+            name: The transport used
+            latency: Seconds the attempt took
+            success: Whether it produced a response
+        """
+        with self._lock:
+            outcomes = self._outcomes.setdefault(name, deque(maxlen=self.window))
+            outcomes.append((latency, success))
+            counters = self._counters.setdefault(name, {"attempts": 0, "successes": 0, "failures": 0, "wins": 0})
+            counters["attempts"] += 1
+            counters["successes" if success else "failures"] += 1
+
+    def record_win(self, name: str) -> None:
+        """Count a race won by a transport."""
+        with self._lock:
+            counters = self._counters.setdefault(name, {"attempts": 0, "successes": 0, "failures": 0, "wins": 0})
+            counters["wins"] += 1
+
+    def _score(self, name: str) -> Optional[float]:
+        """Median success latency divided by the success rate; lower is better."""
+        outcomes = list(self._outcomes.get(name, ()))
+        if len(outcomes) < self.min_samples:
+            return None
+        latencies = sorted(latency for latency, success in outcomes if success)
+        if not latencies:
+            # Nothing succeeded; fast failures must not make it look quick
+            return math.inf
+        success_rate = len(latencies) / len(outcomes)
+        median = latencies[len(latencies) // 2]
+        return median / max(MIN_SUCCESS_RATE, success_rate)
+
+    def order(self, names: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Get the transports to try for one call, best first.
+
+        Args:
+            names: The transports available to the caller (defaults to the configured ones)
+
+        Returns:
+            The names, reordered by score when every one has enough samples
+        """
+        names = list(names) if names is not None else list(self.configured_order)
+        if not self.auto_prefer or len(names) < 2:
+            return names
+
+        with self._lock:
+            scores = {name: self._score(name) for name in names}
+        if any(score is None for score in scores.values()):
+            return names
+
+        ranked = sorted(names, key=lambda name: (scores[name], names.index(name)))
+        if ranked[0] != self._preferred:
+            logger.info(f"Preferring transport {ranked[0]} "
+                        f"(scores: {', '.join(f'{name}={scores[name]:.3f}' for name in ranked)})")
+            self._preferred = ranked[0]
+        if self._random.random() < self.explore_rate:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        return ranked
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-transport counters, latencies and the current order.
+
+        Returns:
+            A dictionary with the strategy, the order in use and per-transport stats
+        """
+        with self._lock:
+            transports: Dict[str, Any] = {}
+            for name, counters in self._counters.items():
+                outcomes = list(self._outcomes.get(name, ()))
+                latencies = sorted(latency for latency, success in outcomes if success)
+                stats = dict(counters)
+                stats["success_rate"] = (
+                    sum(1 for _, success in outcomes if success) / len(outcomes) if outcomes else 0.0
+                )
+                stats["p50_latency"] = round(latencies[len(latencies) // 2], 3) if latencies else None
+                score = self._score(name)
+                stats["score"] = round(score, 4) if score is not None and math.isfinite(score) else None
+                transports[name] = stats
+        return {
+            "strategy": self.strategy,
+            "auto_prefer": self.auto_prefer,
+            "configured_order": self.configured_order,
+            "preferred": self._preferred or (self.configured_order[0] if self.configured_order else None),
+            "transports": transports
+        }
+
+
+_default_selector: Optional[TransportSelector] = None
+_default_selector_lock = threading.Lock()
+
+
+def get_default_transport_selector() -> TransportSelector:
+    """
+    Get the process-wide selector, so every client learns from the same outcomes.
+
+    Returns:
+        The shared selector
+    """
+    global _default_selector
+    with _default_selector_lock:
+        if _default_selector is None:
+            _default_selector = TransportSelector()
+            logger.info(f"Transports {', '.join(TRANSPORTS)} with strategy {TRANSPORT_STRATEGY}")
+        return _default_selector
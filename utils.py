@@ -7,6 +7,7 @@ distributed multi-agent code generation system.
 
 import os
 import json
+import hashlib
 import logging
 import time
 from typing import Dict, Any, Optional
@@ -67,6 +68,18 @@ def save_result_to_file(result: Dict[str, Any], output_dir: str = "output") -> s
 
     return solution_filename
 
+def hash_api_key(api_key: str) -> str:
+    """
+    Get a short, stable identifier for an API key that is safe to log.
+
+    Args:
+        api_key: The API key
+
+    Returns:
+        The first 12 hex characters of the key's SHA-256 digest
+    """
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
 def format_processing_time(seconds: float) -> str:
     """
     Format processing time in a human-readable format.